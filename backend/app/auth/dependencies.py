@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
-from ..database import engine
 from ..models.db_models import UserProfileDB
 from .security import verify_token
+from .user_cache import user_cache
+from ..config.settings import settings
 from typing import Optional
 
 security = HTTPBearer()
@@ -30,14 +30,25 @@ async def get_current_user(
             detail="Invalid token payload",
         )
     
-    with Session(engine) as session:
-        user = session.get(UserProfileDB, netid)
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-            )
-        return user
+    user = await user_cache.get_async(netid)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    return user
+
+
+async def get_admin_user(
+    current_user: UserProfileDB = Depends(get_current_user)
+) -> UserProfileDB:
+    """Dependency that only lets through users listed in settings.admin_netids."""
+    if current_user.netid not in settings.admin_netids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
 
 
 async def get_optional_user(
@@ -57,7 +68,5 @@ async def get_optional_user(
     if netid is None:
         return None
     
-    with Session(engine) as session:
-        user = session.get(UserProfileDB, netid)
-        return user
+    return await user_cache.get_async(netid)
 
@@ -0,0 +1,172 @@
+"""
+Google's ID-token signing keys, cached per worker.
+
+Google publishes its public keys as a JWKS whose Cache-Control max-age is
+usually several hours, and rotates them with overlap. Here they are fetched
+through one pooled HTTP client, parsed into key objects once, and kept for
+that max-age; a background task refreshes them shortly before they expire,
+so once warm a sign-in never waits on the network. A token signed with a
+key id we have not seen forces one early refresh (rate limited), which
+covers a rotation in the middle of a window. When a refresh fails the
+current keys stay in use and the refresh is retried sooner.
+
+Signature and claim checks are CPU work and run in a thread, off the event
+loop.
+"""
+import asyncio
+import math
+import re
+import time
+from typing import Optional
+import httpx
+from jose import jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import JOSEError
+from ..config.settings import settings
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleKeyCache:
+    def __init__(
+        self,
+        certs_url: str,
+        default_max_age: float,
+        refresh_margin: float,
+        min_refresh_interval: float,
+        retry_seconds: float,
+        timeout: float,
+    ):
+        self.certs_url = certs_url
+        self.default_max_age = default_max_age
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.retry_seconds = retry_seconds
+        self.timeout = timeout
+
+        self._keys: dict[str, Key] = {}
+        self._expires_at = 0.0
+        self._last_fetch = -math.inf
+        # The client, lock and task belong to one event loop; created on first use
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+        self.fetches = 0
+        self.failures = 0
+        self.cold_lookups = 0  # verifications that had to wait for a fetch
+        self.unknown_kids = 0
+
+    # Public API
+
+    def start(self) -> None:
+        """Begin refreshing in the background; call from inside the running loop."""
+        if self._refresher is None:
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_forever())
+
+    async def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._lock = None
+
+    async def get_key(self, kid: str) -> Optional[Key]:
+        """The signing key for `kid`, fetching the key set if it is stale or `kid` is new."""
+        if time.monotonic() >= self._expires_at:
+            self.cold_lookups += 1
+            await self.refresh()
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_fetch >= self.min_refresh_interval:
+            self.unknown_kids += 1
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+    async def verify(self, token: str, audience: str) -> dict:
+        """Claims of a valid Google ID token for `audience`; raises JOSEError otherwise."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = await self.get_key(kid) if kid else None
+        if key is None:
+            raise JOSEError("Unknown signing key")
+        return await asyncio.to_thread(
+            jwt.decode, token, key, algorithms=["RS256"], audience=audience, issuer=GOOGLE_ISSUERS,
+        )
+
+    async def refresh(self) -> None:
+        """Fetch the key set once, even if several requests ask at the same time."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        started = time.monotonic()
+        async with self._lock:
+            if self._last_fetch >= started:
+                return  # Someone else fetched while we waited
+            try:
+                await self._fetch()
+            except (httpx.HTTPError, ValueError, KeyError, JOSEError):
+                self.failures += 1
+                self._last_fetch = time.monotonic()
+                if not self._keys:
+                    raise
+                # Keep serving the keys we have and try again soon
+                self._expires_at = time.monotonic() + self.retry_seconds
+
+    def stats(self) -> dict:
+        return {
+            "keys": sorted(self._keys),
+            "expires_in_seconds": round(max(0.0, self._expires_at - time.monotonic()), 1),
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "cold_lookups": self.cold_lookups,
+            "unknown_kids": self.unknown_kids,
+        }
+
+    # Internals
+
+    async def _fetch(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        self.fetches += 1
+        response = await self._client.get(self.certs_url)
+        response.raise_for_status()
+        keys = {
+            entry["kid"]: jwk.construct(entry, algorithm=entry.get("alg", "RS256"))
+            for entry in response.json()["keys"]
+        }
+        now = time.monotonic()
+        self._keys = keys
+        self._last_fetch = now
+        self._expires_at = now + _max_age(response.headers.get("cache-control"), self.default_max_age)
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except (httpx.HTTPError, ValueError, KeyError, JOSEError):
+                # Nothing cached yet; sign-ins fetch on demand meanwhile
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            await asyncio.sleep(max(self._expires_at - time.monotonic() - self.refresh_margin, self.min_refresh_interval))
+
+
+def _max_age(cache_control: Optional[str], default: float) -> float:
+    match = _MAX_AGE.search(cache_control or "")
+    return float(match.group(1)) if match else default
+
+
+google_keys = GoogleKeyCache(
+    certs_url=settings.google_certs_url,
+    default_max_age=settings.google_certs_default_max_age_seconds,
+    refresh_margin=settings.google_certs_refresh_margin_seconds,
+    min_refresh_interval=settings.google_certs_min_refresh_seconds,
+    retry_seconds=settings.google_certs_retry_seconds,
+    timeout=settings.google_certs_timeout_seconds,
+)
@@ -1,32 +1,25 @@
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from typing import Optional
+from jose.exceptions import JOSEError
+import httpx
 from ..config.settings import settings
+from .google_keys import google_keys
 
 
-def verify_google_token(token: str) -> Optional[dict]:
+async def verify_google_token(token: str) -> Optional[dict]:
     """Verify a Google ID token and return user info."""
     try:
-        # Verify the token
-        idinfo = id_token.verify_oauth2_token(
-            token,
-            requests.Request(),
-            settings.google_client_id
-        )
-        
-        # Verify the issuer
-        if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-            raise ValueError('Wrong issuer.')
-        
-        return {
-            'email': idinfo.get('email'),
-            'name': idinfo.get('name'),
-            'picture': idinfo.get('picture'),
-            'sub': idinfo.get('sub'),  # Google user ID
-        }
-    except ValueError:
+        # Signature, audience, issuer and expiry, against the cached signing keys
+        idinfo = await google_keys.verify(token, settings.google_client_id)
+    except (JOSEError, httpx.HTTPError, ValueError, KeyError):
         return None
 
+    return {
+        'email': idinfo.get('email'),
+        'name': idinfo.get('name'),
+        'picture': idinfo.get('picture'),
+        'sub': idinfo.get('sub'),  # Google user ID
+    }
+
 
 def get_google_auth_url(state: Optional[str] = None) -> str:
     """Generate Google OAuth authorization URL."""
@@ -46,4 +39,3 @@ def get_google_auth_url(state: Optional[str] = None) -> str:
         params['state'] = state
     
     return f"{base_url}?{urlencode(params)}"
-
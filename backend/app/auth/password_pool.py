@@ -0,0 +1,107 @@
+"""
+Password hashing and verification off the event loop.
+
+bcrypt at the default work factor takes a few hundred milliseconds of CPU;
+run inline in an async endpoint it stalls every other request on the worker.
+Here it runs in a small process pool instead, behind a ConcurrencyLimiter so
+a login flood queues (up to a bound) and is then rejected with 503 rather
+than piling up. Workers run at a lower CPU priority so that, when cores are
+scarce, the event loop still gets scheduled ahead of hashing.
+
+By the time workers start the app already runs threads (the threadpool,
+aiosqlite's), and a fork could copy a lock one of them holds into the child
+and deadlock it. So workers come from a forkserver, which only imports this
+module (spawned where there is none). Each worker also re-imports the
+parent's __main__ (uvicorn's, or a script's, which needs the usual
+`if __name__ == "__main__":` guard), so start() brings them all up from the
+app lifespan and the first login does not wait for that.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Optional
+from ..config.settings import settings
+from ..services.concurrency import ConcurrencyLimiter
+from .security import get_password_hash, hash_rounds, verify_password
+
+
+def _lower_priority() -> None:
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):  # Not available on every platform
+        pass
+
+
+def _ready() -> None:
+    pass
+
+
+def _mp_context():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # By default the server imports __main__ (the whole app); workers only need this module
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, rounds: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.limiter = ConcurrencyLimiter("password", workers, max_queue, queue_timeout, retry_after)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.hashes = 0
+        self.verifications = 0
+        self.rehashes = 0
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=_mp_context(), initializer=_lower_priority
+            )
+            # Workers start on demand; one no-op each brings them all up before requests arrive
+            wait([self._executor.submit(_ready) for _ in range(self.workers)])
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        self.start()
+        async with self.limiter.slot():
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        """Raises OverloadedError when too many password operations are already waiting."""
+        self.hashes += 1
+        return await self._run(get_password_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        self.verifications += 1
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        rounds = hash_rounds(hashed_password)
+        return rounds is not None and rounds != self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "hashes": self.hashes,
+            "verifications": self.verifications,
+            "rehashes": self.rehashes,
+            **self.limiter.stats(),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    rounds=settings.bcrypt_rounds,
+    max_queue=settings.password_max_queue,
+    queue_timeout=settings.password_queue_timeout_seconds,
+    retry_after=settings.password_retry_after_seconds,
+)
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from ..database import engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..database import get_read_session, get_session
 from ..models.db_models import UserProfileDB
 from .schemas import (
     LoginRequest,
@@ -12,53 +15,88 @@ from .schemas import (
     GoogleTokenRequest,
 )
 from .security import (
-    verify_password,
-    get_password_hash,
+    UNUSABLE_PASSWORD,
     create_access_token,
     create_refresh_token,
     verify_token,
 )
+from .password_pool import password_hasher
 from .dependencies import get_current_user
+from .user_cache import invalidate_user_async
 from .google_oauth import verify_google_token, get_google_auth_url
 from datetime import timedelta
 from ..config.settings import settings
+from ..services.concurrency import OverloadedError
+from ..services.http_cache import VersionedResource, cache_headers, etag_matches, not_modified
+from ..services.profile_lists import sync_statements
+from ..services.serialization import ModelJSON
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+USER_JSON = ModelJSON(UserResponse)
+USER_ETAGS = VersionedResource("me", UserResponse)
+
+
+def _password_busy(e: OverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Too many sign-in attempts right now ({e.reason}), please retry shortly",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 
 @router.post("/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest):
+async def login(login_data: LoginRequest, session: AsyncSession = Depends(get_session)):
     """Login endpoint that returns access and refresh tokens."""
-    with Session(engine) as session:
-        # Find user by email
-        statement = select(UserProfileDB).where(UserProfileDB.email == login_data.email)
-        user = session.exec(statement).first()
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password",
-            )
-        
-        if not verify_password(login_data.password, user.hashed_password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password",
-            )
-        
-        # Create tokens
-        access_token = create_access_token(data={"sub": user.netid})
-        refresh_token = create_refresh_token(data={"sub": user.netid})
-        
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
+    # Find user by email
+    statement = select(UserProfileDB).where(UserProfileDB.email == login_data.email)
+    user = (await session.exec(statement)).first()
+    # Hand the connection back to the pool while bcrypt runs; the session reconnects if needed
+    await session.close()
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+    
+    # bcrypt runs in the password pool
+    try:
+        valid = await password_hasher.verify(login_data.password, user.hashed_password)
+    except OverloadedError as e:
+        raise _password_busy(e)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
         )
 
+    if password_hasher.needs_rehash(user.hashed_password):
+        # Work factor changed since this hash was made; upgrade it while we have the password
+        try:
+            hashed_password = await password_hasher.hash(login_data.password)
+        except OverloadedError:
+            hashed_password = None  # Try again on a later login
+        if hashed_password:
+            stored = await session.get(UserProfileDB, user.netid)
+            stored.hashed_password = hashed_password
+            await session.commit()
+            password_hasher.rehashes += 1
+            await invalidate_user_async(user.netid)
+    
+    # Create tokens
+    access_token = create_access_token(data={"sub": user.netid})
+    refresh_token = create_refresh_token(data={"sub": user.netid})
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer",
+    )
+
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(refresh_data: RefreshTokenRequest):
+async def refresh_token(refresh_data: RefreshTokenRequest, session: AsyncSession = Depends(get_read_session)):
     """Refresh access token using refresh token."""
     payload = verify_token(refresh_data.refresh_token, token_type="refresh")
     
@@ -75,87 +113,101 @@ async def refresh_token(refresh_data: RefreshTokenRequest):
             detail="Invalid token payload",
         )
     
-    with Session(engine) as session:
-        user = session.get(UserProfileDB, netid)
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-            )
-        
-        # Create new tokens
-        access_token = create_access_token(data={"sub": user.netid})
-        refresh_token = create_refresh_token(data={"sub": user.netid})
-        
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
+    user = await session.get(UserProfileDB, netid)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
         )
+    
+    # Create new tokens
+    access_token = create_access_token(data={"sub": user.netid})
+    refresh_token = create_refresh_token(data={"sub": user.netid})
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer",
+    )
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: UserProfileDB = Depends(get_current_user)):
-    """Get current authenticated user information."""
-    return UserResponse(
-        netid=current_user.netid,
-        name=current_user.name,
-        email=current_user.email,
-        majors=current_user.majors,
-        minors=current_user.minors,
-    )
+async def get_current_user_info(
+    current_user: UserProfileDB = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get current authenticated user information. Answers If-None-Match with 304 while it is unchanged."""
+    etag = USER_ETAGS.etag(current_user.netid, current_user.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return USER_JSON.response(current_user, cache_headers(etag))
 
 
 @router.post("/register")
-async def register(register_data: RegisterRequest):
+async def register(register_data: RegisterRequest, session: AsyncSession = Depends(get_session)):
     """Register a new user. (You may want to add more validation/requirements)"""
-    with Session(engine) as session:
-        # Check if user already exists
-        statement = select(UserProfileDB).where(UserProfileDB.email == register_data.email)
-        existing_user = session.exec(statement).first()
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered",
-            )
-        
-        # Generate netid from email (or you might want to require it separately)
-        # For now, using email prefix as netid - adjust based on your needs
-        netid = register_data.email.split("@")[0]
-        
-        # Check if netid already exists
-        existing_netid = session.get(UserProfileDB, netid)
-        if existing_netid:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="NetID already exists",
-            )
-        
-        # Create new user
-        hashed_password = get_password_hash(register_data.password)
-        new_user = UserProfileDB(
-            netid=netid,
-            name=register_data.name,
-            email=register_data.email,
-            hashed_password=hashed_password,
-            majors=[],
-            minors=[],
+    # Check if user already exists
+    statement = select(UserProfileDB).where(UserProfileDB.email == register_data.email)
+    existing_user = (await session.exec(statement)).first()
+    
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
         )
+    
+    # Generate netid from email (or you might want to require it separately)
+    # For now, using email prefix as netid - adjust based on your needs
+    netid = register_data.email.split("@")[0]
+    
+    # Check if netid already exists
+    existing_netid = await session.get(UserProfileDB, netid)
+    if existing_netid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="NetID already exists",
+        )
+    # No connection held while hashing
+    await session.close()
         
-        session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
-        
-        # Return tokens
-        access_token = create_access_token(data={"sub": new_user.netid})
-        refresh_token = create_refresh_token(data={"sub": new_user.netid})
-        
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
+    # Hash in the password pool
+    try:
+        hashed_password = await password_hasher.hash(register_data.password)
+    except OverloadedError as e:
+        raise _password_busy(e)
+
+    # Create new user
+    new_user = UserProfileDB(
+        netid=netid,
+        name=register_data.name,
+        email=register_data.email,
+        hashed_password=hashed_password,
+        majors=[],
+        minors=[],
+    )
+    
+    session.add(new_user)
+    try:
+        for statement in sync_statements(new_user.netid, new_user):
+            await session.execute(statement)
+        await session.commit()
+    except IntegrityError:
+        # Registered by a concurrent request while we were hashing
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
         )
+    await invalidate_user_async(new_user.netid)
+    
+    # Return tokens
+    access_token = create_access_token(data={"sub": new_user.netid})
+    refresh_token = create_refresh_token(data={"sub": new_user.netid})
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer",
+    )
 
 
 @router.get("/google/login")
@@ -171,7 +223,7 @@ async def google_login_url():
 
 
 @router.post("/google/callback", response_model=TokenResponse)
-async def google_callback(google_data: GoogleTokenRequest):
+async def google_callback(google_data: GoogleTokenRequest, session: AsyncSession = Depends(get_session)):
     """Handle Google OAuth callback - verify token and create/login user."""
     if not settings.google_client_id:
         raise HTTPException(
@@ -180,7 +232,7 @@ async def google_callback(google_data: GoogleTokenRequest):
         )
     
     # Verify Google token
-    google_user = verify_google_token(google_data.token)
+    google_user = await verify_google_token(google_data.token)
     if not google_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -197,52 +249,52 @@ async def google_callback(google_data: GoogleTokenRequest):
             detail="Email not provided by Google",
         )
     
-    with Session(engine) as session:
-        # Check if user exists by email
-        statement = select(UserProfileDB).where(UserProfileDB.email == email)
-        user = session.exec(statement).first()
-        
-        if user:
-            # User exists, update name if needed and return tokens
-            if name and user.name != name:
-                user.name = name
-                session.commit()
-                session.refresh(user)
-        else:
-            # Create new user
-            # Generate netid from email
-            netid = email.split("@")[0]
-            
-            # Check if netid already exists (unlikely but possible)
-            existing_netid = session.get(UserProfileDB, netid)
-            if existing_netid:
-                # Append number if conflict
-                counter = 1
-                while session.get(UserProfileDB, f"{netid}{counter}"):
-                    counter += 1
-                netid = f"{netid}{counter}"
-            
-            # Create user without password (OAuth users don't need password)
-            # Use a placeholder hash - users can set password later if needed
-            user = UserProfileDB(
-                netid=netid,
-                name=name,
-                email=email,
-                hashed_password=get_password_hash(""),  # Empty password for OAuth users
-                majors=[],
-                minors=[],
-            )
-            session.add(user)
-            session.commit()
-            session.refresh(user)
+    # Check if user exists by email
+    statement = select(UserProfileDB).where(UserProfileDB.email == email)
+    user = (await session.exec(statement)).first()
+    
+    if user:
+        # User exists, update name if needed and return tokens
+        if name and user.name != name:
+            user.name = name
+            await session.commit()
+            await invalidate_user_async(user.netid)
+    else:
+        # Create new user
+        # Generate netid from email
+        netid = email.split("@")[0]
         
-        # Create tokens
-        access_token = create_access_token(data={"sub": user.netid})
-        refresh_token = create_refresh_token(data={"sub": user.netid})
+        # Check if netid already exists (unlikely but possible)
+        existing_netid = await session.get(UserProfileDB, netid)
+        if existing_netid:
+            # Append number if conflict
+            counter = 1
+            while await session.get(UserProfileDB, f"{netid}{counter}"):
+                counter += 1
+            netid = f"{netid}{counter}"
         
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
+        # Create user without password (OAuth users don't need password)
+        # The marker never verifies, so password login stays off until one is set
+        user = UserProfileDB(
+            netid=netid,
+            name=name,
+            email=email,
+            hashed_password=UNUSABLE_PASSWORD,
+            majors=[],
+            minors=[],
         )
-
+        session.add(user)
+        for statement in sync_statements(user.netid, user):
+            await session.execute(statement)
+        await session.commit()
+        await invalidate_user_async(user.netid)
+    
+    # Create tokens
+    access_token = create_access_token(data={"sub": user.netid})
+    refresh_token = create_refresh_token(data={"sub": user.netid})
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer",
+    )
@@ -5,8 +5,12 @@ import bcrypt
 from ..config.settings import settings
 
 
+# Stored instead of a hash for accounts without a password (e.g. Google sign-in); never verifies
+UNUSABLE_PASSWORD = "!"
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash."""
+    """Verify a password against a hash. CPU-bound; request handlers use password_pool instead."""
     try:
         return bcrypt.checkpw(
             plain_password.encode('utf-8'),
@@ -16,19 +20,27 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt."""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password using bcrypt with `rounds` (default settings.bcrypt_rounds) as the work factor."""
     # Bcrypt has a 72 byte limit, truncate if necessary
     password_bytes = password.encode('utf-8')
     if len(password_bytes) > 72:
         password_bytes = password_bytes[:72]
         password = password_bytes.decode('utf-8', errors='ignore')
     
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """The work factor a bcrypt hash was made with ("$2b$12$..." -> 12), or None if it is not one."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
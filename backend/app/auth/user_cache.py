@@ -0,0 +1,257 @@
+"""
+Per-worker cache of authenticated users, so a request with a valid token does
+not need a database round trip to load its user.
+
+Entries are snapshots of the user's columns with a TTL and an LRU bound; each
+hit builds a fresh detached UserProfileDB so request handlers never share
+(or mutate) the cached lists. Writes to a user call `invalidate_user`, which
+drops the local entry and appends the netid to the UserInvalidationDB log.
+Every worker reads new log rows at most every `user_cache_sync_seconds`, so
+other workers drop their copies within that window; the log id doubles as
+a version counter.
+
+A miss records the netid's generation before loading; invalidations bump it,
+so a load that overlapped one is returned but not cached (its snapshot may
+predate the write).
+
+`get_async` and `invalidate_async` do the same through the async engine, for
+`async def` dependencies and handlers that must not block the event loop.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..config.settings import settings
+from ..database import async_engine, engine
+from ..models.db_models import UserInvalidationDB, UserProfileDB
+
+# Invalidation rows older than this are pruned; workers poll far more often
+LOG_RETENTION_SECONDS = 3600.0
+
+
+class UserCache:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        sync_seconds: float,
+        enabled: bool = True,
+        db=None,
+        async_db=None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sync_seconds = sync_seconds
+        self.enabled = enabled
+        self.db = db if db is not None else engine
+        self.async_db = async_db if async_db is not None else async_engine
+
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._generations: dict[str, int] = {}  # Bumped per netid by every invalidation
+        self._lock = threading.Lock()
+        self._last_log_id: Optional[int] = None
+        self._next_sync = 0.0
+        self._writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+        self.query_seconds = 0.0  # time spent loading users on misses
+
+    # Public API
+
+    def get(self, netid: str, load: Optional[Callable[[str], Optional[UserProfileDB]]] = None) -> Optional[UserProfileDB]:
+        """The user for `netid`, from the cache or loaded (and cached) on a miss."""
+        load = load or self._load
+        if not self.enabled:
+            return load(netid)
+        if self._sync_due():
+            with Session(self.db) as session:
+                self._apply_log(self._read_log(session))
+        cached = self._lookup(netid)
+        if cached is not None:
+            return cached
+
+        generation = self._generations.get(netid, 0)
+        started = time.perf_counter()
+        user = load(netid)
+        return self._loaded(user, started, generation)
+
+    async def get_async(
+        self, netid: str, load: Optional[Callable[[str], Awaitable[Optional[UserProfileDB]]]] = None
+    ) -> Optional[UserProfileDB]:
+        """`get` without blocking the event loop: the log poll and misses go through the async engine."""
+        load = load or self._load_async
+        if not self.enabled:
+            return await load(netid)
+        if self._sync_due():
+            async with AsyncSession(self.async_db) as session:
+                self._apply_log(await self._read_log_async(session))
+        cached = self._lookup(netid)
+        if cached is not None:
+            return cached
+
+        generation = self._generations.get(netid, 0)
+        started = time.perf_counter()
+        user = await load(netid)
+        return self._loaded(user, started, generation)
+
+    def put(self, user: UserProfileDB, generation: Optional[int] = None) -> None:
+        """Cache `user`; with `generation`, only if the netid was not invalidated since it was read."""
+        values = {name: getattr(user, name) for name in UserProfileDB.model_fields}
+        with self._lock:
+            if generation is not None and self._generations.get(user.netid, 0) != generation:
+                return
+            self._entries[user.netid] = (values, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user.netid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, netid: str) -> None:
+        """Drop a user here and tell the other workers; call after the write commits."""
+        self.discard(netid)
+        with Session(self.db) as session:
+            for statement in self._log_statements(netid):
+                session.execute(statement)
+            session.commit()
+
+    async def invalidate_async(self, netid: str) -> None:
+        self.discard(netid)
+        async with AsyncSession(self.async_db) as session:
+            for statement in self._log_statements(netid):
+                await session.execute(statement)
+            await session.commit()
+
+    def discard(self, netid: str) -> None:
+        with self._lock:
+            self._generations[netid] = self._generations.get(netid, 0) + 1
+            if self._entries.pop(netid, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        miss_ms = self.query_seconds * 1000 / self.misses if self.misses else 0.0
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+            "version": self._last_log_id,
+            "mean_miss_query_ms": round(miss_ms, 3),
+            # Each hit skipped a query that would have cost about the mean miss time
+            "saved_query_seconds": round(self.hits * miss_ms / 1000, 3),
+        }
+
+    # Internals
+
+    def _lookup(self, netid: str) -> Optional[UserProfileDB]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(netid)
+            if cached is not None:
+                values, expires_at = cached
+                if expires_at > now:
+                    self._entries.move_to_end(netid)
+                    self.hits += 1
+                    return _detached(values)
+                del self._entries[netid]
+                self.expirations += 1
+            self.misses += 1
+        return None
+
+    def _loaded(self, user: Optional[UserProfileDB], started: float, generation: int) -> Optional[UserProfileDB]:
+        self.query_seconds += time.perf_counter() - started
+        if user is not None:
+            self.put(user, generation)
+        return user
+
+    def _load(self, netid: str) -> Optional[UserProfileDB]:
+        with Session(self.db) as session:
+            return session.get(UserProfileDB, netid)
+
+    async def _load_async(self, netid: str) -> Optional[UserProfileDB]:
+        async with AsyncSession(self.async_db) as session:
+            return await session.get(UserProfileDB, netid)
+
+    def _log_statements(self, netid: str) -> list:
+        statements = [insert(UserInvalidationDB).values(netid=netid, created_at=time.time())]
+        self._writes += 1
+        if self._writes % 100 == 0:
+            statements.append(
+                delete(UserInvalidationDB).where(UserInvalidationDB.created_at < time.time() - LOG_RETENTION_SECONDS)
+            )
+        return statements
+
+    def _sync_due(self) -> bool:
+        """Whether to check for invalidations logged by other workers (at most every sync_seconds)."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return False
+        self._next_sync = now + self.sync_seconds
+        return True
+
+    def _log_query(self):
+        if self._last_log_id is None:
+            # Nothing is cached yet, so only the starting point matters
+            return select(func.max(UserInvalidationDB.id))
+        return select(UserInvalidationDB.id, UserInvalidationDB.netid).where(UserInvalidationDB.id > self._last_log_id)
+
+    def _read_log(self, session: Session) -> list:
+        first = self._last_log_id is None
+        result = session.exec(self._log_query())
+        return [(result.one() or 0, None)] if first else result.all()
+
+    async def _read_log_async(self, session: AsyncSession) -> list:
+        first = self._last_log_id is None
+        result = await session.exec(self._log_query())
+        return [(result.one() or 0, None)] if first else result.all()
+
+    def _apply_log(self, rows: list) -> None:
+        """Apply invalidations logged by other workers since the last check."""
+        for log_id, netid in rows:
+            self._last_log_id = max(self._last_log_id or 0, log_id)
+            if netid is None:
+                continue
+            with self._lock:
+                self._generations[netid] = self._generations.get(netid, 0) + 1
+                if self._entries.pop(netid, None) is not None:
+                    self.remote_invalidations += 1
+
+
+def _detached(values: dict) -> UserProfileDB:
+    # Copy list columns so a handler mutating them cannot change the cached snapshot
+    return UserProfileDB.model_construct(**{
+        name: list(value) if isinstance(value, list) else value for name, value in values.items()
+    })
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.user_cache_ttl_seconds,
+    max_entries=settings.user_cache_max_entries,
+    sync_seconds=settings.user_cache_sync_seconds,
+    enabled=settings.user_cache_enabled,
+)
+
+
+def invalidate_user(netid: str) -> None:
+    user_cache.invalidate(netid)
+
+
+async def invalidate_user_async(netid: str) -> None:
+    await user_cache.invalidate_async(netid)
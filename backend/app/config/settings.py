@@ -9,23 +9,118 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./database.db"
+    database_pool_size: int = 5  # Per engine; the read-only engine has its own pool
+    database_max_overflow: int = 10
+    database_pool_timeout_seconds: float = 30
+    # SQLite pragmas applied to every connection
+    sqlite_wal: bool = True
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000  # How long a writer waits for the lock before "database is locked"
+    sqlite_cache_size_kib: int = 20_000
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
     
     # Security
     secret_key: str = "your-secret-key-change-this-in-production"  # Change this!
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+
+    # Password hashing: bcrypt work factor (hashes with another cost are upgraded on login),
+    # worker processes, and how many requests may wait for one before we return 503
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_max_queue: int = 32
+    password_queue_timeout_seconds: float = 5
+    password_retry_after_seconds: int = 2
     
+    # Authenticated-user cache (per worker)
+    user_cache_enabled: bool = True
+    user_cache_ttl_seconds: float = 300
+    user_cache_max_entries: int = 10_000
+    user_cache_sync_seconds: float = 1.0  # How often to read other workers' invalidations
+
+    # Admin endpoints (e.g. batch degree audits) are limited to these netids
+    admin_netids: list[str] = []
+
+    # Metrics in the Prometheus text format at /metrics (per worker process)
+    metrics_enabled: bool = True
+    metrics_token: Optional[str] = None  # If set, scrapes must send "Authorization: Bearer <token>"
+    metrics_db_queries: bool = True  # Per-statement timing; costs ~10us per query in SQLAlchemy's event dispatch
+
     # CORS
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
     
     # OpenAI
     openai_api_key: Optional[str] = None
+    openai_model: str = "gpt-4o"
+    openai_base_url: Optional[str] = None  # Another OpenAI-compatible server, e.g. benchmarks/fake_openai_server.py
+    openai_fake: bool = False  # Use the offline stand-in client (no network, no API key)
+    openai_fake_first_token_ms: float = 200
+    openai_fake_token_ms: float = 20
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry_seconds: float = 30
+    openai_timeout_seconds: float = 60
+    openai_connect_timeout_seconds: float = 5
+    openai_max_retries: int = 2
+
+    # Chat admission control (per worker)
+    chat_max_concurrency: int = 32  # Upstream calls in flight at once
+    chat_max_queue: int = 64  # Requests allowed to wait for a slot before we return 503
+    chat_queue_timeout_seconds: float = 10
+    chat_retry_after_seconds: int = 5
+
+    # Chat response cache
+    chat_cache_enabled: bool = True
+    chat_cache_ttl_seconds: float = 6 * 3600
+    chat_cache_max_entries: int = 10_000
+    chat_cache_max_bytes: int = 64 * 1024 * 1024
+    chat_cache_similarity_enabled: bool = False  # Also serve near-duplicate questions
+    chat_cache_similarity_threshold: float = 0.9
+    chat_context_cache_max_entries: int = 10_000  # Prebuilt per-user prompt contexts kept per worker
+
+    # Chat history: prompts carry a rolling summary plus as many recent turns as fit the budget;
+    # older turns are summarized in the background once they no longer fit
+    chat_history_token_budget: int = 1500  # Summary + recent turns, in tokens
+    chat_history_summary_max_tokens: int = 300
+    chat_history_max_messages: int = 40  # Recent messages read per prompt
+    chat_history_summary_batch_tokens: int = 3000  # Most history folded into the summary per LLM call
+
+    # Retrieval (RAG): catalog and requirement excerpts added to chat prompts, from the index
+    # scripts/build_retrieval_index.py writes (BM25 + embeddings, fused by reciprocal rank)
+    retrieval_enabled: bool = True
+    retrieval_index_dir: Optional[str] = None  # Defaults to data/retrieval
+    retrieval_top_k: int = 5  # Excerpts per prompt
+    retrieval_candidates: int = 50  # Taken from each ranker before fusion
+    # Fusion, tuned with benchmarks/eval_retrieval.py for the local hashing embedder (lexical, so
+    # BM25 leads); rerun it and raise the vector weight when a semantic embedder builds the index
+    retrieval_rrf_k: int = 10
+    retrieval_vector_weight: float = 0.2  # Vector ranks' share of the fused score, relative to BM25's
+
+    # Precompiled requirement trees and prerequisite graph, memory-mapped at startup
+    # (scripts/build_reference_artifact.py); out-of-date sections are compiled from source instead
+    reference_artifact_enabled: bool = True
+    reference_artifact_path: Optional[str] = None  # Defaults to data/reference.bin
+
+    # Intent routing
+    intent_confidence_threshold: float = 0.5  # Below this the LLM classifies the message instead
+    intent_llm_fallback: bool = True
     
+    # Schedule generator: search time per request before returning the best schedules found so far
+    schedule_generator_time_budget_ms: float = 150
+
     # Google OAuth
     google_client_id: Optional[str] = None
     google_client_secret: Optional[str] = None
     google_redirect_uri: Optional[str] = None  # e.g., "http://localhost:8000/auth/google/callback"
+    # Google's ID-token signing keys: cached for the response's max-age (or the default),
+    # refreshed in the background this long before they expire
+    google_certs_url: str = "https://www.googleapis.com/oauth2/v3/certs"
+    google_certs_default_max_age_seconds: float = 3600
+    google_certs_refresh_margin_seconds: float = 300
+    google_certs_min_refresh_seconds: float = 30  # Unknown key ids force a refresh at most this often
+    google_certs_retry_seconds: float = 60
+    google_certs_timeout_seconds: float = 5
     
     class Config:
         env_file = ".env"
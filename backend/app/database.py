@@ -1,8 +1,134 @@
+"""
+Database engines, configured from settings.
+
+`engine` is the read-write engine. `read_engine` has its own connection pool
+whose connections refuse writes (PRAGMA query_only); GET endpoints use it so
+reads never queue behind a writer's connection or accidentally write.
+
+For SQLite every new connection gets the tuning pragmas: WAL journal (readers
+and the single writer no longer block each other), synchronous=NORMAL (fsync
+at checkpoints rather than every commit; still durable against application
+crashes), a busy timeout so concurrent writers wait for the lock instead of
+failing with "database is locked", and larger page cache and mmap sizes.
+
+`async_engine` and `async_read_engine` are the same pair on aiosqlite, for
+`async def` handlers: they take a request-scoped session from `get_session`
+or `get_read_session` (FastAPI dependencies) so database I/O never blocks
+the event loop.
+"""
+from typing import AsyncIterator
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .config.settings import settings
+from .services.metrics import instrument_engine
+
+
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kib)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size_bytes)}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if settings.sqlite_wal:
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def _pool_options(url: str) -> dict:
+    options = dict(echo=settings.debug)  # Statement logging is synchronous; keep it out of production
+    if ":memory:" not in url:  # In-memory SQLite lives in a single connection
+        options.update(
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout_seconds,
+        )
+    return options
+
+
+def _install_pragmas(db: Engine, read_only: bool) -> None:
+    if db.dialect.name != "sqlite":
+        return
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(db, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def make_engine(url: str, read_only: bool = False) -> Engine:
+    """An engine for `url` with the configured pool and, for SQLite, the tuning pragmas."""
+    options = _pool_options(url)
+    if url.startswith("sqlite"):
+        # Connections move between the threadpool's threads; the pool hands each to one at a time
+        options["connect_args"] = {"check_same_thread": False}
+    db = create_engine(url, **options)
+    _install_pragmas(db, read_only)
+    if settings.metrics_enabled and settings.metrics_db_queries:
+        instrument_engine(db)
+    return db
+
+
+def make_async_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """The asyncio counterpart of make_engine; plain sqlite:// URLs are switched to aiosqlite."""
+    if url.startswith("sqlite:"):
+        url = "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    db = create_async_engine(url, **_pool_options(url))
+    _install_pragmas(db.sync_engine, read_only)
+    if settings.metrics_enabled and settings.metrics_db_queries:
+        instrument_engine(db.sync_engine)
+    return db
+
+
+engine = make_engine(settings.database_url)
+read_engine = make_engine(settings.database_url, read_only=True) if engine.dialect.name == "sqlite" else engine
+async_engine = make_async_engine(settings.database_url)
+async_read_engine = (
+    make_async_engine(settings.database_url, read_only=True) if engine.dialect.name == "sqlite" else async_engine
+)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """Request-scoped read-write session."""
+    # Objects stay readable after commit; reloading them lazily is not possible in async code
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """Request-scoped session on the read-only pool."""
+    async with AsyncSession(async_read_engine, expire_on_commit=False) as session:
+        yield session
+
 
-sqlite_file_name = "database.db"
-engine = create_engine(f"sqlite:///{sqlite_file_name}", echo = True)
+async def dispose_async_engines() -> None:
+    await async_engine.dispose()
+    await async_read_engine.dispose()
 
 def init_db():
-    from .models.db_models import UserProfileDB
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    from .models.db_models import ScheduleCoursesDB, ScheduleDB, UserProfileDB
+    from .services.catalog_store import ensure_search_index
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        ensure_search_index(conn)
+        # create_all skips tables that already exist, so add indexes introduced since
+        for table in (ScheduleDB.__table__, ScheduleCoursesDB.__table__):
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        # ... and columns (all with server defaults, so existing rows get a value)
+        existing = {column["name"] for column in inspect(conn).get_columns(UserProfileDB.__tablename__)}
+        for column in UserProfileDB.__table__.columns:
+            if column.name not in existing:
+                conn.execute(text(
+                    f"ALTER TABLE {UserProfileDB.__tablename__} ADD COLUMN {column.name} "
+                    f"{column.type.compile(conn.dialect)} NOT NULL DEFAULT {column.server_default.arg}"
+                ))
@@ -1,10 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import chat, user, schedule
+from .routers import admin, chat, courses, metrics, reference, user, schedule, schedule_courses
+from .auth.google_keys import google_keys
+from .auth.password_pool import password_hasher
 from .auth.router import router as auth_router
 from .config.settings import settings
+from .database import dispose_async_engines
+from .services.openai_service import close_client
+from .services.conversation_store import conversation_store
+from .services.intent_classifier import get_classifier
+from .services.metrics import MetricsMiddleware
+from .services.requirements_engine import get_engine
+from .services.retrieval import get_index
+from .services.tokens import load_tokenizer
 
-app = FastAPI(title="Northwestern Course AI API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_classifier()  # Load intent model weights before the first chat request
+    get_engine()  # Compile program requirement trees once per worker
+    get_index()  # Map the retrieval index (shared pages across workers)
+    load_tokenizer()  # Token counts for chat history budgets
+    password_hasher.start()  # bcrypt worker processes
+    if settings.google_client_id:
+        google_keys.start()  # Fetch Google's signing keys now and keep them fresh
+    yield
+    password_hasher.shutdown()
+    await google_keys.close()
+    await conversation_store.close()  # Unfinished summaries are redone after the next turn
+    await dispose_async_engines()
+    # Drain the shared OpenAI connection pool
+    await close_client()
+
+
+app = FastAPI(title="Northwestern Course AI API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware with proper configuration
 app.add_middleware(
@@ -15,8 +46,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency covers the other middleware too
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(chat.router)
 app.include_router(user.router)
-app.include_router(schedule.router)
\ No newline at end of file
+app.include_router(schedule.router)
+app.include_router(schedule_courses.router)
+app.include_router(courses.router)
+app.include_router(reference.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlmodel import SQLModel, Field, Column, JSON
+from sqlalchemy import event
+from sqlmodel import SQLModel, Field, Column, JSON, Index
 from typing import Optional, List
 
 class UserProfileDB(SQLModel, table=True):
@@ -23,9 +24,38 @@ class UserProfileDB(SQLModel, table=True):
     locked_classes: Optional[List[str]] = Field(default_factory=list, sa_column=Column(JSON))
     self_description: Optional[str] = None
 
+    # Change counters for ETags: `version` is bumped on every ORM update of the row (see below),
+    # `schedules_version` by every write to the user's schedules (db_service.schedules_changed)
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    schedules_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+    # Read the bumped version back after each flush; async sessions cannot load it lazily
+    __mapper_args__ = {"eager_defaults": True}
+
+
+@event.listens_for(UserProfileDB, "before_update")
+def _bump_profile_version(mapper, connection, target: UserProfileDB) -> None:
+    # In SQL, so concurrent writers never hand out the same version
+    target.version = UserProfileDB.version + 1
+
+
+class ProfileListItemDB(SQLModel, table = True):
+    """One element of a profile list column, so cohort queries ("every Data Science major") use an index."""
+    __table_args__ = (Index("ix_profilelistitemdb_field_value_netid", "field", "value", "netid"),)
+
+    netid: str = Field(primary_key = True)
+    field: str = Field(primary_key = True)  # UserProfileDB column name, e.g. "majors"
+    position: int = Field(primary_key = True)
+    value: str
+
+class ProfileListSyncDB(SQLModel, table = True):
+    """Profiles whose list columns are mirrored in ProfileListItemDB; others are still read from JSON."""
+    netid: str = Field(primary_key = True)
+    synced_at: float
+
 class ScheduleDB(SQLModel, table = True):
     id: int = Field(default = None, primary_key = True)
-    netid: str
+    netid: str = Field(index = True)
     name: Optional[str] = "Schedule"
     term: str
     created: str
@@ -33,6 +63,122 @@ class ScheduleDB(SQLModel, table = True):
 
 class ScheduleCoursesDB(SQLModel, table = True):
     id: int = Field(default = None, primary_key = True)
-    schedule_id: str
+    schedule_id: str = Field(index = True)
     section_id: str
-    
+
+class UserInvalidationDB(SQLModel, table = True):
+    """Log of user writes; each worker's user cache drops the netids logged after its last check."""
+    id: int = Field(default = None, primary_key = True)
+    netid: str
+    created_at: float = Field(index = True)
+
+class DegreeAuditDB(SQLModel, table = True):
+    """One row per (student, program) from a batch degree audit; readers use the latest finished run's."""
+    __table_args__ = (Index("ix_degreeauditdb_program_satisfied", "program_name", "satisfied"),)
+
+    id: int = Field(default = None, primary_key = True)
+    run_id: str = Field(index = True)
+    netid: str = Field(index = True)
+    program_name: str
+    program_type: str
+    satisfied: bool
+    groups_completed: int
+    groups_total: int
+    unsatisfied_groups: List[str] = Field(default_factory=list, sa_column=Column(JSON))
+    audited_at: str
+
+class DegreeAuditRunDB(SQLModel, table = True):
+    """A finished batch degree audit. Its results are committed chunk by chunk, so they only count once this row exists."""
+    id: int = Field(default = None, primary_key = True)
+    run_id: str = Field(unique = True)
+    audited_at: str
+
+class ConversationDB(SQLModel, table = True):
+    """A chat thread. Messages up to `summarized_through` are folded into `summary`."""
+    __table_args__ = (Index("ix_conversationdb_netid_updated_at", "netid", "updated_at"),)
+
+    id: int = Field(default = None, primary_key = True)
+    netid: str
+    title: str = ""
+    summary: str = ""
+    summary_tokens: int = 0
+    summarized_through: int = 0  # ConversationMessageDB.id of the last summarized message
+    unsummarized_tokens: int = 0  # Prompt tokens of the messages after it
+    created_at: float
+    updated_at: float
+
+class ConversationMessageDB(SQLModel, table = True):
+    __table_args__ = (Index("ix_conversationmessagedb_conversation_id_id", "conversation_id", "id"),)
+
+    id: int = Field(default = None, primary_key = True)
+    conversation_id: int
+    role: str  # "user" or "assistant"
+    content: str
+    tokens: int  # Counted once when stored, so prompts are assembled without re-tokenizing
+    created_at: float
+
+# Course catalog, loaded from a paper.nu-style snapshot by scripts/load_catalog.py
+
+class TermDB(SQLModel, table = True):
+    term: str = Field(primary_key = True)  # paper.nu term id, e.g. "4960"
+    name: str
+
+class CatalogLoadDB(SQLModel, table = True):
+    """One row per catalog load; the latest id tells workers the catalog changed."""
+    id: int = Field(default = None, primary_key = True)
+    loaded_at: float
+
+class CourseDB(SQLModel, table = True):
+    id: int = Field(default = None, primary_key = True)
+    code: str = Field(unique = True, index = True)  # "COMP_SCI 211-0"
+    subject: str = Field(index = True)
+    number: str
+    title: str
+    description: Optional[str] = None
+    units: float = 1.0
+    prereq_text: Optional[str] = None
+
+class PrerequisiteDB(SQLModel, table = True):
+    """A course needs every group; a group is satisfied by any one of its codes."""
+    id: int = Field(default = None, primary_key = True)
+    course_id: int = Field(index = True)
+    group_index: int
+    prereq_code: str = Field(index = True)
+
+class SectionDB(SQLModel, table = True):
+    __table_args__ = (
+        Index("ix_sectiondb_course_term", "course_id", "term"),
+        Index("ix_sectiondb_term_course", "term", "course_id"),
+    )
+
+    id: int = Field(default = None, primary_key = True)
+    section_id: str = Field(unique = True, index = True)  # paper.nu section id
+    course_id: int
+    term: str
+    section_number: str
+    component: str = "LEC"
+    capacity: Optional[int] = None
+    # Summary of all meetings, so day/time filters need no join: union of day bits, earliest start, latest end
+    days: int = 0
+    start_minute: Optional[int] = None
+    end_minute: Optional[int] = None
+    # Weekly 5-minute-slot bitmask of all meetings (see services/meeting_times.py)
+    time_mask: bytes = b""
+
+class MeetingDB(SQLModel, table = True):
+    id: int = Field(default = None, primary_key = True)
+    section_pk: int = Field(index = True)  # SectionDB.id
+    days: int  # bitmask, Mo = 1 ... Su = 64
+    start_minute: int  # minutes after midnight
+    end_minute: int
+    room: Optional[str] = None
+
+class InstructorDB(SQLModel, table = True):
+    id: int = Field(default = None, primary_key = True)
+    name: str = Field(unique = True, index = True)
+
+class SectionInstructorDB(SQLModel, table = True):
+    __table_args__ = (Index("ix_sectioninstructordb_instructor_section", "instructor_id", "section_pk"),)
+
+    section_pk: int = Field(primary_key = True)  # SectionDB.id
+    instructor_id: int = Field(primary_key = True)
@@ -0,0 +1,68 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+from ..auth.dependencies import get_admin_user
+from ..auth.google_keys import google_keys
+from ..auth.user_cache import user_cache
+from ..database import read_engine
+from ..models.db_models import UserProfileDB
+from ..services.batch_audit import audit_results_statement, audit_summary, run_batch_audit
+from ..services.profile_lists import cohort
+from ..services.serialization import stream_rows
+
+router = APIRouter(prefix="/admin")
+
+@router.post("/degree-audits")
+def run_degree_audits(current_user: UserProfileDB = Depends(get_admin_user)):
+    """Re-audit every profile against its majors and minors and replace the stored results."""
+    return run_batch_audit()
+
+@router.get("/degree-audits")
+def get_degree_audits(current_user: UserProfileDB = Depends(get_admin_user)):
+    """Per-program on-track counts from the most recent batch audit."""
+    with Session(read_engine) as session:
+        return {"programs": audit_summary(session)}
+
+@router.get("/degree-audits/results")
+def get_degree_audit_results(
+    program_name: Optional[str] = None,
+    satisfied: Optional[bool] = None,
+    current_user: UserProfileDB = Depends(get_admin_user)
+):
+    """Every (student, program) row of the most recent batch audit, streamed as a JSON array."""
+    return stream_rows(read_engine, audit_results_statement(program_name, satisfied))
+
+@router.get("/cohort")
+def get_cohort(
+    majors: list[str] = Query([]),
+    minors: list[str] = Query([]),
+    classes_already_taken: list[str] = Query([], description="e.g. STAT 202"),
+    locked_classes: list[str] = Query([]),
+    vocational_interests: list[str] = Query([]),
+    favorite_profs: list[str] = Query([]),
+    disliked_profs: list[str] = Query([]),
+    limit: int = Query(1000, ge=1, le=100_000),
+    current_user: UserProfileDB = Depends(get_admin_user)
+):
+    """Students matching every filter, e.g. ?majors=Data Science&classes_already_taken=STAT 202."""
+    filters = {
+        "majors": majors, "minors": minors, "classes_already_taken": classes_already_taken,
+        "locked_classes": locked_classes, "vocational_interests": vocational_interests,
+        "favorite_profs": favorite_profs, "disliked_profs": disliked_profs,
+    }
+    criteria = [(field, value) for field, values in filters.items() for value in values]
+    if not criteria:
+        raise HTTPException(status_code=400, detail="Pass at least one filter")
+    with Session(read_engine) as session:
+        netids = cohort(session, criteria, limit + 1)
+    return {"netids": netids[:limit], "truncated": len(netids) > limit}
+
+@router.get("/user-cache")
+def get_user_cache_stats(current_user: UserProfileDB = Depends(get_admin_user)):
+    """Authenticated-user cache counters for this worker: hit rate and estimated query time saved."""
+    return user_cache.stats()
+
+@router.get("/google-keys")
+def get_google_key_stats(current_user: UserProfileDB = Depends(get_admin_user)):
+    """Google signing-key cache for this worker: key ids, time to expiry and fetch counters."""
+    return google_keys.stats()
@@ -1,32 +1,316 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.background import BackgroundTask
 from ..schemas.chat import ChatRequest
-from ..services.openai_service import get_chat_response
+from ..schemas.user import profile_list
+from ..config.settings import settings
+from ..database import get_read_session, get_session
+from ..services.concurrency import OverloadedError, StageTimings
+from ..services.conversation_store import PromptHistory, conversation_store
+from ..services.intent_classifier import IntentResult, classify_intent
+from ..services.intent_handlers import BLOCKING_INTENTS, RULES_ONLY_INTENTS, handle_intent
+from ..services.prompt_context import prompt_contexts
+from ..services.openai_service import (
+    ERROR_MESSAGE,
+    cache_response,
+    categorize_request,
+    chat_limiter,
+    get_chat_response,
+    is_cacheable,
+    iter_stream_events,
+    lookup_cached_response,
+    open_chat_stream,
+)
+from ..services.response_cache import response_cache
+from ..services.retrieval import get_index
 from ..auth.dependencies import get_current_user
-from ..models.db_models import UserProfileDB
+from ..models.db_models import ConversationDB, ConversationMessageDB, UserProfileDB
 from datetime import datetime
 
 router = APIRouter()
 
-@router.post("/chat")
-def chat(
-    request: ChatRequest,
-    current_user: UserProfileDB = Depends(get_current_user)
-):
-    """Chat endpoint that uses authenticated user's profile data."""
-    # Populate chat request with user data from authenticated user
-    chat_request = ChatRequest(
+def _build_chat_request(request: ChatRequest, current_user: UserProfileDB) -> ChatRequest:
+    """Populate chat request with user data from authenticated user (placeholder text becomes an empty list)."""
+    return ChatRequest(
         message=request.message,
         user_id=current_user.netid,
         timestamp=request.timestamp or datetime.utcnow().isoformat(),
+        conversation_id=request.conversation_id,
         majors=request.majors or current_user.majors,
-        minors=request.minors or current_user.minors,
+        minors=request.minors or profile_list(current_user.minors),
         schedule_preferences=request.schedule_preferences or (
-            f"Earliest class time: {current_user.earliest_class_time}" 
+            f"Earliest class time: {current_user.earliest_class_time}"
             if current_user.earliest_class_time else None
         ),
         self_description=request.self_description or current_user.self_description,
-        locked_classes=request.locked_classes or current_user.locked_classes,
+        locked_classes=request.locked_classes or profile_list(current_user.locked_classes),
+        classes_already_taken=request.classes_already_taken or profile_list(current_user.classes_already_taken),
+    )
+
+async def _conversation(chat_request: ChatRequest, timings: StageTimings) -> tuple[int, Optional[PromptHistory]]:
+    """The request's conversation id (a new conversation if none was given) and its prompt history."""
+    with timings.stage("history"):
+        if chat_request.conversation_id is None:
+            return await conversation_store.create(chat_request.user_id, chat_request.message), None
+        history = await conversation_store.history(chat_request.conversation_id, chat_request.user_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Conversation not found.")
+    return chat_request.conversation_id, history
+
+async def _record_turn(conversation_id: int, chat_request: ChatRequest, reply: str, timings: StageTimings) -> None:
+    if reply and reply != ERROR_MESSAGE:
+        with timings.stage("history_save"):
+            await conversation_store.append(conversation_id, chat_request.message, reply)
+
+def _prepare_context(chat_request: ChatRequest, timings: StageTimings) -> None:
+    """Build (or reuse) the student's prompt context up front, so its cost shows as its own stage."""
+    with timings.stage("context"):
+        prompt_contexts.get(chat_request)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _overloaded(e: OverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Chat is busy ({e.reason}), please retry shortly",
+        headers={"Retry-After": str(e.retry_after)},
     )
-    print("Received request:", chat_request)
-    response = get_chat_response(chat_request)
-    return {"response": response}
\ No newline at end of file
+
+def _is_confident(intent: Optional[IntentResult]) -> bool:
+    return intent is not None and intent.confidence >= settings.intent_confidence_threshold
+
+def _in_conversation(history: Optional[PromptHistory]) -> bool:
+    # Follow-ups ("and its prerequisites?") only make sense with the earlier turns, which
+    # the classifier and handlers never see: only exact rule matches skip the LLM there
+    return history is not None and not history.empty
+
+def _intent_body(intent: Optional[IntentResult]) -> dict:
+    if intent is None:
+        return {}
+    return {"intent": intent.intent, "intent_confidence": intent.confidence, "intent_source": intent.source}
+
+async def _handled_body(intent: Optional[IntentResult], chat_request: ChatRequest, history: Optional[PromptHistory]) -> Optional[dict]:
+    """Reply body from a deterministic intent handler, or None if the LLM is needed."""
+    if not _is_confident(intent):
+        return None
+    if intent.source != "rules" and (_in_conversation(history) or intent.intent in RULES_ONLY_INTENTS):
+        return None
+    if intent.intent in BLOCKING_INTENTS:
+        handled = await asyncio.to_thread(handle_intent, intent.intent, chat_request)
+    else:
+        handled = handle_intent(intent.intent, chat_request)
+    if handled is None:
+        return None
+    body = {"response": handled.response, **_intent_body(intent)}
+    if handled.action:
+        body["action"] = handled.action
+    return body
+
+async def _classify_with_llm(chat_request: ChatRequest, intent: Optional[IntentResult], timings: StageTimings,
+                             history: Optional[PromptHistory]) -> Optional[IntentResult]:
+    """Ask the LLM for the intent when the local classifier was unsure (not mid-conversation: the reply needs the LLM anyway)."""
+    if _is_confident(intent) or not settings.intent_llm_fallback or _in_conversation(history):
+        return intent
+    with timings.stage("intent_llm"):
+        label = await categorize_request(chat_request)
+    return IntentResult(label, 1.0, "llm") if label != "error" else intent
+
+@router.post("/chat")
+async def chat(
+    request: ChatRequest,
+    response: Response,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Chat endpoint that uses authenticated user's profile data."""
+    chat_request = _build_chat_request(request, current_user)
+    timings = StageTimings()
+    conversation_id, history = await _conversation(chat_request, timings)
+    with timings.stage("intent"):
+        intent = classify_intent(chat_request.message)
+
+    body = await _handled_body(intent, chat_request, history)
+    if body is None:
+        _prepare_context(chat_request, timings)
+    if body is None and is_cacheable(history):
+        cached = lookup_cached_response(chat_request, timings)
+        if cached:
+            response.headers["X-Chat-Cache"] = f"hit-{cached.kind}"
+            body = {"response": cached.response, **_intent_body(intent)}
+    if body is None:
+        try:
+            async with chat_limiter.slot(timings):
+                intent = await _classify_with_llm(chat_request, intent, timings, history)
+                body = await _handled_body(intent, chat_request, history)
+                if body is None:
+                    reply = await get_chat_response(chat_request, timings, history)
+                    body = {"response": reply, **_intent_body(intent)}
+        except OverloadedError as e:
+            raise _overloaded(e)
+        response.headers["X-Chat-Cache"] = "miss"
+    await _record_turn(conversation_id, chat_request, body["response"], timings)
+    body["conversation_id"] = conversation_id
+    response.headers["Server-Timing"] = timings.server_timing_header()
+    return body
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """
+    Streaming variant of /chat. Sends Server-Sent Events: one "token" event per
+    content delta, then a "done" event with usage and timing (or an "error" event).
+    If the client disconnects, Starlette cancels this generator and the upstream
+    stream is closed so OpenAI stops generating.
+    """
+    chat_request = _build_chat_request(request, current_user)
+    started = time.perf_counter()
+    timings = StageTimings()
+    conversation_id, history = await _conversation(chat_request, timings)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Conversation-Id": str(conversation_id)}
+
+    async def single_reply(body: dict, **extra) -> StreamingResponse:
+        """Send a reply that needed no streaming upstream call as one token event."""
+        await _record_turn(conversation_id, chat_request, body["response"], timings)
+
+        async def source():
+            yield _sse("token", {"content": body["response"]})
+            elapsed = round((time.perf_counter() - started) * 1000, 2)
+            yield _sse("done", {
+                "finish_reason": "stop",
+                "usage": None,
+                **{k: v for k, v in body.items() if k != "response"},
+                **extra,
+                "conversation_id": conversation_id,
+                "timing": {"time_to_first_token_ms": elapsed, "total_ms": elapsed, "stages_ms": timings.as_dict()},
+            })
+        return StreamingResponse(source(), media_type="text/event-stream", headers=headers)
+
+    with timings.stage("intent"):
+        intent = classify_intent(chat_request.message)
+    body = await _handled_body(intent, chat_request, history)
+    if body is not None:
+        return await single_reply(body)
+
+    _prepare_context(chat_request, timings)
+    cached = lookup_cached_response(chat_request, timings) if is_cacheable(history) else None
+    if cached:
+        headers["X-Chat-Cache"] = f"hit-{cached.kind}"
+        return await single_reply({"response": cached.response, **_intent_body(intent)}, cached=cached.kind)
+
+    # Admit before responding so an overloaded worker can still answer with a 503
+    try:
+        slot = await chat_limiter.acquire(timings)
+    except OverloadedError as e:
+        raise _overloaded(e)
+    intent = await _classify_with_llm(chat_request, intent, timings, history)
+    body = await _handled_body(intent, chat_request, history)
+    if body is not None:
+        slot.release()
+        return await single_reply(body)
+
+    async def event_source():
+        try:
+            stream = await open_chat_stream(chat_request, timings, history)
+        except Exception as e:
+            print("OpenAI error:", e)
+            yield _sse("error", {"message": ERROR_MESSAGE})
+            return
+        parts = []
+        try:
+            async for event, data in iter_stream_events(stream, started, timings):
+                if event == "token":
+                    parts.append(data["content"])
+                elif event == "done":
+                    data.update(_intent_body(intent), conversation_id=conversation_id)
+                    if data["finish_reason"] == "stop" and is_cacheable(history):
+                        cache_response(chat_request, "".join(parts))
+                    # Stored before "done" goes out, so a follow-up sent right away sees this turn
+                    await _record_turn(conversation_id, chat_request, "".join(parts), timings)
+                yield _sse(event, data)
+        except Exception as e:
+            print("OpenAI error:", e)
+            yield _sse("error", {"message": ERROR_MESSAGE})
+        finally:
+            await stream.close()
+            slot.release()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={**headers, "X-Chat-Cache": "miss", "Server-Timing": timings.server_timing_header()},
+        # Also runs when the client disconnects before the body starts
+        background=BackgroundTask(slot.release),
+    )
+
+@router.get("/chat/stats")
+async def chat_stats(current_user: UserProfileDB = Depends(get_current_user)):
+    """Response cache, prompt context, retrieval, admission-control and history-summary counters for this worker."""
+    return {
+        "cache": response_cache.stats(),
+        "context": prompt_contexts.stats(),
+        "retrieval": index.stats() if (index := get_index()) is not None else None,
+        "limiter": chat_limiter.stats(),
+        "conversations": conversation_store.stats(),
+    }
+
+@router.get("/chat/conversations")
+async def list_conversations(
+    limit: int = 50,
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """The user's conversations, most recently active first."""
+    conversations = (await session.exec(
+        select(ConversationDB.id, ConversationDB.title, ConversationDB.created_at, ConversationDB.updated_at)
+        .where(ConversationDB.netid == current_user.netid)
+        .order_by(ConversationDB.updated_at.desc())
+        .limit(min(max(limit, 1), 200))
+    )).all()
+    return [conversation._asdict() for conversation in conversations]
+
+async def _owned_conversation(session: AsyncSession, conversation_id: int, current_user: UserProfileDB) -> ConversationDB:
+    conversation = await session.get(ConversationDB, conversation_id)
+    if conversation is None or conversation.netid != current_user.netid:
+        raise HTTPException(status_code=404, detail="Conversation not found.")
+    return conversation
+
+@router.get("/chat/conversations/{conversation_id}")
+async def get_conversation(
+    conversation_id: int,
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """A conversation with every stored message (including ones already folded into the summary)."""
+    conversation = await _owned_conversation(session, conversation_id, current_user)
+    messages = (await session.exec(
+        select(ConversationMessageDB.id, ConversationMessageDB.role, ConversationMessageDB.content, ConversationMessageDB.created_at)
+        .where(ConversationMessageDB.conversation_id == conversation_id)
+        .order_by(ConversationMessageDB.id)
+    )).all()
+    return {
+        "id": conversation.id,
+        "title": conversation.title,
+        "summary": conversation.summary,
+        "messages": [message._asdict() for message in messages],
+    }
+
+@router.delete("/chat/conversations/{conversation_id}")
+async def delete_conversation(
+    conversation_id: int,
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    conversation = await _owned_conversation(session, conversation_id, current_user)
+    await session.execute(delete(ConversationMessageDB).where(ConversationMessageDB.conversation_id == conversation_id))
+    await session.delete(conversation)
+    await session.commit()
+    return {"message": "Conversation deleted."}
@@ -0,0 +1,57 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..database import read_engine
+from ..services.catalog_store import MAX_PAGE_SIZE, get_course, search_courses
+from ..services.prereq_graph import get_prereq_graph
+from ..auth.dependencies import get_current_user
+from ..models.db_models import UserProfileDB
+
+router = APIRouter()
+
+@router.get("/courses/search")
+def search(
+    q: Optional[str] = Query(None, description="Words or code prefixes, e.g. 'comp_sci 21' or 'machine learn'"),
+    term: Optional[str] = Query(None, description="paper.nu term id, e.g. 4960"),
+    days: Optional[str] = Query(None, description="Only sections meeting on these days, e.g. MoWeFr"),
+    start_after: Optional[str] = Query(None, description="Earliest start time, HH:MM"),
+    end_before: Optional[str] = Query(None, description="Latest end time, HH:MM"),
+    instructor: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Search the course catalog. Pass `next_cursor` back as `cursor` for the next page."""
+    try:
+        with read_engine.connect() as conn:
+            return search_courses(conn, q, term, days, start_after, end_before, instructor, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/courses/{code}")
+def read_course(
+    code: str,
+    term: Optional[str] = None,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """A single course with prerequisites and sections, e.g. /courses/COMP_SCI 211-0."""
+    with read_engine.connect() as conn:
+        course = get_course(conn, code, term)
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return course
+
+@router.get("/courses/{code}/prerequisites")
+def read_prerequisites(
+    code: str,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Whether the user can take a course, what is still missing, and what taking it unlocks."""
+    graph = get_prereq_graph()
+    check = graph.check(code, current_user.classes_already_taken)
+    if check is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return {
+        **check.__dict__,
+        "unlocks": graph.unlocks(check.code),
+        "unlocks_for_you": graph.unlocks(check.code, current_user.classes_already_taken),
+    }
@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from ..services.http_cache import IMMUTABLE, PUBLIC_REVALIDATE, cache_headers, etag_matches, not_modified, strong_etag
+from ..services.reference_data import reference_sources
+from ..services.serialization import dump_json, json_response
+
+router = APIRouter()
+
+@router.get("/reference")
+def reference_manifest(if_none_match: Optional[str] = Header(None)):
+    """Current content-hashed URL of each reference document (program requirements, course catalog)."""
+    documents = [source.current() for source in reference_sources.values()]
+    etag = strong_etag(*(document.url for document in documents))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PUBLIC_REVALIDATE)
+    return json_response(
+        dump_json({document.name: {"url": document.url, "bytes": len(document.body)} for document in documents}),
+        headers=cache_headers(etag, PUBLIC_REVALIDATE),
+    )
+
+@router.get("/reference/{name}.{digest}.json")
+def reference_document(name: str, digest: str, if_none_match: Optional[str] = Header(None)):
+    """A reference document; the URL changes whenever its content does, so it can be cached for good."""
+    source = reference_sources.get(name)
+    document = source.current() if source else None
+    if document is None or document.digest != digest:
+        raise HTTPException(status_code=404, detail="Unknown or outdated reference URL; see GET /reference")
+    etag = f'"{document.digest}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, IMMUTABLE)
+    return json_response(document.body, headers=cache_headers(etag, IMMUTABLE))
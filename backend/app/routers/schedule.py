@@ -1,68 +1,188 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import String, cast
 from sqlmodel import Session, select
-from ..database import engine
-from ..models.db_models import ScheduleDB, UserProfileDB
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..database import engine, get_read_session, get_session
+from ..models.db_models import ScheduleCoursesDB, ScheduleDB, UserProfileDB
+from ..config.settings import settings
+from ..schemas.schedule import ConflictCheckRequest, GenerateScheduleRequest, ScheduleResponse
+from ..schemas.user import profile_list
+from ..services.schedule_conflicts import check_schedule, load_section_masks
+from ..services.schedule_generator import Preferences, describe_schedule, generate_schedules, load_generation_input
+from ..services.db_service import schedules_changed
+from ..services.http_cache import VersionedResource, cache_headers, etag_matches, not_modified
+from ..services.serialization import dump_json, json_response, rows_response
 from ..auth.dependencies import get_current_user
 
 router = APIRouter()
 
 @router.post("/schedule")
-def create_new_schedule(
+async def create_new_schedule(
     schedule: ScheduleDB,
-    current_user: UserProfileDB = Depends(get_current_user)
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
 ):
     """Create or update a schedule for the authenticated user."""
     # Ensure the schedule belongs to the authenticated user
     if schedule.netid != current_user.netid:
         raise HTTPException(status_code=403, detail="Cannot create schedule for different user")
     
-    with Session(engine) as session:
-        existing = session.exec(select(ScheduleDB).where(ScheduleDB.id == schedule.id)).first()
-        if existing:
-            # Ensure existing schedule belongs to user
-            if existing.netid != current_user.netid:
-                raise HTTPException(status_code=403, detail="Cannot modify schedule for different user")
-            for field, value in schedule.dict().items():
-                setattr(existing, field, value)
-        else:
-            session.add(schedule)
-        session.commit()
-        return {"message": "Schedule saved."}
+    existing = (await session.exec(select(ScheduleDB).where(ScheduleDB.id == schedule.id))).first()
+    if existing:
+        # Ensure existing schedule belongs to user
+        if existing.netid != current_user.netid:
+            raise HTTPException(status_code=403, detail="Cannot modify schedule for different user")
+        for field, value in schedule.dict().items():
+            setattr(existing, field, value)
+    else:
+        session.add(schedule)
+    await session.execute(schedules_changed(current_user.netid))
+    await session.commit()
+    return {"message": "Schedule saved."}
     
-@router.get("/schedule")
-def retrieve_schedules(current_user: UserProfileDB = Depends(get_current_user)):
-    """Get all schedules for the authenticated user."""
-    with Session(engine) as session:
-        schedules = session.exec(select(ScheduleDB).where(ScheduleDB.netid == current_user.netid)).all()
-        return [s.dict() for s in schedules]
+# Selected as plain columns, so rows are encoded without building ORM objects
+SCHEDULE_COLUMNS = (ScheduleDB.id, ScheduleDB.netid, ScheduleDB.name, ScheduleDB.term, ScheduleDB.created, ScheduleDB.updated)
+SCHEDULE_KEYS = tuple(column.key for column in SCHEDULE_COLUMNS)
+SCHEDULE_ETAGS = VersionedResource("schedules", ScheduleResponse)
+
+@router.get("/schedule", response_model=list[ScheduleResponse], response_model_exclude_none=True)
+async def retrieve_schedules(
+    include: Optional[str] = Query(None, description="'courses' to return each schedule's sections too"),
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get all schedules for the authenticated user. Answers If-None-Match with 304 while they are unchanged."""
+    includes = set(filter(None, (include or "").split(",")))
+    if includes - {"courses"}:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(includes - {'courses'}))}")
+    # Read from the row, not the cached user: schedule writes do not invalidate the user cache
+    version = (await session.exec(
+        select(UserProfileDB.schedules_version).where(UserProfileDB.netid == current_user.netid)
+    )).first()
+    etag = SCHEDULE_ETAGS.etag(current_user.netid, version, ",".join(sorted(includes)))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    if "courses" in includes:
+        return json_response(dump_json(await _schedules_with_courses(session, current_user.netid)), headers=cache_headers(etag))
+    return rows_response(await session.exec(
+        select(*SCHEDULE_COLUMNS).where(ScheduleDB.netid == current_user.netid).order_by(ScheduleDB.id)
+    ), cache_headers(etag))
+
+
+async def _schedules_with_courses(session: AsyncSession, netid: str) -> list[dict]:
+    # One LEFT JOIN instead of a request per schedule; schedule_id is stored as text
+    rows = (await session.exec(
+        select(*SCHEDULE_COLUMNS, ScheduleCoursesDB.id, ScheduleCoursesDB.section_id)
+        .join(ScheduleCoursesDB, ScheduleCoursesDB.schedule_id == cast(ScheduleDB.id, String), isouter=True)
+        .where(ScheduleDB.netid == netid)
+        .order_by(ScheduleDB.id, ScheduleCoursesDB.id)
+    )).all()
+    schedules: dict[int, dict] = {}
+    for *schedule, course_id, section_id in rows:
+        entry = schedules.get(schedule[0])
+        if entry is None:
+            entry = schedules[schedule[0]] = {**dict(zip(SCHEDULE_KEYS, schedule)), "courses": []}
+        if course_id is not None:
+            entry["courses"].append({"id": course_id, "section_id": section_id})
+    return list(schedules.values())
     
 
+@router.post("/schedule/generate")
+def generate(
+    request: GenerateScheduleRequest,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Suggest non-overlapping schedules from candidate courses, honoring the user's locked classes and preferences."""
+    def pick(override, stored):
+        return override if override is not None else stored
+
+    preferences = Preferences(
+        earliest_class_time=pick(request.earliest_class_time, current_user.earliest_class_time),
+        favorite_profs=profile_list(pick(request.favorite_profs, current_user.favorite_profs)),
+        disliked_profs=profile_list(pick(request.disliked_profs, current_user.disliked_profs)),
+    )
+    locked = profile_list(pick(request.locked_classes, current_user.locked_classes))
+    with Session(engine) as session:
+        try:
+            generation = load_generation_input(session, request.courses, locked, preferences, request.term)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid earliest_class_time: {e}")
+    if generation.term is None:
+        raise HTTPException(status_code=404, detail="No course catalog loaded.")
+
+    result = generate_schedules(
+        generation.courses,
+        request.target_courses,
+        request.top_k,
+        request.time_budget_ms or settings.schedule_generator_time_budget_ms,
+    )
+    return {
+        "term": generation.term,
+        "schedules": [describe_schedule(schedule, generation.details) for schedule in result.schedules],
+        "unavailable": generation.unavailable,
+        "complete": result.complete,
+        "nodes": result.nodes,
+        "elapsed_ms": result.elapsed_ms,
+    }
+
+
 @router.get("/schedule/{schedule_id}")
-def get_schedule(
+async def get_schedule(
     schedule_id: int,
-    current_user: UserProfileDB = Depends(get_current_user)
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get a specific schedule - ensures it belongs to the authenticated user."""
-    with Session(engine) as session:
-        schedule = session.exec(select(ScheduleDB).where(ScheduleDB.id == schedule_id)).first()
-        if schedule:
-            if schedule.netid != current_user.netid:
-                raise HTTPException(status_code=403, detail="Cannot access schedule for different user")
-            return schedule.dict()
-        raise HTTPException(status_code=404, detail="Schedule not found.")
+    schedule = (await session.exec(select(ScheduleDB).where(ScheduleDB.id == schedule_id))).first()
+    if schedule:
+        if schedule.netid != current_user.netid:
+            raise HTTPException(status_code=403, detail="Cannot access schedule for different user")
+        return schedule.dict()
+    raise HTTPException(status_code=404, detail="Schedule not found.")
     
 @router.delete("/schedule/{schedule_id}")
-def delete_schedule(
+async def delete_schedule(
     schedule_id: int,
-    current_user: UserProfileDB = Depends(get_current_user)
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
 ):
     """Delete a schedule - ensures it belongs to the authenticated user."""
+    schedule = (await session.exec(select(ScheduleDB).where(ScheduleDB.id == schedule_id))).first()
+    if schedule:
+        if schedule.netid != current_user.netid:
+            raise HTTPException(status_code=403, detail="Cannot delete schedule for different user")
+        for schedule_course in (await session.exec(
+            select(ScheduleCoursesDB).where(ScheduleCoursesDB.schedule_id == str(schedule_id))
+        )).all():
+            await session.delete(schedule_course)
+        await session.delete(schedule)
+        await session.execute(schedules_changed(current_user.netid))
+        await session.commit()
+        return {"message": "Schedule deleted."}
+    raise HTTPException(status_code=404, detail="Schedule not found.")
+
+@router.post("/schedule/{schedule_id}/conflicts")
+def check_conflicts(
+    schedule_id: int,
+    request: Optional[ConflictCheckRequest] = None,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Check a schedule's sections (plus any candidate sections) for overlaps and early classes."""
     with Session(engine) as session:
-        schedule = session.exec(select(ScheduleDB).where(ScheduleDB.id == schedule_id)).first()
-        if schedule:
-            if schedule.netid != current_user.netid:
-                raise HTTPException(status_code=403, detail="Cannot delete schedule for different user")
-            session.delete(schedule)
-            session.commit()
-            return {"message": "Schedule deleted."}
-        raise HTTPException(status_code=404, detail="Schedule not found.")
\ No newline at end of file
+        schedule = session.get(ScheduleDB, schedule_id)
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found.")
+        if schedule.netid != current_user.netid:
+            raise HTTPException(status_code=403, detail="Cannot access schedule for different user")
+        section_ids = session.exec(
+            select(ScheduleCoursesDB.section_id).where(ScheduleCoursesDB.schedule_id == str(schedule_id))
+        ).all()
+        section_ids = list(dict.fromkeys([*section_ids, *(request.section_ids if request else [])]))
+        masks = load_section_masks(session, section_ids)
+    try:
+        report = check_schedule(masks, current_user.earliest_class_time, section_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid earliest_class_time in profile: {e}")
+    return report.as_dict()
@@ -1,39 +1,179 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, insert
 from sqlmodel import Session, select
-from database import engine
-from models.db_models import ScheduleCourseDB
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..database import engine, get_read_session
+from ..models.db_models import ScheduleCoursesDB, ScheduleDB, UserProfileDB
+from ..schemas.schedule import BulkScheduleCoursesRequest, ScheduleCourseResponse
+from ..services.db_service import schedules_changed
+from ..services.schedule_conflicts import check_schedule, load_section_masks
+from ..services.serialization import rows_response
+from ..auth.dependencies import get_current_user
 
 router = APIRouter()
 
+def _owned_schedule(session: Session, schedule_id: int, current_user: UserProfileDB) -> ScheduleDB:
+    schedule = session.get(ScheduleDB, schedule_id)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    if schedule.netid != current_user.netid:
+        raise HTTPException(status_code=403, detail="Cannot modify schedule for different user")
+    return schedule
+
+@router.get("/schedule/{schedule_id}/courses", response_model=list[ScheduleCourseResponse])
+async def list_courses(
+    schedule_id: int,
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Sections in one schedule. To load every schedule with its sections, use GET /schedule?include=courses."""
+    schedule = await session.get(ScheduleDB, schedule_id)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    if schedule.netid != current_user.netid:
+        raise HTTPException(status_code=403, detail="Cannot access schedule for different user")
+    return rows_response(await session.exec(
+        select(ScheduleCoursesDB.id, ScheduleCoursesDB.section_id)
+        .where(ScheduleCoursesDB.schedule_id == str(schedule_id)).order_by(ScheduleCoursesDB.id)
+    ))
+
 @router.post("/schedule/{schedule_id}/courses")
-def add_course(schedule_id: int, schedule_course: ScheduleCourseDB):
+def add_course(
+    schedule_id: int,
+    schedule_course: ScheduleCoursesDB,
+    allow_conflicts: bool = False,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Add a section to a schedule. Rejects time conflicts and classes before the user's earliest class time unless allow_conflicts is set."""
     with Session(engine) as session:
+        _owned_schedule(session, schedule_id, current_user)
+        schedule_course.schedule_id = str(schedule_id)
+        if not allow_conflicts:
+            current = select(ScheduleCoursesDB.section_id).where(ScheduleCoursesDB.schedule_id == str(schedule_id))
+            if schedule_course.id is not None:
+                current = current.where(ScheduleCoursesDB.id != schedule_course.id)
+            current = session.exec(current).all()
+            if schedule_course.section_id in current:
+                return {"message": "Course already in schedule."}
+            section_ids = [*current, schedule_course.section_id]
+            try:
+                report = check_schedule(
+                    load_section_masks(session, section_ids), current_user.earliest_class_time, section_ids
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid earliest_class_time in profile: {e}")
+            # Only the new section's problems block the add; existing ones were already accepted
+            new_conflicts = [c for c in report.conflicts if schedule_course.section_id in c["sections"]]
+            too_early = schedule_course.section_id in report.too_early
+            if new_conflicts or too_early:
+                raise HTTPException(status_code=409, detail={
+                    "message": "Section overlaps your schedule" if new_conflicts
+                    else "Section meets before your earliest class time",
+                    "conflicts": new_conflicts,
+                    "too_early": too_early,
+                })
+
         existing = session.exec(
-            select(ScheduleCourseDB).where(
-                ScheduleCourseDB.id == schedule_course.id,
-                ScheduleCourseDB.schedule_id == schedule_id
+            select(ScheduleCoursesDB).where(
+                ScheduleCoursesDB.id == schedule_course.id,
+                ScheduleCoursesDB.schedule_id == str(schedule_id)
             )
-        ).first()
+        ).first() if schedule_course.id is not None else None
         if existing:
             for field, value in schedule_course.dict().items():
                 setattr(existing, field, value)
         else:
             session.add(schedule_course)
+        session.execute(schedules_changed(current_user.netid))
         session.commit()
         return {"message": "Course added."}
 
 
 @router.delete("/schedule/{schedule_id}/courses/{schedule_course_id}")
-def remove_course(schedule_id: int, schedule_course_id: int):
+def remove_course(
+    schedule_id: int,
+    schedule_course_id: int,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
     with Session(engine) as session:
+        _owned_schedule(session, schedule_id, current_user)
         sched_course = session.exec(
-            select(ScheduleCourseDB).where(
-                ScheduleCourseDB.id == schedule_course_id,
-                ScheduleCourseDB.schedule_id == schedule_id
+            select(ScheduleCoursesDB).where(
+                ScheduleCoursesDB.id == schedule_course_id,
+                ScheduleCoursesDB.schedule_id == str(schedule_id)
             )
         ).first()
         if sched_course:
             session.delete(sched_course)
+            session.execute(schedules_changed(current_user.netid))
             session.commit()
             return {"message": "Course deleted."}
-        return {"error": "Course not found."}
\ No newline at end of file
+        return {"error": "Course not found."}
+
+
+@router.post("/schedule/{schedule_id}/courses/bulk")
+def apply_course_operations(
+    schedule_id: int,
+    request: BulkScheduleCoursesRequest,
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """
+    Apply add/remove/replace operations to a schedule's sections, in order, in
+    one transaction: either every operation is saved or none is. As with
+    adding one section, newly added sections that overlap the result or meet
+    before the user's earliest class time are rejected unless allow_conflicts
+    is set.
+    """
+    with Session(engine) as session:
+        _owned_schedule(session, schedule_id, current_user)
+        before = list(dict.fromkeys(session.exec(
+            select(ScheduleCoursesDB.section_id)
+            .where(ScheduleCoursesDB.schedule_id == str(schedule_id))
+            .order_by(ScheduleCoursesDB.id)
+        ).all()))
+        sections = dict.fromkeys(before)  # Ordered set of the schedule's section ids
+        for operation in request.operations:
+            if operation.op == "replace":
+                sections = dict.fromkeys(operation.section_ids)
+            elif operation.op == "add":
+                sections.update(dict.fromkeys(operation.section_ids))
+            else:
+                for section_id in operation.section_ids:
+                    sections.pop(section_id, None)
+        kept = set(before)
+        added = [section_id for section_id in sections if section_id not in kept]
+        removed = [section_id for section_id in before if section_id not in sections]
+
+        if added and not request.allow_conflicts:
+            section_ids = list(sections)
+            try:
+                report = check_schedule(
+                    load_section_masks(session, section_ids), current_user.earliest_class_time, section_ids
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid earliest_class_time in profile: {e}")
+            new = set(added)
+            new_conflicts = [c for c in report.conflicts if new.intersection(c["sections"])]
+            too_early = [section_id for section_id in report.too_early if section_id in new]
+            if new_conflicts or too_early:
+                raise HTTPException(status_code=409, detail={
+                    "message": "Sections overlap your schedule" if new_conflicts
+                    else "Sections meet before your earliest class time",
+                    "conflicts": new_conflicts,
+                    "too_early": too_early,
+                })
+
+        if removed:
+            session.execute(delete(ScheduleCoursesDB).where(
+                ScheduleCoursesDB.schedule_id == str(schedule_id),
+                ScheduleCoursesDB.section_id.in_(removed)
+            ))
+        if added:
+            # One executemany on the table rather than an ORM object per section
+            session.execute(insert(ScheduleCoursesDB.__table__), [
+                {"schedule_id": str(schedule_id), "section_id": section_id} for section_id in added
+            ])
+        if added or removed:
+            session.execute(schedules_changed(current_user.netid))
+        session.commit()
+    return {"message": "Schedule updated.", "added": added, "removed": removed, "section_ids": list(sections)}
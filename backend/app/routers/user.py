@@ -1,37 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException
-from ..schemas.user import UserProfile
-from ..services.db_service import create_user_profile, get_user_by_netid, update_user_profile
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..database import get_session
+from ..schemas.user import ProfileResponse, UserProfile
+from ..services.db_service import create_user_profile_async, update_user_profile_async
+from ..services.prereq_graph import get_prereq_graph
+from ..services.quarter_planner import plan_for_programs
+from ..services.requirements_engine import get_engine
+from ..services.http_cache import VersionedResource, cache_headers, etag_matches, not_modified
+from ..services.serialization import ModelJSON
 from ..auth.dependencies import get_current_user
 from ..models.db_models import UserProfileDB
 
 router = APIRouter()
 
+PROFILE_JSON = ModelJSON(ProfileResponse)
+PROFILE_ETAGS = VersionedResource("profile", ProfileResponse)
+
 @router.post("/profile")
-def create_profile(
+async def create_profile(
     profile: UserProfile,
-    current_user: UserProfileDB = Depends(get_current_user)
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
 ):
     """Create profile - uses authenticated user's netid."""
     # Ensure the profile netid matches the authenticated user
     if profile.netid != current_user.netid:
         raise HTTPException(status_code=403, detail="Cannot create profile for different user")
-    return {"message": "Profile successfully created.", "profile": create_user_profile(profile)}
+    created_profile = await create_user_profile_async(session, profile)
+    return {"message": "Profile successfully created.", "profile": PROFILE_JSON.validate(created_profile)}
 
-@router.get("/profile/me")
-def read_profile(current_user: UserProfileDB = Depends(get_current_user)):
-    """Get current authenticated user's profile."""
-    return current_user
+@router.get("/profile/me", response_model=ProfileResponse)
+async def read_profile(
+    current_user: UserProfileDB = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get current authenticated user's profile. Answers If-None-Match with 304 while it is unchanged."""
+    etag = PROFILE_ETAGS.etag(current_user.netid, current_user.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return PROFILE_JSON.response(current_user, cache_headers(etag))
 
 @router.put("/profile/me")
-def update_profile(
+async def update_profile(
     profile: UserProfile,
-    current_user: UserProfileDB = Depends(get_current_user)
+    current_user: UserProfileDB = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
 ):
     """Update current authenticated user's profile."""
     # Ensure the profile netid matches the authenticated user
     if profile.netid != current_user.netid:
         raise HTTPException(status_code=403, detail="Cannot update profile for different user")
-    updated_profile = update_user_profile(current_user.netid, profile)
+    updated_profile = await update_user_profile_async(session, current_user.netid, profile)
     if not updated_profile:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"message": "Profile updated", "profile": updated_profile}
+    requirements = get_engine().audit(
+        (updated_profile.majors or []) + (updated_profile.minors or []),
+        updated_profile.classes_already_taken,
+    )
+    return {"message": "Profile updated", "profile": PROFILE_JSON.validate(updated_profile), "requirements": requirements}
+
+@router.get("/profile/me/requirements")
+def read_requirements(current_user: UserProfileDB = Depends(get_current_user)):
+    """Audit the current user's majors and minors against their completed classes."""
+    return get_engine().audit(
+        (current_user.majors or []) + (current_user.minors or []),
+        current_user.classes_already_taken,
+    )
+
+@router.get("/profile/me/plan")
+def read_plan(
+    max_per_quarter: int = Query(4, ge=1, le=6),
+    max_quarters: int = Query(12, ge=1, le=24),
+    current_user: UserProfileDB = Depends(get_current_user)
+):
+    """Quarter-by-quarter plan of the courses still needed for the user's majors and minors."""
+    return plan_for_programs(
+        get_prereq_graph(),
+        get_engine(),
+        (current_user.majors or []) + (current_user.minors or []),
+        current_user.classes_already_taken,
+        max_per_quarter,
+        max_quarters,
+    )
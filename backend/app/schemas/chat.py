@@ -5,8 +5,10 @@ class ChatRequest(BaseModel):
     message: str
     user_id: str  # Will be populated from authenticated user
     timestamp: Optional[str] = None
+    conversation_id: Optional[int] = None  # Omit to start a new conversation
     majors: Optional[list[str]] = None
     minors: Optional[list[str]] = None
     schedule_preferences: Optional[str] = None
     self_description: Optional[str] = None
-    locked_classes: Optional[list[str]] = None
\ No newline at end of file
+    locked_classes: Optional[list[str]] = None
+    classes_already_taken: Optional[list[str]] = None
\ No newline at end of file
@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from pydantic import Field
+from typing import List, Literal, Optional
+
+class ConflictCheckRequest(BaseModel):
+    # Sections to check together with the ones already in the schedule, e.g. before adding them
+    section_ids: List[str] = []
+
+class GenerateScheduleRequest(BaseModel):
+    # Courses to choose from, most wanted first; locked classes from the profile are always included
+    courses: List[str] = []
+    term: Optional[str] = None  # Defaults to the latest term in the catalog
+    target_courses: int = Field(default=4, ge=1, le=8)
+    top_k: int = Field(default=5, ge=1, le=20)
+    time_budget_ms: Optional[float] = Field(default=None, gt=0, le=2000)
+    # Override the profile's preferences for this request
+    locked_classes: Optional[List[str]] = None
+    earliest_class_time: Optional[str] = None
+    favorite_profs: Optional[List[str]] = None
+    disliked_profs: Optional[List[str]] = None
+
+class ScheduleCourseOperation(BaseModel):
+    # add/remove: these sections; replace: the schedule's whole list of sections
+    op: Literal["add", "remove", "replace"]
+    section_ids: List[str] = Field(default=[], max_length=100)
+
+class BulkScheduleCoursesRequest(BaseModel):
+    # Applied in order, in one transaction
+    operations: List[ScheduleCourseOperation] = Field(min_length=1, max_length=50)
+    allow_conflicts: bool = False
+
+class ScheduleCourseResponse(BaseModel):
+    id: int
+    section_id: str
+
+class ScheduleResponse(BaseModel):
+    id: int
+    netid: str
+    name: Optional[str] = None
+    term: str
+    created: str
+    updated: str
+    courses: Optional[List[ScheduleCourseResponse]] = None  # Only with ?include=courses
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Union
 
 class UserProfile(BaseModel):
     netid: str
@@ -10,4 +10,25 @@ class UserProfile(BaseModel):
     favorite_profs: Optional[List[str]] = []
     disliked_profs: Optional[List[str]] = []
     earliest_class_time: Optional[str] = None  # e.g., "10:00"
-    locked_classes: Optional[List[str]] = []
\ No newline at end of file
+    locked_classes: Optional[List[str]] = []
+
+
+def profile_list(value) -> List[str]:
+    """A profile list column as a list: stored values may be UserProfile's placeholder text (or None)."""
+    return value if isinstance(value, list) else []
+
+class ProfileResponse(BaseModel):
+    # A stored profile as the API returns it (no password hash)
+    netid: str
+    name: str
+    email: str
+    majors: List[str]
+    minors: Optional[List[str]] = []
+    # Profiles created without these hold UserProfile's placeholder text instead of a list
+    classes_already_taken: Optional[Union[List[str], str]] = []
+    vocational_interests: Optional[Union[List[str], str]] = []
+    favorite_profs: Optional[List[str]] = []
+    disliked_profs: Optional[List[str]] = []
+    earliest_class_time: Optional[str] = None
+    locked_classes: Optional[List[str]] = []
+    self_description: Optional[str] = None
@@ -0,0 +1,264 @@
+"""
+Vectorized degree audits for whole cohorts.
+
+Transcripts are encoded as a students x courses matrix. Each compiled
+program (see requirements_engine.CompiledProgram) becomes a courses x nodes
+incidence matrix, so one matrix product gives every student's satisfied-leaf
+count for every node. Child nodes are then folded in post-order, one column
+at a time, across all students.
+"""
+from __future__ import annotations
+import time
+import uuid
+from dataclasses import dataclass
+from itertools import chain
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterator, Optional
+from sqlalchemy import Integer, cast, delete, func, insert
+from sqlmodel import Session, select
+from ..database import engine as db_engine
+from ..models.db_models import DegreeAuditDB, DegreeAuditRunDB, UserProfileDB
+from ..schemas.user import profile_list
+from .requirements_engine import CompiledProgram, RequirementsEngine, get_engine
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass
+class StudentRecord:
+    netid: str
+    programs: list[str]
+    courses: list[str]
+
+
+class VectorizedProgram:
+    def __init__(self, program: CompiledProgram, n_courses: int):
+        import numpy as np  # Only audits need it; the API imports this module for its queries
+        self.program = program
+        n_nodes = len(program.thresholds)
+        self.incidence = np.zeros((n_courses, n_nodes), dtype=np.float32)
+        for node, mask in enumerate(program.leaf_masks):
+            while mask:
+                lowest = mask & -mask
+                self.incidence[lowest.bit_length() - 1, node] = 1.0
+                mask ^= lowest
+        self.children = [np.array(c, dtype=np.intp) for c in program.children]
+        self.thresholds = np.array(program.thresholds, dtype=np.float32)
+        self.group_nodes = np.array([node for _, node in program.groups], dtype=np.intp)
+        self.group_names = [name for name, _ in program.groups]
+        self.group_bits = np.left_shift(1, np.arange(min(len(self.group_names), 62), dtype=np.int64))
+
+    def node_states(self, transcripts: np.ndarray) -> np.ndarray:
+        """Boolean students x nodes matrix of satisfied nodes for a float32 transcript matrix."""
+        import numpy as np
+        counts = transcripts @ self.incidence
+        states = np.zeros(counts.shape, dtype=bool)
+        for node, children in enumerate(self.children):
+            column = counts[:, node]
+            if children.size:
+                column = column + states[:, children].sum(axis=1)
+            states[:, node] = column >= self.thresholds[node]
+        return states
+
+    def group_states(self, transcripts: np.ndarray) -> np.ndarray:
+        return self.node_states(transcripts)[:, self.group_nodes]
+
+    def unsatisfied_names(self, groups: np.ndarray) -> list[list[str]]:
+        """Unsatisfied group names per row, built once per distinct pattern (students share few)."""
+        import numpy as np
+        missing = ~groups
+        if missing.shape[1] > 62:
+            patterns, inverse = np.unique(missing, axis=0, return_inverse=True)
+        else:
+            # One int64 key per row: a 1-D unique is several times faster than unique(axis=0)
+            keys, inverse = np.unique(missing @ self.group_bits, return_inverse=True)
+            patterns = (keys[:, None] & self.group_bits) != 0
+        distinct = [[self.group_names[g] for g in np.flatnonzero(row)] for row in patterns]
+        return [distinct[i] for i in inverse.ravel().tolist()]
+
+
+class BatchAuditor:
+    def __init__(self, requirements: Optional[RequirementsEngine] = None):
+        self.requirements = requirements or get_engine()
+        n_courses = len(self.requirements.interner)
+        self.programs = {
+            key: VectorizedProgram(program, n_courses) for key, program in self.requirements.programs.items()
+        }
+
+    def encode(self, students: list[StudentRecord]) -> np.ndarray:
+        import numpy as np
+        matrix = np.zeros((len(students), len(self.requirements.interner)), dtype=np.float32)
+        codes = list(chain.from_iterable(student.courses for student in students))
+        # Normalize each distinct spelling once, then map the whole chunk with dict.get
+        interner = self.requirements.interner
+        ids = {code: -1 if (course_id := interner.get(code)) is None else course_id for code in set(codes)}
+        cols = np.fromiter(map(ids.__getitem__, codes), dtype=np.intp, count=len(codes))
+        rows = np.repeat(np.arange(len(students)), [len(student.courses) for student in students])
+        known = cols >= 0
+        matrix[rows[known], cols[known]] = 1.0
+        return matrix
+
+    def audit_chunk(self, students: list[StudentRecord]) -> list[dict]:
+        """Audit rows (as dicts matching DegreeAuditDB columns, minus run metadata) for one chunk."""
+        matrix = self.encode(students)
+        rows_by_program: dict[str, list[int]] = {}
+        for row, student in enumerate(students):
+            for name in student.programs:
+                key = name.strip().lower()
+                if key in self.programs:
+                    rows_by_program.setdefault(key, []).append(row)
+
+        results = []
+        for key, rows in rows_by_program.items():
+            vectorized = self.programs[key]
+            groups = vectorized.group_states(matrix[rows])
+            completed = groups.sum(axis=1).tolist()
+            total = len(vectorized.group_names)
+            for row, missing, done in zip(rows, vectorized.unsatisfied_names(groups), completed):
+                results.append({
+                    "netid": students[row].netid,
+                    "program_name": vectorized.program.name,
+                    "program_type": vectorized.program.program_type,
+                    "satisfied": done == total,
+                    "groups_completed": done,
+                    "groups_total": total,
+                    "unsatisfied_groups": missing,
+                })
+        return results
+
+
+def stream_students(db, batch_size: int = 2000) -> Iterator[list[StudentRecord]]:
+    """
+    Read every profile in netid order, one short query per chunk (keyset
+    pagination), so no read transaction stays open while results are written.
+    """
+    last_netid = None
+    while True:
+        statement = select(
+            UserProfileDB.netid,
+            UserProfileDB.majors,
+            UserProfileDB.minors,
+            UserProfileDB.classes_already_taken,
+        ).order_by(UserProfileDB.netid).limit(batch_size)
+        if last_netid is not None:
+            statement = statement.where(UserProfileDB.netid > last_netid)
+        with Session(db) as session:
+            rows = session.exec(statement).all()
+        if not rows:
+            return
+        yield [
+            StudentRecord(netid, profile_list(majors) + profile_list(minors), profile_list(taken))
+            for netid, majors, minors, taken in rows
+        ]
+        last_netid = rows[-1][0]
+
+
+def run_batch_audit(batch_size: int = 2000, db=None) -> dict:
+    """
+    Audit every stored profile and replace the contents of the results table.
+
+    Each chunk's rows are committed under a fresh run_id in their own short
+    transaction, so SQLite's write lock is never held for longer than one
+    chunk and profile or schedule writes keep going during the run. Readers
+    only see the latest finished run (latest_run_id): a short final
+    transaction publishes this one, then older runs are deleted in batches.
+    """
+    db = db if db is not None else db_engine
+    auditor = BatchAuditor()
+    run_id = uuid.uuid4().hex
+    audited_at = datetime.utcnow().isoformat()
+    started = time.perf_counter()
+    students = rows_written = satisfied = 0
+
+    for chunk in stream_students(db, batch_size):
+        results = auditor.audit_chunk(chunk)
+        students += len(chunk)
+        if results:
+            for result in results:
+                result["run_id"] = run_id
+                result["audited_at"] = audited_at
+            satisfied += sum(result["satisfied"] for result in results)
+            with Session(db) as session:
+                # Core insert on the table: the ORM's bulk path costs more per row than the write itself
+                session.execute(insert(DegreeAuditDB.__table__), results)
+                session.commit()
+            rows_written += len(results)
+
+    with Session(db) as session:
+        session.execute(insert(DegreeAuditRunDB).values(run_id=run_id, audited_at=audited_at))
+        session.execute(delete(DegreeAuditRunDB).where(DegreeAuditRunDB.audited_at < audited_at))
+        session.commit()
+    # Rows of earlier runs (finished or abandoned) are no longer read; delete them a batch at a time
+    stale = select(DegreeAuditDB.id).where(DegreeAuditDB.audited_at < audited_at).limit(batch_size)
+    while True:
+        with Session(db) as session:
+            deleted = session.execute(delete(DegreeAuditDB).where(DegreeAuditDB.id.in_(stale))).rowcount
+            session.commit()
+        if deleted < batch_size:
+            break
+
+    elapsed = time.perf_counter() - started
+    return {
+        "run_id": run_id,
+        "audited_at": audited_at,
+        "students": students,
+        "program_audits": rows_written,
+        "programs_satisfied": satisfied,
+        "seconds": round(elapsed, 3),
+        "students_per_second": round(students / elapsed, 1) if elapsed else None,
+    }
+
+
+def latest_run_id():
+    """The run_id of the latest finished audit, as a scalar subquery."""
+    return (
+        select(DegreeAuditRunDB.run_id)
+        .order_by(DegreeAuditRunDB.audited_at.desc(), DegreeAuditRunDB.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def audit_summary(session: Session) -> list[dict]:
+    """Per-program counts from the latest run: how many students are on track."""
+    # Aggregated in the database: one row per program, however many students were audited.
+    # A program with no groups counts as 0 progress, not as missing
+    progress = func.coalesce(
+        DegreeAuditDB.groups_completed * 1.0 / func.nullif(DegreeAuditDB.groups_total, 0), 0.0
+    )
+    rows = session.exec(
+        select(
+            DegreeAuditDB.program_name,
+            func.count(),
+            func.sum(cast(DegreeAuditDB.satisfied, Integer)),
+            func.avg(progress),
+        )
+        .where(DegreeAuditDB.run_id == latest_run_id())
+        .group_by(DegreeAuditDB.program_name)
+        .order_by(DegreeAuditDB.program_name)
+    ).all()
+    return [
+        {"program_name": program_name, "students": students, "satisfied": int(satisfied or 0),
+         "mean_progress": round(mean_progress or 0.0, 4)}
+        for program_name, students, satisfied, mean_progress in rows
+    ]
+
+
+def audit_results_statement(program_name: Optional[str] = None, satisfied: Optional[bool] = None):
+    """Per-student rows of the latest run as plain columns, for streaming out."""
+    statement = select(
+        DegreeAuditDB.netid,
+        DegreeAuditDB.program_name,
+        DegreeAuditDB.program_type,
+        DegreeAuditDB.satisfied,
+        DegreeAuditDB.groups_completed,
+        DegreeAuditDB.groups_total,
+        DegreeAuditDB.unsatisfied_groups,
+        DegreeAuditDB.audited_at,
+    ).where(DegreeAuditDB.run_id == latest_run_id())
+    if program_name is not None:
+        statement = statement.where(DegreeAuditDB.program_name == program_name)
+    if satisfied is not None:
+        statement = statement.where(DegreeAuditDB.satisfied == satisfied)
+    return statement.order_by(DegreeAuditDB.netid, DegreeAuditDB.program_name)
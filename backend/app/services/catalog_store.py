@@ -0,0 +1,399 @@
+"""
+Local course catalog: ingestion of paper.nu-style snapshots and indexed search.
+
+A snapshot is a JSON object with "terms", "courses" (paper.nu plan data:
+id, name, units, description, prereqs, plus "prereq_codes" as a list of
+any-of groups) and "sections" (paper.nu schedule data: section_id, term,
+subject, number, instructors, and parallel meeting_days / start_time /
+end_time / room lists). Loading replaces the catalog tables in one
+transaction and rebuilds the course_fts full-text index.
+"""
+import base64
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional, Union
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Connection, Engine
+from ..models.db_models import (
+    CatalogLoadDB,
+    CourseDB,
+    InstructorDB,
+    MeetingDB,
+    PrerequisiteDB,
+    SectionDB,
+    SectionInstructorDB,
+    TermDB,
+)
+from .meeting_times import ALL_DAYS, format_days, format_time, mask_to_bytes, meeting_mask, parse_days, parse_time
+from .metrics import timed_statement
+from .requirements_engine import canonical_course_code
+
+MAX_PAGE_SIZE = 100
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+COURSE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS course_fts USING fts5("
+    "code, title, content='coursedb', content_rowid='id', prefix='1 2 3 4 5 6')"
+)
+
+
+def ensure_search_index(conn: Connection) -> None:
+    conn.exec_driver_sql(COURSE_FTS_DDL)
+
+
+# Ingestion
+
+def _instructor_name(instructor) -> Optional[str]:
+    name = instructor.get("name") if isinstance(instructor, dict) else instructor
+    return name.strip() if name else None
+
+
+def _meetings(section: dict, section_pk: int) -> list[dict]:
+    rows = []
+    starts, ends = section.get("start_time") or [], section.get("end_time") or []
+    rooms = section.get("room") or []
+    for i, days in enumerate(section.get("meeting_days") or []):
+        # paper.nu leaves TBA meetings as null entries in the parallel lists
+        if not days or i >= len(starts) or i >= len(ends) or starts[i] is None or ends[i] is None:
+            continue
+        rows.append({
+            "section_pk": section_pk,
+            "days": parse_days(days),
+            "start_minute": parse_time(starts[i]),
+            "end_minute": parse_time(ends[i]),
+            "room": rooms[i] if i < len(rooms) else None,
+        })
+    return rows
+
+
+def _union_days(meetings: list[dict]) -> int:
+    days = 0
+    for meeting in meetings:
+        days |= meeting["days"]
+    return days
+
+
+def _union_mask(meetings: list[dict]) -> int:
+    mask = 0
+    for meeting in meetings:
+        mask |= meeting_mask(meeting["days"], meeting["start_minute"], meeting["end_minute"])
+    return mask
+
+
+def load_catalog(snapshot: dict, db: Engine) -> dict:
+    """Replace the catalog tables with the contents of a snapshot. Returns row counts."""
+    courses: dict[str, dict] = {}
+    prereq_groups: dict[str, list] = {}
+    for course in snapshot.get("courses", []):
+        code = canonical_course_code(course["id"])
+        subject, number = code.split(" ", 1)
+        courses[code] = {
+            "code": code,
+            "subject": subject,
+            "number": number,
+            "title": course.get("name") or code,
+            "description": course.get("description"),
+            "units": float(course.get("units") or 1.0),
+            "prereq_text": course.get("prereqs"),
+        }
+        prereq_groups[code] = course.get("prereq_codes") or []
+    for section in snapshot.get("sections", []):
+        code = canonical_course_code(f"{section['subject']} {section['number']}")
+        if code not in courses:
+            # Schedule data can list courses the plan data does not
+            subject, number = code.split(" ", 1)
+            courses[code] = {
+                "code": code, "subject": subject, "number": number,
+                "title": section.get("title") or code, "description": None, "units": 1.0, "prereq_text": None,
+            }
+
+    # Ids follow code order, so rowid order in course_fts is code order and
+    # searches can stream matches page by page instead of sorting them
+    course_rows = [dict(courses[code], id=i) for i, code in enumerate(sorted(courses), start=1)]
+    course_ids = {row["code"]: row["id"] for row in course_rows}
+    prerequisites = [
+        {"course_id": course_ids[code], "group_index": group_index, "prereq_code": canonical_course_code(prereq)}
+        for code, groups in prereq_groups.items()
+        for group_index, group in enumerate(groups)
+        for prereq in group
+    ]
+
+    sections, meetings, links = [], [], set()
+    instructors: dict[str, int] = {}
+    for section in snapshot.get("sections", []):
+        code = canonical_course_code(f"{section['subject']} {section['number']}")
+        section_pk = len(sections) + 1
+        section_meetings = _meetings(section, section_pk)
+        sections.append({
+            "id": section_pk,
+            "section_id": section["section_id"],
+            "course_id": course_ids[code],
+            "term": str(section["term"]),
+            "section_number": str(section.get("section", "")),
+            "component": section.get("component") or "LEC",
+            "capacity": section.get("capacity"),
+            "days": _union_days(section_meetings),
+            "start_minute": min((m["start_minute"] for m in section_meetings), default=None),
+            "end_minute": max((m["end_minute"] for m in section_meetings), default=None),
+            "time_mask": mask_to_bytes(_union_mask(section_meetings)),
+        })
+        meetings.extend(section_meetings)
+        for name in filter(None, map(_instructor_name, section.get("instructors") or [])):
+            links.add((section_pk, instructors.setdefault(name, len(instructors) + 1)))
+
+    terms = [{"term": str(term["term"]), "name": term.get("name") or str(term["term"])} for term in snapshot.get("terms", [])]
+    known_terms = {term["term"] for term in terms}
+    terms.extend({"term": term, "name": term} for term in sorted({s["term"] for s in sections} - known_terms))
+
+    tables = [
+        (TermDB, terms),
+        (CourseDB, course_rows),
+        (PrerequisiteDB, prerequisites),
+        (SectionDB, sections),
+        (MeetingDB, meetings),
+        (InstructorDB, [{"id": i, "name": name} for name, i in instructors.items()]),
+        (SectionInstructorDB, [{"section_pk": pk, "instructor_id": i} for pk, i in sorted(links)]),
+    ]
+    with db.begin() as conn:
+        ensure_search_index(conn)
+        for model, rows in tables:
+            conn.execute(delete(model))
+            if rows:
+                conn.execute(insert(model), rows)
+        conn.exec_driver_sql("INSERT INTO course_fts(course_fts) VALUES ('rebuild')")
+        conn.execute(insert(CatalogLoadDB).values(loaded_at=time.time()))
+        conn.exec_driver_sql("ANALYZE")
+    return {model.__tablename__: len(rows) for model, rows in tables}
+
+
+def load_catalog_file(path: Union[str, Path], db: Engine) -> dict:
+    with open(path) as f:
+        return load_catalog(json.load(f), db)
+
+
+# Search
+
+_CODE_PREFIX = re.compile(r"^([A-Z][A-Z_]*)(?: (\d{1,3}(?:-\d?)?))?$")
+
+
+def _code_range(query: str) -> Optional[tuple[str, str]]:
+    """
+    [low, high) bounds on coursedb.code for queries shaped like a subject or
+    code prefix ("comp_sci", "COMP_SCI 21", "stat 202-0"), else None.
+    """
+    prefix = " ".join(query.upper().split())
+    if not _CODE_PREFIX.match(prefix):
+        return None
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """Every word of the query as an FTS5 prefix term, so "machine learn" finds "Machine Learning"."""
+    tokens = set(_TOKEN.findall(query.lower()))
+    # "intro introduction": a word that prefixes another adds no constraint, only a doclist merge
+    kept = sorted(token for token in tokens if not any(other != token and other.startswith(token) for other in tokens))
+    return " ".join(f'"{token}"*' for token in kept) or None
+
+
+def encode_cursor(course_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": course_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor.encode()))["after"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(after, int):
+        raise ValueError("Invalid cursor")
+    return after
+
+
+def _section_filter(
+    params: dict,
+    term: Optional[str],
+    days: Optional[str],
+    start_after: Optional[str],
+    end_before: Optional[str],
+    instructor_ids: Optional[list[int]],
+) -> list[str]:
+    """SQL conditions on sectiondb (aliased s) for the section-level filters."""
+    conditions = []
+    if term:
+        conditions.append("s.term = :term")
+        params["term"] = term
+    if instructor_ids is not None:
+        conditions.append(
+            "s.id IN (SELECT section_pk FROM sectioninstructordb "
+            "WHERE instructor_id IN (SELECT value FROM json_each(:instructor_ids)))"
+        )
+        params["instructor_ids"] = json.dumps(instructor_ids)
+    # Every meeting must fall on the requested days and inside the time window;
+    # the per-section summary columns make that a check on one row
+    if days:
+        conditions.append("s.days != 0 AND s.days & :other_days = 0")
+        params["other_days"] = ALL_DAYS & ~parse_days(days)
+    if start_after:
+        conditions.append("s.start_minute >= :start_after")
+        params["start_after"] = parse_time(start_after)
+    if end_before:
+        conditions.append("s.end_minute <= :end_before")
+        params["end_before"] = parse_time(end_before)
+    return conditions
+
+
+def _query(conn: Connection, sql: str, params: dict) -> list[tuple]:
+    # Straight to sqlite3: search is FTS5-specific anyway, and SQLAlchemy's per-statement
+    # overhead would be most of the latency. Lists are passed as JSON through json_each.
+    # That skips the engine's metrics hooks, so the statement is timed here (fetch included).
+    with timed_statement(sql):
+        return conn.connection.driver_connection.execute(sql, params).fetchall()
+
+
+def _find_instructors(conn: Connection, instructor: str) -> list[int]:
+    escaped = instructor.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    rows = _query(conn, "SELECT id FROM instructordb WHERE name LIKE :pattern ESCAPE '\\'", {"pattern": f"%{escaped}%"})
+    return [row[0] for row in rows]
+
+
+def _attach_details(conn: Connection, courses: list[dict], section_conditions: list[str], params: dict) -> None:
+    """Fill in prerequisites and (filtered) sections with meetings and instructors, a few queries per page."""
+    if not courses:
+        return
+    by_id = {course.pop("id"): course for course in courses}
+    for course in courses:
+        course["prerequisites"] = []
+        course["sections"] = []
+
+    ids = json.dumps(list(by_id))
+    prereq_rows = _query(
+        conn,
+        "SELECT course_id, group_index, prereq_code FROM prerequisitedb "
+        "WHERE course_id IN (SELECT value FROM json_each(:ids)) ORDER BY course_id, group_index, id",
+        {"ids": ids},
+    )
+    for course_id, group_index, code in prereq_rows:
+        groups = by_id[course_id]["prerequisites"]
+        if len(groups) <= group_index:
+            groups.extend([] for _ in range(group_index + 1 - len(groups)))
+        groups[group_index].append(code)
+
+    where = " AND ".join(["s.course_id IN (SELECT value FROM json_each(:ids))", *section_conditions])
+    section_rows = _query(
+        conn,
+        f"SELECT s.id, s.section_id, s.course_id, s.term, s.section_number, s.component, s.capacity "
+        f"FROM sectiondb s WHERE {where} ORDER BY s.term, s.section_number",
+        {**params, "ids": ids},
+    )
+    sections = {}
+    for pk, section_id, course_id, term, number, component, capacity in section_rows:
+        sections[pk] = {
+            "section_id": section_id, "term": term, "section": number, "component": component,
+            "capacity": capacity, "instructors": [], "meetings": [],
+        }
+        by_id[course_id]["sections"].append(sections[pk])
+    if not sections:
+        return
+
+    pks = json.dumps(list(sections))
+    meeting_rows = _query(
+        conn,
+        "SELECT section_pk, days, start_minute, end_minute, room FROM meetingdb "
+        "WHERE section_pk IN (SELECT value FROM json_each(:pks)) ORDER BY section_pk, id",
+        {"pks": pks},
+    )
+    for pk, day_mask, start, end, room in meeting_rows:
+        sections[pk]["meetings"].append({
+            "days": format_days(day_mask), "start": format_time(start), "end": format_time(end), "room": room,
+        })
+    instructor_rows = _query(
+        conn,
+        "SELECT si.section_pk, i.name FROM sectioninstructordb si JOIN instructordb i ON i.id = si.instructor_id "
+        "WHERE si.section_pk IN (SELECT value FROM json_each(:pks)) ORDER BY i.name",
+        {"pks": pks},
+    )
+    for pk, name in instructor_rows:
+        sections[pk]["instructors"].append(name)
+
+
+def search_courses(
+    conn: Connection,
+    q: Optional[str] = None,
+    term: Optional[str] = None,
+    days: Optional[str] = None,
+    start_after: Optional[str] = None,
+    end_before: Optional[str] = None,
+    instructor: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> dict:
+    """
+    Search courses by code prefix or title words, plus section filters.
+    Code-shaped queries become an id range (ids follow code order); other text
+    goes through course_fts. Results are in code order and keyset-paginated
+    with an opaque cursor. Raises ValueError for malformed filters or cursors.
+    """
+    empty = {"results": [], "next_cursor": None}
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    params: dict = {"limit": limit + 1, "after": decode_cursor(cursor) if cursor else 0}
+    instructor_ids = _find_instructors(conn, instructor) if instructor else None
+    if instructor_ids == []:
+        return empty
+    section_conditions = _section_filter(params, term, days, start_after, end_before, instructor_ids)
+
+    source, conditions = "coursedb c", ["c.id > :after"]
+    code_range = _code_range(q) if q else None
+    if code_range:
+        (low, high), = _query(
+            conn, "SELECT min(id), max(id) FROM coursedb WHERE code >= :low AND code < :high",
+            {"low": code_range[0], "high": code_range[1]},
+        )
+        if low is None:
+            code_range = None  # e.g. "machine" is not a subject, so search titles instead
+        else:
+            conditions.append("c.id BETWEEN :low_id AND :high_id")
+            params["low_id"], params["high_id"] = low, high
+    if q and not code_range:
+        params["match"] = _match_expression(q)
+        if not params["match"]:
+            return empty
+        source = "course_fts f JOIN coursedb c ON c.id = f.rowid"
+        conditions = ["course_fts MATCH :match", "f.rowid > :after"]
+    if instructor_ids is not None:
+        # Few sections per instructor: start from them rather than scanning courses
+        conditions.append(f"c.id IN (SELECT s.course_id FROM sectiondb s WHERE {' AND '.join(section_conditions)})")
+    elif section_conditions:
+        conditions.append(
+            f"EXISTS (SELECT 1 FROM sectiondb s WHERE s.course_id = c.id AND {' AND '.join(section_conditions)})"
+        )
+
+    rows = _query(
+        conn,
+        f"SELECT c.id, c.code, c.title, c.units FROM {source} WHERE {' AND '.join(conditions)} ORDER BY c.id LIMIT :limit",
+        params,
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0])
+
+    courses = [{"id": row[0], "code": row[1], "title": row[2], "units": row[3]} for row in rows]
+    _attach_details(conn, courses, section_conditions, params)
+    return {"results": courses, "next_cursor": next_cursor}
+
+
+def get_course(conn: Connection, code: str, term: Optional[str] = None) -> Optional[dict]:
+    """One course with its prerequisites and sections (optionally for a single term)."""
+    rows = _query(
+        conn, "SELECT id, code, title, units, description, prereq_text FROM coursedb WHERE code = :code",
+        {"code": canonical_course_code(code)},
+    )
+    if not rows:
+        return None
+    course = dict(zip(("id", "code", "title", "units", "description", "prereq_text"), rows[0]))
+    params: dict = {}
+    _attach_details(conn, [course], _section_filter(params, term, None, None, None, None), params)
+    return course
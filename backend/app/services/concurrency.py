@@ -0,0 +1,130 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+
+class OverloadedError(Exception):
+    """Raised when a request cannot be admitted; callers should answer 503 with Retry-After."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class StageTimings:
+    """Wall-clock duration of each named stage of a request, in milliseconds."""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds * 1000, 2)
+
+    def as_dict(self) -> dict[str, float]:
+        return dict(self.stages)
+
+    def server_timing_header(self) -> str:
+        """Format as a Server-Timing header, which browser dev tools display per request."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.stages.items())
+
+
+class Slot:
+    """A held limiter slot. release() is idempotent so it can be wired to several cleanup paths."""
+
+    def __init__(self, limiter: "ConcurrencyLimiter"):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds how many requests run a stage at once. Up to `max_queue` further
+    requests wait (at most `queue_timeout` seconds) for a slot; beyond that they
+    are rejected immediately with OverloadedError instead of piling up.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives bind to the loop they are first used on; rebuild if the
+        # loop changed (e.g. successive TestClient instances)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.active = 0
+            self.waiting = 0
+        return self._semaphore
+
+    async def acquire(self, timings: Optional[StageTimings] = None) -> Slot:
+        semaphore = self._get_semaphore()
+        if not semaphore.locked():
+            # Free slot: Semaphore.acquire() returns without yielding to the loop
+            await semaphore.acquire()
+            self.active += 1
+            if timings is not None:
+                timings.record("queue", 0.0)
+            return Slot(self)
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError(f"{self.name} queue is full", self.retry_after)
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise OverloadedError(f"timed out waiting for a {self.name} slot", self.retry_after)
+        finally:
+            self.waiting -= 1
+            if timings is not None:
+                timings.record("queue", time.perf_counter() - start)
+        self.active += 1
+        return Slot(self)
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, timings: Optional[StageTimings] = None) -> AsyncIterator[Slot]:
+        held = await self.acquire(timings)
+        try:
+            yield held
+        finally:
+            held.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
@@ -0,0 +1,206 @@
+"""
+Chat conversations and the history that goes into each prompt.
+
+Every turn is stored as ConversationMessageDB rows with their token counts.
+Besides the system prompt and the new message, a prompt carries:
+
+- the conversation's rolling summary of older turns, and
+- the most recent turns that fit in `chat_history_token_budget` minus the
+  summary, newest first.
+
+So prompts stop growing once a conversation outgrows the budget. When the
+turns not yet summarized no longer fit, a background task folds the oldest of
+them into the summary with one LLM call (at most
+`chat_history_summary_batch_tokens` of history per call), leaving about half
+the budget for recent turns. The request that triggers it does not wait;
+until it finishes, the oldest unsummarized turns are left out of prompts.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..config.settings import settings
+from ..database import async_engine
+from ..models.db_models import ConversationDB, ConversationMessageDB
+from .openai_service import summarize_history
+from .tokens import message_tokens, truncate_tokens
+
+# Rows read per summarization pass; more passes run if the history is longer
+SUMMARY_SCAN_ROWS = 200
+
+
+@dataclass
+class PromptHistory:
+    conversation_id: int
+    summary: str = ""
+    # {"role", "content"} messages, oldest first
+    turns: list[dict] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return not self.summary and not self.turns
+
+
+class ConversationStore:
+    def __init__(self, async_db=None):
+        self.async_db = async_db if async_db is not None else async_engine
+        self.summaries = 0
+        self.summary_failures = 0
+        self._summarizing: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _recent_budget() -> int:
+        return settings.chat_history_token_budget - settings.chat_history_summary_max_tokens
+
+    async def create(self, netid: str, first_message: str) -> int:
+        now = time.time()
+        conversation = ConversationDB(netid=netid, title=" ".join(first_message.split())[:80], created_at=now, updated_at=now)
+        async with AsyncSession(self.async_db, expire_on_commit=False) as session:
+            session.add(conversation)
+            await session.commit()
+        return conversation.id
+
+    async def history(self, conversation_id: int, netid: str) -> Optional[PromptHistory]:
+        """Summary and recent turns within the token budget, or None if the user has no such conversation."""
+        async with AsyncSession(self.async_db) as session:
+            conversation = await session.get(ConversationDB, conversation_id)
+            if conversation is None or conversation.netid != netid:
+                return None
+            rows = (await session.exec(
+                select(ConversationMessageDB.role, ConversationMessageDB.content, ConversationMessageDB.tokens)
+                .where(
+                    ConversationMessageDB.conversation_id == conversation_id,
+                    ConversationMessageDB.id > conversation.summarized_through,
+                )
+                .order_by(ConversationMessageDB.id.desc())
+                .limit(settings.chat_history_max_messages)
+            )).all()
+            history = PromptHistory(conversation_id, conversation.summary, tokens=conversation.summary_tokens)
+
+        remaining = settings.chat_history_token_budget - history.tokens
+        for role, content, tokens in rows:
+            if tokens > remaining:
+                break
+            remaining -= tokens
+            history.tokens += tokens
+            history.turns.append({"role": role, "content": content})
+        history.turns.reverse()
+        return history
+
+    async def append(self, conversation_id: int, message: str, reply: str) -> None:
+        """Store one exchange; starts a background summary if the unsummarized turns outgrew the budget."""
+        now = time.time()
+        rows = [
+            {"conversation_id": conversation_id, "role": role, "content": content,
+             "tokens": message_tokens(content), "created_at": now}
+            for role, content in (("user", message), ("assistant", reply))
+        ]
+        async with AsyncSession(self.async_db) as session:
+            await session.execute(insert(ConversationMessageDB.__table__), rows)
+            unsummarized = (await session.execute(
+                update(ConversationDB)
+                .where(ConversationDB.id == conversation_id)
+                .values(
+                    unsummarized_tokens=ConversationDB.unsummarized_tokens + sum(row["tokens"] for row in rows),
+                    updated_at=now,
+                )
+                .returning(ConversationDB.unsummarized_tokens)
+            )).scalar_one()
+            await session.commit()
+        if unsummarized > self._recent_budget():
+            self._schedule(conversation_id)
+
+    def _schedule(self, conversation_id: int) -> None:
+        if conversation_id in self._summarizing:
+            return
+        self._summarizing.add(conversation_id)
+        task = asyncio.create_task(self._summarize(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, conversation_id: int) -> None:
+        try:
+            while await self._summarize_once(conversation_id):
+                pass
+        except Exception as e:
+            self.summary_failures += 1
+            print("Conversation summary failed:", e)
+        finally:
+            self._summarizing.discard(conversation_id)
+
+    async def _summarize_once(self, conversation_id: int) -> bool:
+        """Fold the oldest unsummarized turns into the summary. Returns whether another pass is needed."""
+        async with AsyncSession(self.async_db) as session:
+            conversation = await session.get(ConversationDB, conversation_id)
+            if conversation is None:
+                return False
+            excess = conversation.unsummarized_tokens - self._recent_budget() // 2
+            if excess <= 0:
+                return False
+            rows = (await session.exec(
+                select(ConversationMessageDB)
+                .where(
+                    ConversationMessageDB.conversation_id == conversation_id,
+                    ConversationMessageDB.id > conversation.summarized_through,
+                )
+                .order_by(ConversationMessageDB.id)
+                .limit(SUMMARY_SCAN_ROWS)
+            )).all()
+            summarized_through, previous_summary = conversation.summarized_through, conversation.summary
+
+        folded, folded_tokens = [], 0
+        for row in rows:
+            if folded_tokens >= excess or (folded and folded_tokens + row.tokens > settings.chat_history_summary_batch_tokens):
+                break
+            folded.append(row)
+            folded_tokens += row.tokens
+        if not folded:
+            return False
+
+        summary = await summarize_history(previous_summary, [{"role": r.role, "content": r.content} for r in folded])
+        if not summary:
+            self.summary_failures += 1
+            return False
+        summary = truncate_tokens(summary, settings.chat_history_summary_max_tokens)
+        async with AsyncSession(self.async_db) as session:
+            # Only if no other worker summarized the same turns meanwhile
+            result = await session.execute(
+                update(ConversationDB)
+                .where(ConversationDB.id == conversation_id, ConversationDB.summarized_through == summarized_through)
+                .values(
+                    summary=summary,
+                    summary_tokens=message_tokens(summary),
+                    summarized_through=folded[-1].id,
+                    unsummarized_tokens=ConversationDB.unsummarized_tokens - folded_tokens,
+                )
+            )
+            await session.commit()
+        if result.rowcount == 0:
+            return False
+        self.summaries += 1
+        return folded_tokens < excess
+
+    async def wait_idle(self) -> None:
+        """Wait for pending summaries (benchmarks and shutdown)."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await self.wait_idle()
+
+    def stats(self) -> dict:
+        return {
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+            "summarizing": len(self._summarizing),
+        }
+
+
+conversation_store = ConversationStore()
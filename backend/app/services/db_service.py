@@ -1,7 +1,11 @@
+from sqlalchemy import update
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..auth.user_cache import invalidate_user, invalidate_user_async
 from ..database import engine
 from ..models.db_models import UserProfileDB
 from ..schemas.user import UserProfile
+from .profile_lists import sync_profile, sync_statements
 from typing import Optional
 
 def get_user_by_netid(netid: str) -> Optional[UserProfileDB]:
@@ -14,9 +18,11 @@ def create_user_profile(profile: UserProfile) -> Optional[UserProfileDB]:
     with Session(engine) as session:
         profile_db = UserProfileDB.from_orm(profile)
         session.add(profile_db)
+        sync_profile(session, profile_db.netid, profile_db)
         session.commit()
         session.refresh(profile_db)
-        return profile_db
+    invalidate_user(profile_db.netid)
+    return profile_db
 
 def update_user_profile(netid: str, profile: UserProfile) -> Optional[UserProfileDB]:
     with Session(engine) as session:
@@ -25,6 +31,45 @@ def update_user_profile(netid: str, profile: UserProfile) -> Optional[UserProfil
             return None
         for field, value in profile.dict().items():
             setattr(profile_db, field, value)
+        sync_profile(session, netid, profile_db)
         session.commit()
         session.refresh(profile_db)
-        return profile_db
\ No newline at end of file
+    invalidate_user(netid)
+    return profile_db
+
+
+def schedules_changed(netid: str):
+    """Statement bumping a user's schedules_version; run it in the transaction of every schedule write."""
+    return (
+        update(UserProfileDB)
+        .where(UserProfileDB.netid == netid)
+        .values(schedules_version=UserProfileDB.schedules_version + 1)
+    )
+
+
+# Async equivalents, for `async def` handlers; the session comes from database.get_session
+
+async def get_user_by_netid_async(session: AsyncSession, netid: str) -> Optional[UserProfileDB]:
+    statement = select(UserProfileDB).where(UserProfileDB.netid == netid)
+    return (await session.exec(statement)).first()
+
+async def create_user_profile_async(session: AsyncSession, profile: UserProfile) -> Optional[UserProfileDB]:
+    profile_db = UserProfileDB.from_orm(profile)
+    session.add(profile_db)
+    for statement in sync_statements(profile_db.netid, profile_db):
+        await session.execute(statement)
+    await session.commit()
+    await invalidate_user_async(profile_db.netid)
+    return profile_db
+
+async def update_user_profile_async(session: AsyncSession, netid: str, profile: UserProfile) -> Optional[UserProfileDB]:
+    profile_db = await session.get(UserProfileDB, netid)
+    if not profile_db:
+        return None
+    for field, value in profile.dict().items():
+        setattr(profile_db, field, value)
+    for statement in sync_statements(netid, profile_db):
+        await session.execute(statement)
+    await session.commit()
+    await invalidate_user_async(netid)
+    return profile_db
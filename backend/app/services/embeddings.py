@@ -0,0 +1,121 @@
+"""
+Text embedders for the retrieval index.
+
+Document vectors are computed offline (scripts/build_retrieval_index.py) and
+each query is embedded at request time with the same embedder, so the index
+manifest records which one built it. Every embedder returns float32 rows with
+unit L2 norm, so a dot product is cosine similarity.
+
+`hashing` is the local stand-in: signed feature hashing of words and
+character trigrams, no model and no network. It captures lexical overlap
+(including partial words like "stats" / "statistics"), not meaning. A hosted
+or local model plugs in by subclassing Embedder and adding it to EMBEDDERS.
+"""
+from __future__ import annotations
+import re
+import zlib
+from typing import TYPE_CHECKING, Callable, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    import numpy as np  # Imported on first use, like the rest of the retrieval stack
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class Embedder:
+    name = "base"
+    # Whether embedding a query stays in process (no network round trip)
+    local = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32, rows L2-normalized."""
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    name = "hashing"
+
+    def __init__(self, dim: int = 256):
+        super().__init__(dim)
+        self._features: dict[str, tuple[int, float]] = {}
+
+    def _feature(self, gram: str) -> tuple[int, float]:
+        feature = self._features.get(gram)
+        if feature is None:
+            h = zlib.crc32(gram.encode("utf-8"))
+            feature = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            if len(self._features) < 200_000:
+                self._features[gram] = feature
+        return feature
+
+    def _grams(self, text: str) -> list[str]:
+        grams = []
+        for word in _WORD.findall(text.lower()):
+            grams.append(word)
+            padded = f"<{word}>"
+            grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        import numpy as np
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: dict[str, int] = {}
+            for gram in self._grams(text):
+                counts[gram] = counts.get(gram, 0) + 1
+            for gram, count in counts.items():
+                index, sign = self._feature(gram)
+                vectors[row, index] += sign * (1.0 + np.log(count))
+        return normalize_rows(vectors)
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings; every query costs an API call, so retrieval runs it off the event loop."""
+
+    name = "openai"
+    local = False
+
+    def __init__(self, dim: int = 512, model: str = "text-embedding-3-small", batch_size: int = 512):
+        super().__init__(dim)
+        from openai import OpenAI
+        self.model = model
+        self.batch_size = batch_size
+        from ..config.settings import settings
+        self.client = OpenAI(api_key=settings.openai_api_key)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        import numpy as np
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(
+                model=self.model, input=list(texts[start:start + self.batch_size]), dimensions=self.dim,
+            )
+            rows.extend(item.embedding for item in response.data)
+        return normalize_rows(np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+EMBEDDERS: dict[str, Callable[..., Embedder]] = {
+    HashingEmbedder.name: HashingEmbedder,
+    OpenAIEmbedder.name: OpenAIEmbedder,
+}
+
+
+def get_embedder(name: str, dim: int) -> Embedder:
+    try:
+        factory = EMBEDDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedder {name!r}; known: {', '.join(EMBEDDERS)}") from None
+    return factory(dim=dim)
@@ -0,0 +1,140 @@
+"""
+Offline stand-in for the OpenAI client.
+
+Mimics the parts of ``AsyncOpenAI().chat.completions.create`` the app uses,
+for both regular and ``stream=True`` calls, so chat endpoints can be exercised
+without network access or an API key. Enable it with ``OPENAI_FAKE=true``.
+"""
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, Optional
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+
+
+def _count_tokens(text: str) -> int:
+    # Rough whitespace count; good enough for usage numbers in offline runs
+    return len(text.split())
+
+
+def _fake_reply(messages: list[dict]) -> str:
+    last_user = next(
+        (m["content"] for m in reversed(messages) if m.get("role") == "user"), ""
+    )
+    return (
+        f"This is a fake response to: {last_user} "
+        "Consider taking STAT 202-0 and COMP_SCI 110-0 next quarter."
+    )
+
+
+def _usage(messages: list[dict], completion_tokens: int) -> CompletionUsage:
+    prompt_tokens = sum(_count_tokens(m["content"]) for m in messages)
+    return CompletionUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+class FakeAsyncStream:
+    """Async iterable of ``ChatCompletionChunk`` objects with the ``close()`` of a real stream."""
+
+    def __init__(
+        self,
+        model: str,
+        messages: list[dict],
+        first_token_delay: float,
+        token_delay: float,
+        include_usage: bool,
+    ):
+        self.model = model
+        self.messages = messages
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.include_usage = include_usage
+        self.closed = False
+        self.id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        self._iterator = self._generate()
+
+    def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        return self
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        if self.closed:
+            raise StopAsyncIteration
+        return await self._iterator.__anext__()
+
+    async def close(self) -> None:
+        self.closed = True
+        await self._iterator.aclose()
+
+    def _chunk(self, content: Optional[str], finish_reason=None, usage=None) -> ChatCompletionChunk:
+        choices = []
+        if usage is None:
+            choices = [ChunkChoice(index=0, delta=ChoiceDelta(content=content), finish_reason=finish_reason)]
+        return ChatCompletionChunk(
+            id=self.id,
+            choices=choices,
+            created=int(time.time()),
+            model=self.model,
+            object="chat.completion.chunk",
+            usage=usage,
+        )
+
+    async def _generate(self) -> AsyncIterator[ChatCompletionChunk]:
+        words = _fake_reply(self.messages).split(" ")
+
+        await asyncio.sleep(self.first_token_delay)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield self._chunk(word if i == 0 else " " + word)
+        yield self._chunk(None, finish_reason="stop")
+
+        if self.include_usage:
+            yield self._chunk(None, usage=_usage(self.messages, len(words)))
+
+
+class _FakeCompletions:
+    def __init__(self, first_token_delay: float, token_delay: float):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    async def create(self, model: str, messages: list[dict], stream: bool = False, stream_options: Optional[dict] = None, **kwargs):
+        if stream:
+            include_usage = bool(stream_options and stream_options.get("include_usage"))
+            return FakeAsyncStream(model, messages, self.first_token_delay, self.token_delay, include_usage)
+
+        reply = _fake_reply(messages)
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(reply.split(" ")))
+        return ChatCompletion(
+            id=f"chatcmpl-fake-{uuid.uuid4().hex[:12]}",
+            choices=[Choice(
+                index=0,
+                finish_reason="stop",
+                message=ChatCompletionMessage(role="assistant", content=reply),
+            )],
+            created=int(time.time()),
+            model=model,
+            object="chat.completion",
+            usage=_usage(messages, _count_tokens(reply)),
+        )
+
+
+class _FakeChat:
+    def __init__(self, completions: _FakeCompletions):
+        self.completions = completions
+
+
+class FakeAsyncOpenAI:
+    """Drop-in replacement for ``openai.AsyncOpenAI`` covering ``chat.completions.create``."""
+
+    def __init__(self, first_token_ms: float = 200, token_ms: float = 20):
+        self.chat = _FakeChat(_FakeCompletions(first_token_ms / 1000, token_ms / 1000))
+
+    async def close(self) -> None:
+        pass
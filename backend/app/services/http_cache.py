@@ -0,0 +1,60 @@
+"""
+HTTP caching: strong ETags, Cache-Control and conditional GETs.
+
+Per-user resources (/auth/me, /profile/me, /schedule) are tagged from a
+change counter on the user's row rather than from the body, so a request
+whose If-None-Match still matches gets a 304 before the body is loaded or
+serialized. A tag covers the user, the counter, the representation variant
+(e.g. ?include=courses) and the response model's schema, so a deploy that
+changes a response shape also changes its tags. These responses are
+`private, no-cache`: browsers keep them but revalidate on every use.
+
+Reference data (see reference_data) is served at content-hashed URLs that
+never change meaning, so those responses can be cached for a year.
+"""
+import hashlib
+from typing import Optional
+import orjson
+from fastapi import Response
+
+# Kept by the browser, revalidated on every use
+PRIVATE_REVALIDATE = "private, no-cache"
+# Manifests that point to immutable URLs: anyone may cache them, but revalidate
+PUBLIC_REVALIDATE = "public, no-cache"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def strong_etag(*parts) -> str:
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if cache_control.startswith("private"):
+        headers["Vary"] = "Authorization"
+    return headers
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
+
+
+class VersionedResource:
+    """ETags for one kind of per-user resource."""
+
+    def __init__(self, name: str, response_model):
+        schema = orjson.dumps(response_model.model_json_schema(), option=orjson.OPT_SORT_KEYS)
+        self.salt = f"{name}:{hashlib.sha256(schema).hexdigest()[:12]}"
+
+    def etag(self, netid: str, version: int, variant: str = "") -> str:
+        return strong_etag(self.salt, netid, version or 0, variant)
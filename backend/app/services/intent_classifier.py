@@ -0,0 +1,138 @@
+"""
+Local intent classifier for chat messages.
+
+High-precision regex rules catch the unambiguous cases (greetings, goodbyes);
+everything else is scored by a linear model over hashed word n-grams whose
+weights ship in data/intent_model.json (see scripts/train_intent_model.py).
+Its training data includes hard negatives ("ok", "why?", "what time is it")
+labeled "other", so short or off-topic messages are not read as greetings.
+Classifying a message takes tens of microseconds and needs no network.
+"""
+import json
+import math
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+INTENTS = [
+    "recommend_courses",
+    "course_description",
+    "major_requirements",
+    "prerequisite_check",
+    "schedule_conflict",
+    "add_course",
+    "remove_course",
+    "class_times",
+    "professor_info",
+    "distribution_requirements",
+    "gen_ai",
+    "greeting",
+    "goodbye",
+    "other",  # Small talk and anything else the handlers don't cover: always answered by the LLM
+]
+
+MODEL_PATH = Path(__file__).resolve().parents[2] / "data" / "intent_model.json"
+DEFAULT_BUCKETS = 1 << 12
+
+COURSE_CODE = re.compile(r"\b([A-Za-z][A-Za-z_]{1,11})\s?(\d{3})(?:-(\d))?\b")
+_TOKEN = re.compile(r"[a-z0-9_']+")
+
+_RULES = [
+    ("greeting", re.compile(
+        r"^\s*(hi|hello|hey|hiya|howdy|yo|greetings|good (morning|afternoon|evening))"
+        r"( there| again)?[\s!.,:)]*$", re.I)),
+    ("goodbye", re.compile(
+        r"^\s*(thanks?( you)?[,!.]*\s*)?(bye|goodbye|good bye|see (you|ya)( later)?|cya|later|"
+        r"that's all|that is all|have a (good|nice) (one|day))[\s!.,:)]*$", re.I)),
+]
+
+
+@dataclass
+class IntentResult:
+    intent: str
+    confidence: float
+    source: str  # "rules", "model" or "llm"
+
+
+def find_course_codes(message: str) -> list[str]:
+    """Course codes mentioned in a message, formatted like the catalog ("STAT 303-1")."""
+    codes = []
+    for subject, number, part in COURSE_CODE.findall(message):
+        if subject.lower() in _NOT_SUBJECTS:
+            continue
+        code = f"{subject.upper()} {number}" + (f"-{part}" if part else "")
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+# Words that can precede a three-digit number without being a subject
+_NOT_SUBJECTS = {"at", "by", "in", "on", "to", "room", "and", "or", "the", "of", "is", "take", "add", "drop"}
+
+
+def extract_features(message: str, n_buckets: int = DEFAULT_BUCKETS) -> list[int]:
+    """Hashed bucket ids for the message's word unigrams and bigrams, plus a bias feature."""
+    text = COURSE_CODE.sub(
+        lambda m: m.group(0) if m.group(1).lower() in _NOT_SUBJECTS else " coursecode ",
+        message,
+    ).lower()
+    tokens = _TOKEN.findall(text)
+    grams = ["<bias>"] + tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return [zlib.crc32(g.encode("utf-8")) % n_buckets for g in grams]
+
+
+class IntentClassifier:
+    def __init__(self, weights: dict[int, list[float]], intents: list[str], n_buckets: int):
+        self.weights = weights
+        self.intents = intents
+        self.n_buckets = n_buckets
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> Optional["IntentClassifier"]:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        weights = {int(bucket): row for bucket, row in data["weights"].items()}
+        return cls(weights, data["intents"], data["n_buckets"])
+
+    def predict_proba(self, message: str) -> list[float]:
+        scores = [0.0] * len(self.intents)
+        for bucket in extract_features(message, self.n_buckets):
+            row = self.weights.get(bucket)
+            if row is not None:
+                for i, w in enumerate(row):
+                    scores[i] += w
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def classify(self, message: str) -> IntentResult:
+        for intent, pattern in _RULES:
+            if pattern.match(message):
+                return IntentResult(intent, 1.0, "rules")
+        probs = self.predict_proba(message)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return IntentResult(self.intents[best], round(probs[best], 4), "model")
+
+
+_classifier: Optional[IntentClassifier] = None
+
+
+def get_classifier() -> Optional[IntentClassifier]:
+    global _classifier
+    if _classifier is None:
+        _classifier = IntentClassifier.load()
+    return _classifier
+
+
+def classify_intent(message: str) -> Optional[IntentResult]:
+    """Classify locally. Returns None if no trained model is available."""
+    classifier = get_classifier()
+    if classifier is None:
+        return None
+    return classifier.classify(message)
@@ -0,0 +1,129 @@
+"""
+Deterministic replies for intents that do not need the LLM.
+
+Each handler returns a HandledReply, or None to let the message go to the
+LLM after all (e.g. "add a class" without a recognizable course code).
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+from ..database import engine
+from ..schemas.chat import ChatRequest
+from .catalog_store import get_course
+from .intent_classifier import find_course_codes
+from .prereq_graph import get_prereq_graph
+
+
+@dataclass
+class HandledReply:
+    response: str
+    # Client-side action to apply, e.g. {"type": "add_course", "course": "STAT 202-0"}
+    action: Optional[dict] = None
+
+
+def _same_course(a: str, b: str) -> bool:
+    """True if two codes name the same course, treating "STAT 303" as matching "STAT 303-1"."""
+    a, b = a.upper(), b.upper()
+    return a == b or a.startswith(b + "-") or b.startswith(a + "-")
+
+
+def _greeting(chat_request: ChatRequest) -> Optional[HandledReply]:
+    return HandledReply(
+        "Hi! I can recommend classes, explain course content and prerequisites, "
+        "check your major requirements, and help you build a schedule. What are you planning for?"
+    )
+
+
+def _goodbye(chat_request: ChatRequest) -> Optional[HandledReply]:
+    return HandledReply("Good luck with registration! Come back any time you want to revisit your schedule.")
+
+
+def _add_course(chat_request: ChatRequest) -> Optional[HandledReply]:
+    codes = find_course_codes(chat_request.message)
+    if len(codes) != 1:
+        return None
+    return HandledReply(f"Adding {codes[0]} to your schedule.", {"type": "add_course", "course": codes[0]})
+
+
+def _remove_course(chat_request: ChatRequest) -> Optional[HandledReply]:
+    codes = find_course_codes(chat_request.message)
+    if len(codes) != 1:
+        return None
+    code = codes[0]
+    if any(_same_course(code, locked) for locked in chat_request.locked_classes or []):
+        return HandledReply(
+            f"{code} is one of your locked classes, so I left it in your schedule. "
+            "Unlock it in your profile first if you want to drop it."
+        )
+    return HandledReply(f"Removing {code} from your schedule.", {"type": "remove_course", "course": code})
+
+
+def _format_section(section: dict) -> str:
+    meetings = ", ".join(f"{m['days']} {m['start']}-{m['end']}" for m in section["meetings"]) or "time TBA"
+    instructors = f" with {', '.join(section['instructors'])}" if section["instructors"] else ""
+    return f"section {section['section']} ({section['component']}) {meetings}{instructors}"
+
+
+def _class_times(chat_request: ChatRequest) -> Optional[HandledReply]:
+    codes = find_course_codes(chat_request.message)
+    if len(codes) != 1:
+        return None
+    action = {"type": "show_class_times", "course": codes[0]}
+    with engine.connect() as conn:
+        course = get_course(conn, codes[0])
+    if course is None or not course["sections"]:
+        return HandledReply(f"Meeting times for {codes[0]} are shown in the schedule builder.", action)
+    # Most recent term in the catalog
+    term = max(section["term"] for section in course["sections"])
+    sections = [section for section in course["sections"] if section["term"] == term]
+    return HandledReply(
+        f"{course['code']} ({course['title']}) meets as: " + "; ".join(map(_format_section, sections)) + ".",
+        action,
+    )
+
+
+def _prerequisite_check(chat_request: ChatRequest) -> Optional[HandledReply]:
+    codes = find_course_codes(chat_request.message)
+    if len(codes) != 1:
+        return None
+    graph = get_prereq_graph()
+    check = graph.check(codes[0], chat_request.classes_already_taken)
+    if check is None:
+        return None
+    if check.taken:
+        return HandledReply(f"You've already taken {check.code}.")
+    if check.can_take:
+        unlocks = graph.unlocks(check.code, chat_request.classes_already_taken)
+        reply = f"Yes, you have the prerequisites for {check.code}."
+        if unlocks:
+            reply += " Taking it would also let you take " + ", ".join(unlocks[:5]) + ("..." if len(unlocks) > 5 else "") + "."
+        return HandledReply(reply)
+    needed = "; ".join(" or ".join(group) for group in check.missing)
+    quarters = "quarter" if check.quarters_until == 1 else "quarters"
+    return HandledReply(
+        f"Not yet. {check.code} still needs: {needed}. "
+        f"That is at least {check.quarters_until} {quarters} of prerequisites."
+    )
+
+
+HANDLERS: dict[str, Callable[[ChatRequest], Optional[HandledReply]]] = {
+    "greeting": _greeting,
+    "goodbye": _goodbye,
+    "add_course": _add_course,
+    "remove_course": _remove_course,
+    "class_times": _class_times,
+    "prerequisite_check": _prerequisite_check,
+}
+
+# Handlers that query the database; async callers run these off the event loop
+BLOCKING_INTENTS = frozenset({"class_times", "prerequisite_check"})
+
+# Canned replies only for exact rule matches ("hi", "thanks, bye"): the model also scores short
+# or off-topic messages ("ok", "hi can you help me pick classes") as these, and those need the LLM
+RULES_ONLY_INTENTS = frozenset({"greeting", "goodbye"})
+
+
+def handle_intent(intent: str, chat_request: ChatRequest) -> Optional[HandledReply]:
+    handler = HANDLERS.get(intent)
+    if handler is None:
+        return None
+    return handler(chat_request)
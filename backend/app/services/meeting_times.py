@@ -0,0 +1,109 @@
+"""
+Meeting days and times: parsing paper.nu's formats, and packing meetings into
+weekly time bitmasks.
+
+A mask has 7 days x 288 five-minute slots; bit (day * SLOTS_PER_DAY + slot)
+is set when the section meets then, so two sections overlap iff their masks
+AND to non-zero.
+"""
+import re
+from functools import lru_cache
+from typing import Optional, Union
+
+DAY_CODES = ("Mo", "Tu", "We", "Th", "Fr", "Sa", "Su")
+ALL_DAYS = (1 << len(DAY_CODES)) - 1
+
+_DAY = re.compile("|".join(DAY_CODES))
+_TIME = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+def parse_days(days: str) -> int:
+    """ "MoWeFr" -> bitmask (Mo = 1 ... Su = 64)."""
+    mask = 0
+    position = 0
+    for match in _DAY.finditer(days):
+        if match.start() != position:
+            break
+        mask |= 1 << DAY_CODES.index(match.group())
+        position = match.end()
+    if position != len(days) or not mask:
+        raise ValueError(f"Invalid days {days!r}, expected e.g. 'MoWeFr'")
+    return mask
+
+
+def format_days(mask: int) -> str:
+    return "".join(code for i, code in enumerate(DAY_CODES) if mask >> i & 1)
+
+
+def parse_time(value: Union[str, dict]) -> int:
+    """ "13:30" or paper.nu's {"h": 13, "m": 30} -> minutes after midnight."""
+    if isinstance(value, dict):
+        hour, minute = value["h"], value["m"]
+    else:
+        match = _TIME.match(value.strip())
+        if not match:
+            raise ValueError(f"Invalid time {value!r}, expected HH:MM")
+        hour, minute = int(match.group(1)), int(match.group(2))
+    if not (0 <= hour <= 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time {value!r}")
+    return hour * 60 + minute
+
+
+def format_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+MASK_BYTES = (len(DAY_CODES) * SLOTS_PER_DAY + 7) // 8
+_DAY_SLOTS = (1 << SLOTS_PER_DAY) - 1
+
+
+def meeting_mask(days: int, start_minute: int, end_minute: int) -> int:
+    """Bitmask of the slots a meeting occupies. End is exclusive, so 10:50 and 10:50 do not clash."""
+    first = start_minute // SLOT_MINUTES
+    last = -(-end_minute // SLOT_MINUTES)  # round up
+    if last <= first:
+        return 0
+    day_bits = ((1 << (last - first)) - 1) << first
+    mask = 0
+    for day in range(len(DAY_CODES)):
+        if days >> day & 1:
+            mask |= day_bits << (day * SLOTS_PER_DAY)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def before_mask(minute: int) -> int:
+    """Slots earlier than `minute` on every day, e.g. to enforce an earliest class time."""
+    slots = minute // SLOT_MINUTES
+    day_bits = (1 << slots) - 1
+    mask = 0
+    for day in range(len(DAY_CODES)):
+        mask |= day_bits << (day * SLOTS_PER_DAY)
+    return mask
+
+
+def mask_to_bytes(mask: int) -> bytes:
+    return mask.to_bytes(MASK_BYTES, "little") if mask else b""
+
+
+def mask_from_bytes(data: Optional[bytes]) -> int:
+    return int.from_bytes(data, "little") if data else 0
+
+
+def describe_mask(mask: int) -> list[str]:
+    """Human-readable time ranges, e.g. ["Mo 10:00-10:50", "We 10:00-10:50"]."""
+    ranges = []
+    for day, code in enumerate(DAY_CODES):
+        bits = mask >> (day * SLOTS_PER_DAY) & _DAY_SLOTS
+        slot = 0
+        while bits:
+            skip = (bits & -bits).bit_length() - 1
+            bits >>= skip
+            slot += skip
+            run = (~bits & (bits + 1)).bit_length() - 1  # length of the run of ones
+            ranges.append(f"{code} {format_time(slot * SLOT_MINUTES)}-{format_time((slot + run) * SLOT_MINUTES)}")
+            bits >>= run
+            slot += run
+    return ranges
@@ -0,0 +1,351 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Counters, gauges and histograms live in this worker's memory; each uvicorn
+worker process reports its own (like /chat/stats). Recording is a dict
+lookup, a lock and an add, so instrumenting the hot paths costs a few
+microseconds per request. What is recorded:
+
+- HTTP: latency per method, route template and status, and requests in
+  flight (MetricsMiddleware);
+- database: latency per statement fingerprint (the SQL with literals and
+  IN-lists collapsed), hooked into every engine database.make_engine builds,
+  plus statements run on the raw sqlite3 connection (timed_statement);
+- LLM: latency per operation and outcome, time to first streamed token, and
+  prompt/completion tokens (openai_service).
+"""
+import abc
+import hashlib
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+FIRST_TOKEN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8)
+
+# Distinct statements fingerprinted and kept; beyond this they are fingerprinted on every run
+MAX_CACHED_STATEMENTS = 4096
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A new child holding one label combination's value(s)."""
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+            self._children[values] = child  # Also under the caller's own (e.g. int) values
+        return child
+
+    def _samples(self) -> Iterator[str]:
+        seen = set()
+        for values, child in list(self._children.items()):
+            if id(child) in seen:
+                continue
+            seen.add(id(child))
+            yield from self._child_samples(tuple(str(v) for v in values), child)
+
+    def _child_samples(self, values: tuple, child) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_number(child.value)}"
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS,
+                 registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _child_samples(self, values: tuple, child: _HistogramChild) -> Iterator[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound}"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_number(total)}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, values)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> None:
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+process_start_time = Gauge("process_start_time_seconds", "Start time of this worker process since the Unix epoch.")
+process_start_time.labels().set(time.time())
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies.",
+    ("method", "route", "status"), HTTP_BUCKETS,
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled.")
+_in_flight = http_requests_in_flight.labels()
+
+db_query_seconds = Histogram(
+    "db_query_duration_seconds", "Database statement latency by statement fingerprint.",
+    ("operation", "table", "fingerprint"), QUERY_BUCKETS,
+)
+db_query_errors = Counter("db_query_errors_total", "Database statements that raised.", ("operation", "table", "fingerprint"))
+db_statements = Gauge("db_statement_info", "SQL of each statement fingerprint (value is always 1).", ("fingerprint", "statement"))
+
+llm_request_seconds = Histogram(
+    "llm_request_duration_seconds", "LLM API call latency (streamed calls until the last chunk).",
+    ("operation", "outcome"), LLM_BUCKETS,
+)
+llm_first_token_seconds = Histogram(
+    "llm_time_to_first_token_seconds", "Time from a streamed LLM call to its first content token.",
+    ("operation",), FIRST_TOKEN_BUCKETS,
+)
+llm_tokens = Counter("llm_tokens_total", "Tokens the LLM API reported using.", ("operation", "kind"))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# HTTP
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering, unlike BaseHTTPMiddleware)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _in_flight.dec()
+            http_request_seconds.labels(scope["method"], self._route(scope), status).observe(elapsed)
+
+    def _route(self, scope) -> str:
+        # The router adds the matched endpoint to the (shared) scope; label by its path template
+        # so /schedule/1 and /schedule/2 are one series
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = "unknown"
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            self._route_paths[endpoint] = path
+        return path
+
+
+# Database
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_REPEATED_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SQL_SPACE = re.compile(r"\s+")
+_SQL_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE)\s+"?(\w+)', re.IGNORECASE)
+
+# SQL string -> (labels, latency histogram child)
+_statements: dict[str, tuple] = {}
+
+
+def fingerprint_statement(statement: str) -> tuple[str, str, str, str]:
+    """(operation, table, fingerprint, normalized SQL) with literals and parameter lists collapsed."""
+    normalized = _SQL_SPACE.sub(" ", _SQL_NUMBER.sub("?", _SQL_STRING.sub("?", statement))).strip()
+    normalized = _SQL_REPEATED_ROWS.sub("(?)", _SQL_PARAM_LIST.sub("(?)", normalized))
+    operation = normalized.split(" ", 1)[0].upper() if normalized else ""
+    table = _SQL_TABLE.search(normalized)
+    fingerprint = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    return operation, table.group(1).lower() if table else "", fingerprint, normalized
+
+
+def _statement(statement: str) -> tuple:
+    cached = _statements.get(statement)
+    if cached is None:
+        operation, table, fingerprint, normalized = fingerprint_statement(statement)
+        labels = (operation, table, fingerprint)
+        db_statements.labels(fingerprint, normalized[:300]).set(1)
+        cached = (labels, db_query_seconds.labels(*labels))
+        if len(_statements) < MAX_CACHED_STATEMENTS:
+            _statements[statement] = cached
+    return cached
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        _statement(statement)[1].observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    if exception_context.statement:
+        db_query_errors.labels(*_statement(exception_context.statement)[0]).inc()
+
+
+@contextmanager
+def timed_statement(statement: str) -> Iterator[None]:
+    """Time a statement run outside SQLAlchemy's hooks, into the same series as instrument_engine."""
+    labels, histogram = _statement(statement)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        db_query_errors.labels(*labels).inc()
+        raise
+    histogram.observe(time.perf_counter() - started)
+
+
+def instrument_engine(db: Engine) -> None:
+    """Time every statement `db` runs (sync engines; pass an AsyncEngine's sync_engine)."""
+    event.listen(db, "before_cursor_execute", _before_cursor_execute)
+    event.listen(db, "after_cursor_execute", _after_cursor_execute)
+    event.listen(db, "handle_error", _handle_error)
+
+
+# LLM
+
+@contextmanager
+def llm_call(operation: str) -> Iterator[None]:
+    """Time one LLM API call; an exception counts it as an error."""
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        llm_request_seconds.labels(operation, outcome).observe(time.perf_counter() - started)
+
+
+def record_llm_usage(operation: str, usage) -> None:
+    """Count tokens from an OpenAI usage object or dict (None when the API did not report it)."""
+    if usage is None:
+        return
+    if not isinstance(usage, dict):
+        usage = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+    llm_tokens.labels(operation, "prompt").inc(usage.get("prompt_tokens") or 0)
+    llm_tokens.labels(operation, "completion").inc(usage.get("completion_tokens") or 0)
@@ -1,45 +1,250 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from ..services.prompt_builder import build_user_context
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+import httpx
+from ..services.prompt_context import prompt_contexts
+from ..services.concurrency import ConcurrencyLimiter, OverloadedError, StageTimings
+from ..services.response_cache import CacheHit, response_cache
+from ..services.intent_classifier import INTENTS
+from ..services.metrics import llm_call, llm_first_token_seconds, llm_request_seconds, record_llm_usage
+from ..services.retrieval import format_snippets, get_index
 from ..schemas.chat import ChatRequest
+from ..config.settings import settings
 
-load_dotenv()
-client = OpenAI(api_key = os.getenv("OPENAI_API_KEY"))
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from .conversation_store import PromptHistory
 
-def get_chat_response(chat_request: ChatRequest) -> str:
-    user_context = build_user_context(chat_request)
-    full_prompt = (
-        "You are an academic assistant helping a student at Northwestern University pick their classes for a given quarter.\n"
-        "Here is some information about the student:\n\n"
-        f"{user_context}"
+# One client (and one HTTP connection pool) shared by every request in this worker.
+# Created on first use: importing the openai SDK takes longer than the rest of the app's imports.
+client: Optional["AsyncOpenAI"] = None
+
+def _create_client():
+    if settings.openai_fake:
+        from .fake_openai import FakeAsyncOpenAI
+        return FakeAsyncOpenAI(
+            first_token_ms = settings.openai_fake_first_token_ms,
+            token_ms = settings.openai_fake_token_ms,
+        )
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key = settings.openai_api_key,  # Read from the environment or backend/.env
+        base_url = settings.openai_base_url,
+        max_retries = settings.openai_max_retries,
+        http_client = httpx.AsyncClient(
+            limits = httpx.Limits(
+                max_connections = settings.openai_max_connections,
+                max_keepalive_connections = settings.openai_max_keepalive_connections,
+                keepalive_expiry = settings.openai_keepalive_expiry_seconds,
+            ),
+            timeout = httpx.Timeout(settings.openai_timeout_seconds, connect = settings.openai_connect_timeout_seconds),
+        ),
     )
+
+def get_client() -> "AsyncOpenAI":
+    global client
+    if client is None:
+        client = _create_client()
+    return client
+
+# Admission control for the chat path: requests beyond the queue depth are rejected up front
+chat_limiter = ConcurrencyLimiter(
+    name = "chat",
+    max_concurrency = settings.chat_max_concurrency,
+    max_queue = settings.chat_max_queue,
+    queue_timeout = settings.chat_queue_timeout_seconds,
+    retry_after = settings.chat_retry_after_seconds,
+)
+
+ERROR_MESSAGE = "Sorry, something went wrong with the AI. Please try again."
+
+async def close_client() -> None:
+    if client is not None:
+        await client.close()
+
+def build_messages(chat_request: ChatRequest, history: Optional["PromptHistory"] = None, excerpts: Optional[str] = None) -> list[dict]:
+    # Stable prefix first (instructions + student), then what changes from turn to turn
+    messages = [{"role": "system", "content": prompt_contexts.get(chat_request).system_prompt}]
+    if history is not None:
+        if history.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {history.summary}"})
+        messages.extend(history.turns)
+    # Retrieved for this message only, so after the history
+    if excerpts:
+        messages.append({"role": "system", "content": excerpts})
+    messages.append({"role": "user", "content": chat_request.message})
+    return messages
+
+async def retrieve_excerpts(chat_request: ChatRequest, timings: Optional[StageTimings] = None) -> Optional[str]:
+    """Catalog and requirement excerpts for the message, or None without a retrieval index."""
+    timings = timings or StageTimings()
+    with timings.stage("retrieval"):
+        index = get_index()
+        if index is None:
+            return None
+        try:
+            if index.embedder.local:
+                hits = index.search(chat_request.message, settings.retrieval_top_k)
+            else:
+                hits = await asyncio.to_thread(index.search, chat_request.message, settings.retrieval_top_k)
+        except Exception as e:
+            print("Retrieval error:", e)
+            return None
+    return format_snippets(hits) if hits else None
+
+def is_cacheable(history: Optional["PromptHistory"]) -> bool:
+    """Replies only depend on the message and profile (what the cache keys on) when there is no history."""
+    return history is None or history.empty
+
+def lookup_cached_response(chat_request: ChatRequest, timings: Optional[StageTimings] = None) -> Optional[CacheHit]:
+    if not settings.chat_cache_enabled:
+        return None
+    timings = timings or StageTimings()
+    with timings.stage("cache"):
+        return response_cache.get(chat_request.message, prompt_contexts.get(chat_request).text)
+
+def cache_response(chat_request: ChatRequest, reply: str) -> None:
+    if settings.chat_cache_enabled and reply and reply != ERROR_MESSAGE:
+        response_cache.put(chat_request.message, prompt_contexts.get(chat_request).text, reply)
+
+async def get_chat_response(chat_request: ChatRequest, timings: Optional[StageTimings] = None, history: Optional["PromptHistory"] = None) -> str:
+    timings = timings or StageTimings()
+    excerpts = await retrieve_excerpts(chat_request, timings)
+    with timings.stage("prompt"):
+        messages = build_messages(chat_request, history, excerpts)
     try:
-        response = client.chat.completions.create(
-            model = "gpt-4o",
-            messages = [
-                {"role": "system", "content": full_prompt},
-                {"role": "user", "content": chat_request.message}
-            ]
-        )
-        return response.choices[0].message.content
+        with timings.stage("upstream"), llm_call("chat"):
+            response = await get_client().chat.completions.create(
+                model = settings.openai_model,
+                messages = messages
+            )
+        record_llm_usage("chat", response.usage)
+        reply = response.choices[0].message.content
+        if response.choices[0].finish_reason == "stop" and is_cacheable(history):
+            cache_response(chat_request, reply)
+        return reply
     except Exception as e:
         print("OpenAI error:", e)
-        return "Sorry, something went wrong with the AI. Please try again."
-    
-def categorize_request(chat_request: ChatRequest) -> str:
+        return ERROR_MESSAGE
+
+async def open_chat_stream(chat_request: ChatRequest, timings: Optional[StageTimings] = None, history: Optional["PromptHistory"] = None):
+    """Start a streaming completion. The caller must close() the returned stream."""
+    timings = timings or StageTimings()
+    excerpts = await retrieve_excerpts(chat_request, timings)
+    with timings.stage("prompt"):
+        messages = build_messages(chat_request, history, excerpts)
+    started = time.perf_counter()
+    with timings.stage("upstream_connect"):
+        try:
+            return await get_client().chat.completions.create(
+                model = settings.openai_model,
+                messages = messages,
+                stream = True,
+                stream_options = {"include_usage": True},
+            )
+        except Exception:
+            llm_request_seconds.labels("chat_stream", "error").observe(time.perf_counter() - started)
+            raise
+
+async def iter_stream_events(stream, started: float, timings: Optional[StageTimings] = None) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Turn an OpenAI chunk stream into (event, data) pairs: one "token" event per
+    content delta, then a single "done" event with usage and timing metadata.
+    `started` is the time.perf_counter() value the request began at.
+    """
+    timings = timings or StageTimings()
+    stream_started = time.perf_counter()
+    # The call started when open_chat_stream connected
+    call_started = stream_started - timings.stages.get("upstream_connect", 0.0) / 1000
+    first_token_at = None
+    usage = None
+    finish_reason = None
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage.model_dump(exclude_none=True)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            if choice.delta.content:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    llm_first_token_seconds.labels("chat_stream").observe(first_token_at - call_started)
+                yield "token", {"content": choice.delta.content}
+    except (GeneratorExit, asyncio.CancelledError):
+        # The client went away and the stream was closed early
+        llm_request_seconds.labels("chat_stream", "cancelled").observe(time.perf_counter() - call_started)
+        raise
+    except Exception:
+        llm_request_seconds.labels("chat_stream", "error").observe(time.perf_counter() - call_started)
+        raise
+
+    finished = time.perf_counter()
+    llm_request_seconds.labels("chat_stream", "ok").observe(finished - call_started)
+    record_llm_usage("chat_stream", usage)
+    timings.record("upstream_stream", finished - stream_started)
+    yield "done", {
+        "finish_reason": finish_reason,
+        "usage": usage,
+        "timing": {
+            "time_to_first_token_ms": round((first_token_at - started) * 1000, 2) if first_token_at else None,
+            "total_ms": round((finished - started) * 1000, 2),
+            "stages_ms": timings.as_dict(),
+        },
+    }
+
+async def categorize_request(chat_request: ChatRequest) -> str:
+    """LLM fallback for messages the local intent classifier is unsure about."""
     prompt = (
-        "You are a helpful assistant. Your job is to classify the user's intent into one of the following categories: recommend_courses, course_description, major_requirements, prerequisite_check, schedule_conflict, add_course, remove_course, class_times, professor_info, distribution_requirements, gen_ai, greeting, goodbye. \n"
+        f"You are a helpful assistant. Your job is to classify the user's intent into one of the following categories: {', '.join(INTENTS)}. \n"
         "Respond with ONLY the category name."
     )
     try:
-        response = client.chat.completions.create(
-            model = "gpt4o",
-            messages = [
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": chat_request.message}
-            ]
-        )
+        with llm_call("intent"):
+            response = await get_client().chat.completions.create(
+                model = settings.openai_model,
+                messages = [
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": chat_request.message}
+                ],
+                max_tokens = 8,
+                temperature = 0,
+            )
+        record_llm_usage("intent", response.usage)
+        intent = response.choices[0].message.content.strip().strip(".").lower()
+        return intent if intent in INTENTS else "error"
+    except Exception as e:
+        print("OpenAI error:", e)
+        return "error"
+
+async def summarize_history(summary: str, turns: list[dict]) -> Optional[str]:
+    """Fold chat turns into a conversation's running summary (background work; None on failure)."""
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    if summary:
+        transcript = f"Summary so far: {summary}\n\nNew messages:\n{transcript}"
+    prompt = (
+        "Summarize this conversation between a Northwestern student and their course-planning assistant, "
+        "for the assistant's own reference later. Keep courses, programs, preferences, decisions and open questions; "
+        f"drop pleasantries. Reply with the summary only, in under {settings.chat_history_summary_max_tokens * 3 // 4} words."
+    )
+    try:
+        async with chat_limiter.slot():
+            with llm_call("summary"):
+                response = await get_client().chat.completions.create(
+                    model = settings.openai_model,
+                    messages = [
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": transcript}
+                    ],
+                    max_tokens = settings.chat_history_summary_max_tokens,
+                    temperature = 0,
+                )
+        record_llm_usage("summary", response.usage)
+        return response.choices[0].message.content
+    except OverloadedError:
+        return None  # Retried after the next turn
     except Exception as e:
         print("OpenAI error:", e)
-        return "error"
\ No newline at end of file
+        return None
@@ -0,0 +1,281 @@
+"""
+Prerequisite graph over the catalog (PrerequisiteDB rows).
+
+A course's prerequisites are groups: every group is needed, and any one code
+in a group satisfies it. Codes are interned to dense ids, each group is a
+bitmask, and the transitive closure is precomputed in topological order, so
+
+- "can I take X" is one AND per group against the transcript mask,
+- "what does Y unlock" is a stored bitset of courses downstream of Y,
+- "how many quarters until Z" walks only Z's ancestors.
+
+The graph is cached per process and rebuilt when the catalog changes. The
+reference artifact (see reference_artifact) stores a built graph with the
+catalog version it came from; while that version is current, workers map it
+instead of building, and read each course's bitsets from the mapped pages.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+from sqlalchemy import func
+from sqlmodel import Session, select
+from ..database import read_engine
+from ..models.db_models import CourseDB, PrerequisiteDB
+from .reference_artifact import ArtifactWriter, ReferenceArtifact, RowGroups, artifact_section
+from .requirements_engine import CourseInterner
+
+
+@dataclass
+class PrereqCheck:
+    code: str
+    can_take: bool
+    taken: bool
+    # Unsatisfied groups; any one course in a group satisfies it
+    missing: list[list[str]] = field(default_factory=list)
+    # Quarters of prerequisites still to take before this course (0 if it can be taken now)
+    quarters_until: Optional[int] = 0
+
+
+class PrereqGraph:
+    def __init__(self):
+        self.interner = CourseInterner()
+        # Lists when built, read-only views of the artifact when loaded from it
+        self.groups: Sequence[list[int]] = []  # per course: one bitmask per prerequisite group
+        self.direct: list[int] = []  # union of a course's groups (only needed while building)
+        self.unlocks_direct: Sequence[int] = []  # courses listing this one in a group
+        self.ancestors: Sequence[int] = []  # everything that may be needed before a course
+        self.descendants: Sequence[int] = []  # everything a course leads to
+        self.depth: Sequence[int] = []  # quarters of prerequisites with nothing taken
+        self.order: Sequence[int] = []  # topological order, prerequisites first
+        self.position: Sequence[int] = []  # index of each course in `order`
+        self.ignored_edges: list[tuple[str, str]] = []  # (course, prerequisite) edges that closed a cycle
+
+    def _id(self, code: str) -> int:
+        course_id = self.interner.intern(code)
+        while len(self.groups) <= course_id:
+            self.groups.append([])
+        return course_id
+
+    @classmethod
+    def build(cls, codes: Iterable[str], prerequisites: Iterable[tuple[str, int, str]]) -> "PrereqGraph":
+        """From catalog codes and (course, group index, prerequisite code) rows."""
+        graph = cls()
+        for code in codes:
+            graph._id(code)
+        grouped: dict[tuple[int, int], int] = {}
+        for code, group_index, prereq in prerequisites:
+            course, required = graph._id(code), graph._id(prereq)
+            if course != required:
+                grouped[course, group_index] = grouped.get((course, group_index), 0) | (1 << required)
+        for (course, _), mask in sorted(grouped.items()):
+            graph.groups[course].append(mask)
+        graph._close()
+        return graph
+
+    def write_artifact(self, writer: ArtifactWriter, catalog_version: list) -> None:
+        writer.source("prereq_graph", catalog_version)
+        writer.value("prereq_graph", {"codes": self.interner.codes, "ignored_edges": self.ignored_edges})
+        starts = [0]
+        for groups in self.groups:
+            starts.append(starts[-1] + len(groups))
+        writer.int32("prereq_graph.group_starts", starts)
+        writer.bitsets("prereq_graph.groups", [mask for groups in self.groups for mask in groups])
+        for name in ("depth", "order", "position"):
+            writer.int32(f"prereq_graph.{name}", getattr(self, name))
+        for name in ("unlocks_direct", "ancestors", "descendants"):
+            writer.bitsets(f"prereq_graph.{name}", getattr(self, name))
+
+    @classmethod
+    def from_artifact(cls, artifact: ReferenceArtifact) -> "PrereqGraph":
+        state = artifact.value("prereq_graph")
+        graph = cls()
+        graph.interner = CourseInterner.from_codes(state["codes"])
+        graph.ignored_edges = [tuple(edge) for edge in state["ignored_edges"]]
+        graph.groups = RowGroups(artifact.int32("prereq_graph.group_starts"), artifact.bitsets("prereq_graph.groups"))
+        for name in ("depth", "order", "position"):
+            setattr(graph, name, artifact.int32(f"prereq_graph.{name}"))
+        for name in ("unlocks_direct", "ancestors", "descendants"):
+            setattr(graph, name, artifact.bitsets(f"prereq_graph.{name}"))
+        return graph
+
+    def _close(self) -> None:
+        n = len(self.interner)
+        self.direct = [0] * n
+        for course, groups in enumerate(self.groups):
+            for mask in groups:
+                self.direct[course] |= mask
+        self._topological_order()
+        self.position = [0] * n
+        for index, course in enumerate(self.order):
+            self.position[course] = index
+
+        self.ancestors = [0] * n
+        self.depth = [0] * n
+        for course in self.order:
+            ancestors = 0
+            prereqs = self.direct[course]
+            while prereqs:
+                low = prereqs & -prereqs
+                prereqs ^= low
+                ancestors |= low | self.ancestors[low.bit_length() - 1]
+            self.ancestors[course] = ancestors
+            self.depth[course] = max(
+                (1 + min(self.depth[p] for p in set_bits(mask)) for mask in self.groups[course]), default=0
+            )
+
+        self.unlocks_direct = [0] * n
+        self.descendants = [0] * n
+        for course in range(n):
+            for prereq in set_bits(self.direct[course]):
+                self.unlocks_direct[prereq] |= 1 << course
+        for course in reversed(self.order):
+            for prereq in set_bits(self.direct[course]):
+                self.descendants[prereq] |= (1 << course) | self.descendants[course]
+
+    def _topological_order(self) -> None:
+        """Depth-first order; an edge back into the current path is dropped so the rest stays a DAG."""
+        n = len(self.interner)
+        state = [0] * n  # 0 new, 1 on the path, 2 done
+        for root in range(n):
+            if state[root]:
+                continue
+            stack = [(root, iter(set_bits(self.direct[root])))]
+            state[root] = 1
+            while stack:
+                course, prereqs = stack[-1]
+                for prereq in prereqs:
+                    if state[prereq] == 0:
+                        state[prereq] = 1
+                        stack.append((prereq, iter(set_bits(self.direct[prereq]))))
+                        break
+                    if state[prereq] == 1:
+                        self._drop_edge(course, prereq)
+                else:
+                    state[course] = 2
+                    self.order.append(course)
+                    stack.pop()
+
+    def _drop_edge(self, course: int, prereq: int) -> None:
+        bit = 1 << prereq
+        self.groups[course] = [mask & ~bit for mask in self.groups[course] if mask & ~bit]
+        self.direct[course] &= ~bit
+        self.ignored_edges.append((self.interner.codes[course], self.interner.codes[prereq]))
+
+    # Lookups
+
+    def encode(self, courses: Optional[Iterable[str]]) -> int:
+        """Bitmask of the catalog courses in a transcript; unknown codes are ignored."""
+        taken = 0
+        if isinstance(courses, str):  # UserProfile's placeholder text for "no info"
+            return taken
+        for code in courses or []:
+            course_id = self.interner.get(code)
+            if course_id is not None:
+                taken |= 1 << course_id
+        return taken
+
+    def decode(self, mask: int) -> list[str]:
+        return self.interner.decode(mask)
+
+    def __contains__(self, code: str) -> bool:
+        return self.interner.get(code) is not None
+
+    def satisfied(self, course: int, done: int) -> bool:
+        return all(mask & done for mask in self.groups[course])
+
+    def quarters_needed(self, course: int, done: int) -> int:
+        """Quarters of prerequisites before `course` can be taken, given completed courses."""
+        if not self.ancestors[course] & ~done:
+            return 0
+        need: dict[int, int] = {}  # quarters until a course is completed; 0 for completed ones
+        for ancestor in sorted(set_bits(self.ancestors[course] & ~done), key=self.position.__getitem__):
+            need[ancestor] = 1 + self._longest_group(ancestor, need)
+        return self._longest_group(course, need)
+
+    def _longest_group(self, course: int, need: dict[int, int]) -> int:
+        # Each group is met by its quickest alternative; the course waits for the slowest group
+        return max((min(need.get(p, 0) for p in set_bits(mask)) for mask in self.groups[course]), default=0)
+
+    def check(self, code: str, courses: Optional[Iterable[str]] = None) -> Optional[PrereqCheck]:
+        """Whether a student with `courses` can take `code`; None for codes not in the catalog."""
+        course = self.interner.get(code)
+        if course is None:
+            return None
+        done = self.encode(courses)
+        missing = [self.decode(mask) for mask in self.groups[course] if not mask & done]
+        return PrereqCheck(
+            code=self.interner.codes[course],
+            can_take=not missing,
+            taken=bool(done >> course & 1),
+            missing=missing,
+            quarters_until=self.quarters_needed(course, done) if missing else 0,
+        )
+
+    def unlocks(self, code: str, courses: Optional[Iterable[str]] = None, transitive: bool = False) -> list[str]:
+        """
+        Courses that list `code` as a prerequisite (or are downstream of it). With a
+        transcript, only those that taking `code` would make available right away.
+        """
+        course = self.interner.get(code)
+        if course is None:
+            return []
+        candidates = self.descendants[course] if transitive else self.unlocks_direct[course]
+        if courses is None:
+            return self.decode(candidates)
+        done = self.encode(courses) | (1 << course)
+        return [
+            self.interner.codes[c] for c in set_bits(candidates & ~done)
+            if self.satisfied(c, done) and not self.satisfied(c, done & ~(1 << course))
+        ]
+
+
+def set_bits(mask: int) -> list[int]:
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
+def load_prereq_graph(session: Session) -> PrereqGraph:
+    codes = session.exec(select(CourseDB.code)).all()
+    rows = session.exec(
+        select(CourseDB.code, PrerequisiteDB.group_index, PrerequisiteDB.prereq_code)
+        .join(CourseDB, CourseDB.id == PrerequisiteDB.course_id)
+    ).all()
+    return PrereqGraph.build(codes, rows)
+
+
+# How often the cached graph checks whether the catalog tables changed
+RECHECK_SECONDS = 30.0
+
+_graph: Optional[PrereqGraph] = None
+_graph_version: Optional[list] = None
+_graph_checked = 0.0
+_graph_lock = threading.Lock()
+
+
+def catalog_version(session: Session) -> list:
+    """Changes whenever the catalog tables do (JSON-serializable, for the artifact)."""
+    return [
+        list(session.exec(select(func.count(), func.max(CourseDB.id))).one()),
+        list(session.exec(select(func.count(), func.max(PrerequisiteDB.id), func.sum(PrerequisiteDB.course_id))).one()),
+    ]
+
+
+def get_prereq_graph() -> PrereqGraph:
+    """The cached graph, rebuilt if the catalog tables changed (e.g. a reload from another process)."""
+    global _graph, _graph_version, _graph_checked
+    if _graph is not None and time.monotonic() - _graph_checked < RECHECK_SECONDS:
+        return _graph
+    with _graph_lock:
+        with Session(read_engine) as session:
+            version = catalog_version(session)
+            if _graph is None or version != _graph_version:
+                artifact = artifact_section("prereq_graph", version)
+                graph = PrereqGraph.from_artifact(artifact) if artifact else load_prereq_graph(session)
+                _graph, _graph_version = graph, version
+        _graph_checked = time.monotonic()
+        return _graph
@@ -0,0 +1,173 @@
+"""
+Normalized copies of the profile list columns, for cohort queries.
+
+UserProfileDB keeps majors, minors, classes taken and the other lists as JSON
+columns, and those stay the source of truth for reading a profile, so
+UserProfile and the API are unchanged. Each element is also stored as a row
+of ProfileListItemDB, indexed on (field, value, netid). That turns "every
+Data Science major" or "everyone who has taken STAT 202" into an index range
+instead of a table scan that decodes every profile's JSON.
+
+Migration is dual-write / dual-read:
+
+- every profile write replaces the user's item rows in the same transaction
+  and marks the profile in ProfileListSyncDB (`sync_statements`);
+- scripts/backfill_profile_lists.py copies profiles written before this;
+- cohort queries read item rows for synced profiles and fall back to
+  decoding JSON for any profile not yet synced. Once nothing is left to
+  backfill the fallback is skipped (rechecked every RECHECK_SECONDS).
+
+Course codes are stored canonicalized ("stat 202" -> "STAT 202-0"), and
+query values are normalized the same way.
+"""
+import time
+from functools import lru_cache
+from typing import Iterable, Optional
+from sqlalchemy import delete, exists, insert, intersect, literal
+from sqlmodel import Session, select
+from ..models.db_models import ProfileListItemDB, ProfileListSyncDB, UserProfileDB
+from ..schemas.user import profile_list
+from .requirements_engine import canonical_course_code
+
+LIST_FIELDS = (
+    "majors",
+    "minors",
+    "classes_already_taken",
+    "vocational_interests",
+    "favorite_profs",
+    "disliked_profs",
+    "locked_classes",
+)
+COURSE_FIELDS = frozenset({"classes_already_taken", "locked_classes"})
+
+# How long a "backfill complete" answer is trusted before checking again
+RECHECK_SECONDS = 60.0
+
+
+# Course codes and program names repeat across profiles; the backfill normalizes each once
+@lru_cache(maxsize=65536)
+def normalize(field: str, value: str) -> str:
+    if field not in LIST_FIELDS:
+        raise ValueError(f"Unknown profile list field: {field}")
+    return canonical_course_code(value) if field in COURSE_FIELDS else " ".join(value.split())
+
+
+def item_rows(netid: str, profile) -> list[dict]:
+    """ProfileListItemDB rows for a profile: a UserProfileDB, or a dict of its list columns."""
+    lists = profile if isinstance(profile, dict) else {field: getattr(profile, field, None) for field in LIST_FIELDS}
+    return [
+        {"netid": netid, "field": field, "position": position, "value": normalize(field, value)}
+        for field in LIST_FIELDS
+        for position, value in enumerate(profile_list(lists.get(field)))
+        if isinstance(value, str) and value.strip()
+    ]
+
+
+def sync_statements(netid: str, profile) -> list:
+    """Statements that replace a profile's item rows; run them in the transaction that writes the profile."""
+    rows = item_rows(netid, profile)
+    statements = [
+        delete(ProfileListItemDB).where(ProfileListItemDB.netid == netid),
+        delete(ProfileListSyncDB).where(ProfileListSyncDB.netid == netid),
+        insert(ProfileListSyncDB).values(netid=netid, synced_at=time.time()),
+    ]
+    if rows:
+        statements.append(insert(ProfileListItemDB).values(rows))
+    return statements
+
+
+def sync_profile(session: Session, netid: str, profile) -> None:
+    for statement in sync_statements(netid, profile):
+        session.execute(statement)
+
+
+def _unsynced():
+    return ~exists().where(ProfileListSyncDB.netid == UserProfileDB.netid)
+
+
+_backfilled_at: Optional[float] = None
+
+
+def _needs_fallback(session: Session) -> bool:
+    global _backfilled_at
+    if _backfilled_at is not None and time.monotonic() - _backfilled_at < RECHECK_SECONDS:
+        return False
+    pending = session.exec(select(UserProfileDB.netid).where(_unsynced()).limit(1)).first() is not None
+    _backfilled_at = None if pending else time.monotonic()
+    return pending
+
+
+def cohort(session: Session, criteria: Iterable[tuple[str, str]], limit: Optional[int] = None) -> list[str]:
+    """
+    Netids of profiles matching every (field, value) criterion, e.g.
+    [("majors", "Data Science"), ("classes_already_taken", "STAT 202")].
+    """
+    wanted = [(field, normalize(field, value)) for field, value in criteria]
+    if not wanted:
+        raise ValueError("At least one criterion is required")
+    selects = [
+        select(ProfileListItemDB.netid).where(ProfileListItemDB.field == field, ProfileListItemDB.value == value)
+        for field, value in wanted
+    ]
+    # A transcript may list a course twice; INTERSECT already returns distinct netids
+    matching = (selects[0].distinct() if len(selects) == 1 else intersect(*selects)).subquery()
+    statement = select(matching.c.netid).order_by(matching.c.netid)
+
+    if not _needs_fallback(session):
+        return list(session.exec(statement.limit(limit)).all())
+    netids = set(session.exec(statement).all()) | set(_cohort_from_json(session, wanted))
+    return sorted(netids)[:limit]
+
+
+def _cohort_from_json(session: Session, wanted: list[tuple[str, str]]) -> list[str]:
+    """The old way, for profiles the backfill has not reached: decode each one's JSON."""
+    fields = sorted({field for field, _ in wanted})
+    statement = select(UserProfileDB.netid, *(getattr(UserProfileDB, field) for field in fields)).where(_unsynced())
+    matches = []
+    for netid, *lists in session.exec(statement):
+        values = {
+            field: {normalize(field, value) for value in profile_list(items) if isinstance(value, str)}
+            for field, items in zip(fields, lists)
+        }
+        if all(value in values[field] for field, value in wanted):
+            matches.append(netid)
+    return matches
+
+
+def backfill(session: Session, batch_size: int = 2000) -> int:
+    """Sync every profile not yet mirrored, committing per batch. Returns how many were synced."""
+    columns = [getattr(UserProfileDB, field) for field in LIST_FIELDS]
+    synced = 0
+    last = ""
+    while True:
+        # Claim the batch first: the insert takes the write lock, so a profile the app saves meanwhile
+        # is either synced already (and not claimed) or saved after this commit, replacing these rows.
+        # Walk netids in order so each batch starts where the last one ended instead of rescanning
+        pending = (
+            select(UserProfileDB.netid, literal(time.time()))
+            .where(UserProfileDB.netid > last, _unsynced())
+            .order_by(UserProfileDB.netid)
+            .limit(batch_size)
+        )
+        netids = sorted(session.execute(
+            insert(ProfileListSyncDB.__table__)
+            .from_select(["netid", "synced_at"], pending)
+            .returning(ProfileListSyncDB.__table__.c.netid)
+        ).scalars().all())
+        if not netids:
+            session.commit()
+            return synced
+        # Read the lists inside the same transaction, after the claim
+        batch = session.exec(select(UserProfileDB.netid, *columns).where(UserProfileDB.netid.in_(netids))).all()
+        rows = [
+            item
+            for netid, *lists in batch
+            for item in item_rows(netid, dict(zip(LIST_FIELDS, lists)))
+        ]
+        session.execute(delete(ProfileListItemDB).where(ProfileListItemDB.netid.in_(netids)))
+        # Core inserts on the tables: the ORM bulk path costs more than SQLite here
+        if rows:
+            session.execute(insert(ProfileListItemDB.__table__), rows)
+        session.commit()
+        synced += len(netids)
+        last = netids[-1]
@@ -1,4 +1,20 @@
 from ..schemas.chat import ChatRequest
+from .requirements_engine import get_engine, summarize_audits
+
+SYSTEM_INSTRUCTIONS = (
+    "You are an academic assistant helping a student at Northwestern University pick their classes for a given quarter.\n"
+    "Here is some information about the student:\n\n"
+)
+
+# ChatRequest fields the student context is built from
+CONTEXT_FIELDS = (
+    "majors",
+    "minors",
+    "schedule_preferences",
+    "self_description",
+    "locked_classes",
+    "classes_already_taken",
+)
 
 def build_user_context(chat_request: ChatRequest) -> str:
     parts = []
@@ -18,7 +34,17 @@ def build_user_context(chat_request: ChatRequest) -> str:
         locked_str = ', '.join(chat_request.locked_classes)
         parts.append(f"The student has indicated they do not want to remove these classes from their schedule: {locked_str}.")
 
+    programs = (chat_request.majors or []) + (chat_request.minors or [])
+    if programs:
+        audits = get_engine().audit(programs, chat_request.classes_already_taken)
+        if audits:
+            parts.append(f"Degree progress computed from their transcript: {summarize_audits(audits)}")
+
     if chat_request.self_description:
         parts.append(f"This is how the student describes themselves: {chat_request.self_description}")
 
-    return " ".join(parts)
\ No newline at end of file
+    return " ".join(parts)
+
+def build_system_prompt(user_context: str) -> str:
+    # Fixed instructions first, then the student: the prompt prefix stays identical across their requests
+    return SYSTEM_INSTRUCTIONS + user_context
@@ -0,0 +1,88 @@
+"""
+Per-user prompt context, built once and reused until its inputs change.
+
+The student context (programs, preferences, degree progress from the
+requirements engine, ...) is the costly part of a chat prompt, and the chat
+path needs it several times per request: for the response cache key and for
+the prompt itself. Each worker keeps the built context per netid, with the
+ChatRequest fields it was built from (the profile merged with any request
+overrides) and the reference data version (see response_cache.DataVersion).
+A request with the same fields and version reuses it. There is nothing to
+invalidate by hand: a profile edit changes the fields and a data update
+changes the version, so the next request rebuilds.
+
+`system_prompt` is the first message of every prompt: fixed instructions,
+then the student context, and nothing per request. Consecutive prompts for a
+student therefore share a byte-identical prefix (followed by the
+conversation summary, which changes every few turns), which is what the
+provider's prompt caching keys on.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from ..config.settings import settings
+from ..schemas.chat import ChatRequest
+from .prompt_builder import CONTEXT_FIELDS, build_system_prompt, build_user_context
+from .response_cache import DataVersion, context_fingerprint
+
+
+@dataclass(frozen=True)
+class PromptContext:
+    text: str  # The student context
+    system_prompt: str
+    version: str  # Fingerprint of the model and context
+
+
+@dataclass
+class _Entry:
+    inputs: tuple
+    data_version: str
+    context: PromptContext
+
+
+class PromptContextCache:
+    def __init__(self, max_entries: int, data_version: Optional[DataVersion] = None):
+        self.max_entries = max_entries
+        self.data_version = data_version or DataVersion()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.hits = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def get(self, chat_request: ChatRequest) -> PromptContext:
+        inputs = tuple(getattr(chat_request, name) for name in CONTEXT_FIELDS)
+        data_version = self.data_version.current()
+        entry = self._entries.get(chat_request.user_id)
+        if entry is not None and entry.inputs == inputs and entry.data_version == data_version:
+            self._entries.move_to_end(chat_request.user_id)
+            self.hits += 1
+            return entry.context
+
+        start = time.perf_counter()
+        text = build_user_context(chat_request)
+        context = PromptContext(text, build_system_prompt(text), context_fingerprint(text))
+        self.build_seconds += time.perf_counter() - start
+        self.builds += 1
+        self._entries[chat_request.user_id] = _Entry(inputs, data_version, context)
+        self._entries.move_to_end(chat_request.user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return context
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.builds
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "builds": self.builds,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "build_ms_total": round(self.build_seconds * 1000, 2),
+            "build_ms_avg": round(self.build_seconds * 1000 / self.builds, 3) if self.builds else 0.0,
+        }
+
+
+prompt_contexts = PromptContextCache(settings.chat_context_cache_max_entries)
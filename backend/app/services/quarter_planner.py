@@ -0,0 +1,98 @@
+"""
+Multi-quarter plans: order a student's remaining required courses so every
+course comes after its prerequisites, with at most `max_per_quarter` a quarter.
+
+Missing prerequisites of the targets are added first (per group, an
+alternative already in the plan if there is one, else the one with the
+shortest chain). Quarters are then filled greedily, longest remaining chain
+first, which keeps the critical path moving and so keeps the plan short.
+"""
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from .prereq_graph import PrereqGraph, set_bits
+from .requirements_engine import RequirementsEngine, canonical_course_code
+
+
+@dataclass
+class QuarterPlan:
+    quarters: list[list[str]] = field(default_factory=list)
+    # Prerequisites that were not requirements themselves but had to be added
+    added_prerequisites: list[str] = field(default_factory=list)
+    # Courses that did not fit within max_quarters
+    unscheduled: list[str] = field(default_factory=list)
+    # Requirement codes with no catalog entry; placed without prerequisite checks
+    not_in_catalog: list[str] = field(default_factory=list)
+
+
+def _close_prerequisites(graph: PrereqGraph, targets: int, done: int) -> int:
+    """Targets plus one alternative for every prerequisite group they still need."""
+    needed = targets
+    pending = set_bits(targets)
+    while pending:
+        course = pending.pop()
+        for mask in graph.groups[course]:
+            if mask & (done | needed):
+                continue
+            choice = min(set_bits(mask), key=lambda p: (graph.depth[p], graph.position[p]))
+            needed |= 1 << choice
+            pending.append(choice)
+    return needed
+
+
+def plan_quarters(
+    graph: PrereqGraph,
+    targets: Iterable[str],
+    taken: Optional[Iterable[str]] = None,
+    max_per_quarter: int = 4,
+    max_quarters: int = 12,
+) -> QuarterPlan:
+    plan = QuarterPlan()
+    done = graph.encode(taken)
+    target_mask = 0
+    for code in dict.fromkeys(canonical_course_code(code) for code in targets):
+        course = graph.interner.get(code)
+        if course is None:
+            plan.not_in_catalog.append(code)
+        elif not done >> course & 1:
+            target_mask |= 1 << course
+    needed = _close_prerequisites(graph, target_mask, done)
+    plan.added_prerequisites = graph.decode(needed & ~target_mask)
+
+    # Longest chain of needed courses each one leads to
+    height: dict[int, int] = {}
+    for course in sorted(set_bits(needed), key=graph.position.__getitem__, reverse=True):
+        height[course] = 1 + max((height[c] for c in set_bits(graph.unlocks_direct[course] & needed)), default=0)
+
+    remaining = needed
+    extra = list(plan.not_in_catalog)
+    while (remaining or extra) and len(plan.quarters) < max_quarters:
+        available = [c for c in set_bits(remaining) if graph.satisfied(c, done)]
+        available.sort(key=lambda c: (-height[c], graph.position[c]))
+        picked = available[:max_per_quarter]
+        quarter = [graph.interner.codes[c] for c in picked]
+        # Courses without catalog data fill any slots left over
+        while extra and len(quarter) < max_per_quarter:
+            quarter.append(extra.pop(0))
+        if not quarter:
+            break
+        for course in picked:
+            remaining &= ~(1 << course)
+            done |= 1 << course
+        plan.quarters.append(quarter)
+    plan.unscheduled = graph.decode(remaining) + extra
+    return plan
+
+
+def plan_for_programs(
+    graph: PrereqGraph,
+    requirements: RequirementsEngine,
+    programs: Iterable[str],
+    taken: Optional[Iterable[str]],
+    max_per_quarter: int = 4,
+    max_quarters: int = 12,
+) -> QuarterPlan:
+    """Plan the courses still missing from each program's audit (its smallest remaining set per group)."""
+    targets = []
+    for audit in requirements.audit(programs, taken):
+        targets.extend(audit.remaining_courses)
+    return plan_quarters(graph, targets, taken, max_per_quarter, max_quarters)
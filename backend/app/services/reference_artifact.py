@@ -0,0 +1,217 @@
+"""
+Precompiled reference data in one memory-mapped file (data/reference.bin).
+
+scripts/build_reference_artifact.py compiles the program requirement trees
+(data/program_requirements.json) and the catalog's prerequisite graph into
+one versioned binary file, so a new worker maps it instead of parsing and
+compiling them again. Loading reads a small header: integer arrays are
+views of the mapped pages, and bitset tables (the graph's closure, most of
+the bytes) are decoded one row at a time when a lookup reads them. The
+pages are shared by every worker on the machine.
+
+Each section records the fingerprint of the source it was built from (the
+file's SHA-256, or the catalog tables' version). A section whose source has
+changed since is ignored and that data is compiled from source as before,
+so a stale artifact makes startup slower, never answers wrong.
+
+Layout: MAGIC, format version and header length (two little-endian u32),
+the JSON header (sources, and per section: offset, length, kind), then the
+sections, each 8-byte aligned. Kinds:
+
+- value: a marshal'd Python value (lists, tuples, dicts, str, int);
+- int32: a little-endian int32 array;
+- bitsets: `count + 1` u64 end offsets, then each row's bytes (a
+  little-endian int, trailing zero bytes dropped).
+"""
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Optional, Sequence
+import orjson
+from ..config.settings import settings
+from .response_cache import DataVersion
+
+DEFAULT_PATH = Path(__file__).resolve().parents[2] / "data" / "reference.bin"
+MAGIC = b"CATLOGREF"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<II")
+_ALIGN = 8
+
+
+def file_digest(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % _ALIGN)
+
+
+class BitsetRows(Sequence[int]):
+    """Variable-length bitsets in a buffer, decoded to ints one row at a time."""
+
+    def __init__(self, buffer: memoryview, count: int):
+        self.ends = buffer[:8 * (count + 1)].cast("Q")
+        self.data = buffer[8 * (count + 1):]
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("bitset row out of range")
+        return int.from_bytes(self.data[self.ends[index]:self.ends[index + 1]], "little")
+
+
+class RowGroups(Sequence[list[int]]):
+    """Per row, a list of bitsets: row i owns bitsets[starts[i]:starts[i + 1]]."""
+
+    def __init__(self, starts: Sequence[int], bitsets: BitsetRows):
+        self.starts = starts
+        self.bitsets = bitsets
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.bitsets[self.starts[index]:self.starts[index + 1]]
+
+
+class ArtifactWriter:
+    def __init__(self):
+        self.sources: dict[str, Any] = {}
+        self._sections: list[tuple[str, str, bytes, dict]] = []
+
+    def source(self, name: str, fingerprint: Any) -> None:
+        """What section group `name` was built from (JSON-serializable)."""
+        self.sources[name] = fingerprint
+
+    def value(self, name: str, value: Any) -> None:
+        self._sections.append((name, "value", marshal.dumps(value), {}))
+
+    def int32(self, name: str, values: Iterable[int]) -> None:
+        values = list(values)
+        self._sections.append((name, "int32", struct.pack(f"<{len(values)}i", *values), {}))
+
+    def bitsets(self, name: str, masks: Iterable[int]) -> None:
+        rows = [mask.to_bytes((mask.bit_length() + 7) // 8, "little") for mask in masks]
+        ends = [0]
+        for row in rows:
+            ends.append(ends[-1] + len(row))
+        body = struct.pack(f"<{len(ends)}Q", *ends) + b"".join(rows)
+        self._sections.append((name, "bitsets", body, {"count": len(rows)}))
+
+    def write(self, path: Path) -> int:
+        """Write the artifact atomically (mapped readers keep the old file); returns its size."""
+        sections, offset = {}, 0
+        for name, kind, body, extra in self._sections:
+            sections[name] = {"offset": offset, "length": len(body), "kind": kind, **extra}
+            offset += len(body) + len(_padding(len(body)))
+        header = orjson.dumps({"built_at": time.time(), "sources": self.sources, "sections": sections})
+        header += b" " * (-(len(MAGIC) + _PREAMBLE.size + len(header)) % _ALIGN)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + _PREAMBLE.pack(FORMAT_VERSION, len(header)) + header)
+            for _, _, body, _ in self._sections:
+                f.write(body + _padding(len(body)))
+            size = f.tell()
+        os.replace(tmp, path)
+        return size
+
+
+class ReferenceArtifact:
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        view = memoryview(self._map)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a reference artifact")
+        version, header_length = _PREAMBLE.unpack_from(view, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format {version}, expected {FORMAT_VERSION}; rebuild it")
+        start = len(MAGIC) + _PREAMBLE.size
+        header = orjson.loads(view[start:start + header_length])
+        self.built_at: float = header["built_at"]
+        self.sources: dict[str, Any] = header["sources"]
+        self.sections: dict[str, dict] = header["sections"]
+        self._body = view[start + header_length:]
+
+    def matches(self, name: str, fingerprint: Any) -> bool:
+        return name in self.sources and self.sources[name] == fingerprint
+
+    def _section(self, name: str, kind: str) -> tuple[memoryview, dict]:
+        section = self.sections[name]
+        if section["kind"] != kind:
+            raise ValueError(f"Section {name} is {section['kind']}, not {kind}")
+        return self._body[section["offset"]:section["offset"] + section["length"]], section
+
+    def value(self, name: str) -> Any:
+        return marshal.loads(self._section(name, "value")[0])
+
+    def int32(self, name: str) -> Sequence[int]:
+        return self._section(name, "int32")[0].cast("i")
+
+    def bitsets(self, name: str) -> BitsetRows:
+        buffer, section = self._section(name, "bitsets")
+        return BitsetRows(buffer, section["count"])
+
+
+def artifact_path() -> Path:
+    return Path(settings.reference_artifact_path) if settings.reference_artifact_path else DEFAULT_PATH
+
+
+_artifact: Optional[ReferenceArtifact] = None
+_artifact_version: Optional[Hashable] = None
+_file_version: Optional[DataVersion] = None
+
+
+def get_artifact() -> Optional[ReferenceArtifact]:
+    """The mapped artifact, reopened after a rebuild. None if disabled, not built or unreadable."""
+    global _artifact, _artifact_version, _file_version
+    if not settings.reference_artifact_enabled:
+        return None
+    path = artifact_path()
+    if _file_version is None or _file_version.watched_files != [path]:
+        _file_version = DataVersion([path])
+    version = _file_version.current()
+    if version != _artifact_version:
+        _artifact_version = version
+        try:
+            _artifact = ReferenceArtifact(path)
+        except FileNotFoundError:
+            _artifact = None
+            print(f"No reference artifact at {path}; run `python -m scripts.build_reference_artifact` for faster startup")
+        except (OSError, ValueError) as e:
+            _artifact = None
+            print("Reference artifact unavailable:", e)
+    return _artifact
+
+
+def artifact_section(name: str, fingerprint: Any) -> Optional[ReferenceArtifact]:
+    """The artifact if its `name` sections were built from `fingerprint`, else None."""
+    artifact = get_artifact()
+    if artifact is None:
+        return None
+    if not artifact.matches(name, fingerprint):
+        print(f"Reference artifact's {name} is out of date; compiling from source "
+              "(rebuild with `python -m scripts.build_reference_artifact`)")
+        return None
+    return artifact
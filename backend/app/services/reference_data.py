@@ -0,0 +1,90 @@
+"""
+Reference data at content-hashed URLs: program requirements and the course
+catalog.
+
+GET /reference lists each document's current URL, which embeds a hash of
+its bytes, so the documents themselves can be cached for a year: new data
+gets a new URL. Each worker builds a document once per version of its
+source, rechecked at most every few seconds: program requirements when
+data/program_requirements.json changes on disk, the catalog after each
+scripts/load_catalog.py run (a new CatalogLoadDB row).
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+from sqlmodel import select
+from ..database import read_engine
+from ..models.db_models import CourseDB, TermDB
+from .requirements_engine import REQUIREMENTS_PATH
+from .response_cache import DataVersion, catalog_version
+from .serialization import dump_json, row_dicts
+
+CHECK_INTERVAL_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class ReferenceDocument:
+    name: str
+    body: bytes
+    digest: str
+
+    @property
+    def url(self) -> str:
+        return f"/reference/{self.name}.{self.digest}.json"
+
+
+class ReferenceSource:
+    """One document, rebuilt when `version()` changes (checked at most every `check_interval_seconds`)."""
+
+    def __init__(self, name: str, version: Callable[[], Hashable], build: Callable[[], bytes],
+                 check_interval_seconds: float = CHECK_INTERVAL_SECONDS):
+        self.name = name
+        self.version = version
+        self.build = build
+        self.check_interval_seconds = check_interval_seconds
+        self._document: Optional[ReferenceDocument] = None
+        self._version: Hashable = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> ReferenceDocument:
+        if self._document is not None and time.monotonic() < self._next_check:
+            return self._document
+        with self._lock:
+            if self._document is None or time.monotonic() >= self._next_check:
+                version = self.version()
+                if self._document is None or version != self._version:
+                    body = self.build()
+                    self._document = ReferenceDocument(self.name, body, hashlib.sha256(body).hexdigest()[:16])
+                    self._version = version
+                self._next_check = time.monotonic() + self.check_interval_seconds
+        return self._document
+
+
+_requirements_version = DataVersion([REQUIREMENTS_PATH], CHECK_INTERVAL_SECONDS)
+
+
+def _program_requirements() -> bytes:
+    try:
+        return REQUIREMENTS_PATH.read_bytes()
+    except FileNotFoundError:
+        return b"{}"
+
+
+def _catalog() -> bytes:
+    with read_engine.connect() as conn:
+        terms = conn.execute(select(TermDB.term, TermDB.name).order_by(TermDB.term))
+        courses = conn.execute(
+            select(CourseDB.code, CourseDB.subject, CourseDB.number, CourseDB.title, CourseDB.units, CourseDB.prereq_text)
+            .order_by(CourseDB.code)
+        )
+        # Descriptions stay out (most of the bytes); GET /courses/{code} has them
+        return dump_json({"terms": row_dicts(terms.keys(), terms), "courses": row_dicts(courses.keys(), courses)})
+
+
+reference_sources = {
+    "programs": ReferenceSource("programs", _requirements_version.current, _program_requirements),
+    "catalog": ReferenceSource("catalog", catalog_version, _catalog),
+}
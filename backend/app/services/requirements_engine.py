@@ -0,0 +1,374 @@
+"""
+Degree-requirement evaluation over data/program_requirements.json.
+
+Each program's AND / OR / ANYnOF / COURSE / CREDIT tree is compiled once into
+a flat, post-ordered list of threshold nodes: a node is satisfied when at
+least `k` of its inputs are (AND: k = all, OR: k = 1, ANYnOF: k = n). Course
+and credit leaves are interned to integer ids, so each node keeps its leaf
+inputs as one bitmask and a transcript is a bitmask too; counting satisfied
+leaves is a single `(mask & taken).bit_count()`.
+
+The compiled engine is also stored in the reference artifact (see
+reference_artifact), which workers load instead of recompiling while it
+matches the JSON file.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+from .reference_artifact import ArtifactWriter, ReferenceArtifact, artifact_section, file_digest
+
+REQUIREMENTS_PATH = Path(__file__).resolve().parents[2] / "data" / "program_requirements.json"
+
+_CODE = re.compile(r"^([A-Z][A-Z_]*)\s*(\d{3})(?:-(\d+))?$")
+_ANY_OF = re.compile(r"^ANY(\d+)OF$")
+
+
+def canonical_course_code(code: str) -> str:
+    """Normalize "stat 202" / "STAT 202-0" to the catalog form "STAT 202-0"; other strings are upper-cased."""
+    text = " ".join(code.upper().split())
+    match = _CODE.match(text)
+    if not match:
+        return text
+    subject, number, part = match.groups()
+    return f"{subject} {number}-{part or 0}"
+
+
+class CourseInterner:
+    """Bidirectional mapping between course/credit codes and dense integer ids."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.codes: list[str] = []
+        self.is_credit: list[bool] = []
+        self._raw_ids: dict[str, Optional[int]] = {}  # un-normalized spelling -> id (or None)
+
+    @classmethod
+    def from_codes(cls, codes: list[str], is_credit: Optional[list[bool]] = None) -> "CourseInterner":
+        """An interner over already-canonical codes, ids in list order."""
+        interner = cls()
+        interner.codes = list(codes)
+        interner.ids = {code: course_id for course_id, code in enumerate(interner.codes)}
+        interner.is_credit = list(is_credit) if is_credit is not None else [False] * len(interner.codes)
+        return interner
+
+    def intern(self, code: str, credit: bool = False) -> int:
+        key = canonical_course_code(code)
+        course_id = self.ids.get(key)
+        if course_id is None:
+            course_id = self.ids[key] = len(self.codes)
+            self.codes.append(key)
+            self.is_credit.append(credit)
+            self._raw_ids.clear()
+        return course_id
+
+    def get(self, code: str) -> Optional[int]:
+        try:
+            return self._raw_ids[code]
+        except KeyError:
+            course_id = self._raw_ids[code] = self.ids.get(canonical_course_code(code))
+            return course_id
+
+    def decode(self, mask: int) -> list[str]:
+        codes = []
+        while mask:
+            low = mask & -mask
+            codes.append(self.codes[low.bit_length() - 1])
+            mask ^= low
+        return codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+@dataclass
+class GroupResult:
+    name: str
+    satisfied: bool
+    completed: list[str]
+    # A smallest set of courses that would satisfy the group (empty when satisfied)
+    remaining: list[str]
+    # True if the group can only be completed with credits (e.g. AP), not courses
+    needs_credit: bool = False
+
+
+@dataclass
+class ProgramAudit:
+    program_id: int
+    program_name: str
+    program_type: str
+    satisfied: bool
+    groups: list[GroupResult] = field(default_factory=list)
+
+    @property
+    def remaining_courses(self) -> list[str]:
+        seen = []
+        for group in self.groups:
+            for code in group.remaining:
+                if code not in seen:
+                    seen.append(code)
+        return seen
+
+
+class CompiledProgram:
+    """A requirement tree flattened into post-ordered threshold nodes."""
+
+    # Everything the artifact stores, in order
+    FIELDS = ("program_id", "name", "program_type", "note", "leaf_masks", "course_masks",
+              "children", "thresholds", "subtree_masks", "groups", "root")
+
+    def __init__(self, program_id: int, name: str, program_type: str, note: Optional[str]):
+        self.program_id = program_id
+        self.name = name
+        self.program_type = program_type
+        self.note = note
+        self.leaf_masks: list[int] = []
+        self.course_masks: list[int] = []  # leaf inputs minus credits: what can be suggested
+        self.children: list[tuple[int, ...]] = []
+        self.thresholds: list[int] = []
+        self.subtree_masks: list[int] = []
+        self.groups: list[tuple[str, int]] = []  # (group name, node index)
+        self.root = -1
+
+    def _add_node(self, leaves: list[int], children: list[int], k: int, credits: frozenset[int] = frozenset()) -> int:
+        leaf_mask = 0
+        for leaf in leaves:
+            leaf_mask |= 1 << leaf
+        subtree = leaf_mask
+        for child in children:
+            subtree |= self.subtree_masks[child]
+        # Duplicate leaves collapse into one bit; never require more inputs than exist
+        k = min(k, leaf_mask.bit_count() + len(children))
+        self.leaf_masks.append(leaf_mask)
+        self.course_masks.append(leaf_mask & ~sum(1 << leaf for leaf in credits))
+        self.children.append(tuple(children))
+        self.thresholds.append(k)
+        self.subtree_masks.append(subtree)
+        return len(self.thresholds) - 1
+
+    def node_states(self, taken: int) -> list[bool]:
+        satisfied = []
+        for leaf_mask, children, k in zip(self.leaf_masks, self.children, self.thresholds):
+            count = (leaf_mask & taken).bit_count()
+            for child in children:
+                count += satisfied[child]
+            satisfied.append(count >= k)
+        return satisfied
+
+    def is_satisfied(self, taken: int) -> bool:
+        return self.node_states(taken)[self.root]
+
+    def unsatisfied_groups(self, taken: int) -> list[str]:
+        states = self.node_states(taken)
+        return [name for name, node in self.groups if not states[node]]
+
+
+class RequirementsEngine:
+    def __init__(self):
+        self.interner = CourseInterner()
+        self.programs: dict[str, CompiledProgram] = {}
+
+    # Loading / compilation
+
+    @classmethod
+    def load(cls, path: Path = REQUIREMENTS_PATH) -> "RequirementsEngine":
+        with open(path) as f:
+            data = json.load(f)
+        engine = cls()
+        for program in data:
+            engine.add_program(program)
+        return engine
+
+    def write_artifact(self, writer: ArtifactWriter, path: Path = REQUIREMENTS_PATH) -> None:
+        writer.source("requirements", file_digest(path))
+        writer.value("requirements", {
+            "codes": self.interner.codes,
+            "is_credit": self.interner.is_credit,
+            "programs": [tuple(getattr(program, name) for name in CompiledProgram.FIELDS)
+                         for program in self.programs.values()],
+        })
+
+    @classmethod
+    def from_artifact(cls, artifact: ReferenceArtifact) -> "RequirementsEngine":
+        state = artifact.value("requirements")
+        engine = cls()
+        engine.interner = CourseInterner.from_codes(state["codes"], state["is_credit"])
+        for values in state["programs"]:
+            program = CompiledProgram(*values[:4])
+            program.__dict__.update(zip(CompiledProgram.FIELDS, values))
+            engine.programs[program.name.lower()] = program
+        return engine
+
+    def add_program(self, program: dict) -> CompiledProgram:
+        compiled = CompiledProgram(
+            program["program_id"], program["program_name"], program["program_type"], program.get("note")
+        )
+        root = program["requirements"]
+        top_level = self._flatten(root["value"]) if root["type"] == "AND" else [root]
+        group_nodes = []
+        for position, node in enumerate(top_level, start=1):
+            index = self._compile(compiled, node)
+            compiled.groups.append((self._group_name(node, position), index))
+            group_nodes.append(index)
+        compiled.root = compiled._add_node([], group_nodes, len(group_nodes))
+        self.programs[compiled.name.lower()] = compiled
+        return compiled
+
+    @staticmethod
+    def _flatten(values: list) -> list[dict]:
+        # Some option lists are wrapped in an extra JSON array; splice them in
+        flat = []
+        for value in values:
+            if isinstance(value, list):
+                flat.extend(RequirementsEngine._flatten(value))
+            else:
+                flat.append(value)
+        return flat
+
+    def _compile(self, compiled: CompiledProgram, node: dict) -> int:
+        node_type = node["type"]
+        if node_type in ("COURSE", "CREDIT"):
+            leaf = self.interner.intern(node["value"], credit=node_type == "CREDIT")
+            return compiled._add_node([leaf], [], 1, frozenset([leaf]) if node_type == "CREDIT" else frozenset())
+
+        values = self._flatten(node["value"])
+        leaves, children, credits = [], [], set()
+        for child in values:
+            if child["type"] in ("COURSE", "CREDIT"):
+                leaf = self.interner.intern(child["value"], credit=child["type"] == "CREDIT")
+                leaves.append(leaf)
+                if child["type"] == "CREDIT":
+                    credits.add(leaf)
+            else:
+                children.append(self._compile(compiled, child))
+
+        if node_type == "AND":
+            k = len(set(leaves)) + len(children)
+        elif node_type == "OR":
+            k = 1
+        else:
+            match = _ANY_OF.match(node_type)
+            if not match:
+                raise ValueError(f"Unknown requirement type {node_type!r} in {compiled.name}")
+            k = int(match.group(1))
+        return compiled._add_node(leaves, children, k, frozenset(credits))
+
+    def _group_name(self, node: dict, position: int) -> str:
+        if node.get("group_name"):
+            return node["group_name"]
+        if node["type"] in ("COURSE", "CREDIT"):
+            return canonical_course_code(node["value"])
+        options = [
+            canonical_course_code(child["value"])
+            for child in self._flatten(node["value"])
+            if child["type"] in ("COURSE", "CREDIT")
+        ]
+        if node["type"] == "OR" and options:
+            return "One of " + ", ".join(options[:4]) + (", ..." if len(options) > 4 else "")
+        return f"Requirement {position}"
+
+    # Evaluation
+
+    def get_program(self, name: str) -> Optional[CompiledProgram]:
+        return self.programs.get(name.strip().lower())
+
+    def encode_transcript(self, courses: Optional[Iterable[str]]) -> int:
+        """Bitmask of the courses/credits a student has; codes no program mentions are ignored."""
+        taken = 0
+        if isinstance(courses, str):  # UserProfile's placeholder text for "no info"
+            return taken
+        for code in courses or []:
+            course_id = self.interner.get(code)
+            if course_id is not None:
+                taken |= 1 << course_id
+        return taken
+
+    def evaluate(self, program: CompiledProgram, taken: int) -> ProgramAudit:
+        states = program.node_states(taken)
+        plans = self._remaining_plans(program, taken, states)
+        groups = []
+        for name, node in program.groups:
+            plan = plans[node]
+            groups.append(GroupResult(
+                name=name,
+                satisfied=states[node],
+                completed=self.interner.decode(program.subtree_masks[node] & taken),
+                remaining=self.interner.decode(plan) if plan > 0 else [],
+                needs_credit=plan < 0,
+            ))
+        return ProgramAudit(program.program_id, program.name, program.program_type, states[program.root], groups)
+
+    def audit(self, program_names: Iterable[str], courses: Optional[Iterable[str]]) -> list[ProgramAudit]:
+        """Evaluate a student's transcript against each named program that has requirement data."""
+        taken = self.encode_transcript(courses)
+        audits = []
+        for name in program_names or []:
+            program = self.get_program(name)
+            if program is not None:
+                audits.append(self.evaluate(program, taken))
+        return audits
+
+    def _remaining_plans(self, program: CompiledProgram, taken: int, states: list[bool]) -> list[int]:
+        """
+        For every node, a bitmask of untaken courses that would satisfy it, or -1
+        if only credits can. Picks untaken course leaves first, then the smallest
+        plans of unsatisfied children; this greedy choice is minimal unless sibling
+        subtrees overlap in ways that make a larger child plan cheaper overall.
+        """
+        plans: list[int] = []
+        for i, (course_mask, children, k) in enumerate(zip(program.course_masks, program.children, program.thresholds)):
+            if states[i]:
+                plans.append(0)
+                continue
+            missing = k - (program.leaf_masks[i] & taken).bit_count() - sum(states[c] for c in children)
+            plan = 0
+            available = course_mask & ~taken
+            while missing and available:
+                lowest = available & -available
+                plan |= lowest
+                available ^= lowest
+                missing -= 1
+            if missing:
+                child_plans = sorted(
+                    (plans[c] for c in children if not states[c] and plans[c] >= 0), key=int.bit_count
+                )
+                if len(child_plans) < missing:
+                    plans.append(-1)
+                    continue
+                for child_plan in child_plans[:missing]:
+                    plan |= child_plan
+            plans.append(plan)
+        return plans
+
+
+def summarize_audits(audits: list[ProgramAudit], max_courses: int = 6) -> str:
+    """Short plain-text progress summary suitable for the chat prompt."""
+    lines = []
+    for audit in audits:
+        done = sum(group.satisfied for group in audit.groups)
+        line = f"{audit.program_name} {audit.program_type}: {done}/{len(audit.groups)} requirement groups complete."
+        missing = []
+        for group in audit.groups:
+            if group.satisfied:
+                continue
+            if group.needs_credit:
+                missing.append(f"{group.name} (needs credit)")
+            else:
+                shown = ", ".join(group.remaining[:max_courses]) + (", ..." if len(group.remaining) > max_courses else "")
+                missing.append(f"{group.name}: {shown}")
+        if missing:
+            line += " Still needed: " + "; ".join(missing) + "."
+        lines.append(line)
+    return " ".join(lines)
+
+
+_engine: Optional[RequirementsEngine] = None
+
+
+def get_engine() -> RequirementsEngine:
+    global _engine
+    if _engine is None:
+        artifact = artifact_section("requirements", file_digest(REQUIREMENTS_PATH))
+        _engine = RequirementsEngine.from_artifact(artifact) if artifact else RequirementsEngine.load()
+    return _engine
@@ -0,0 +1,289 @@
+"""
+In-process cache of chat replies.
+
+Entries are keyed by the normalized message plus a fingerprint of the student
+context, so students with different profiles never share answers. Lookups try
+an exact match first and, if enabled, fall back to TF-IDF cosine similarity
+against entries cached for the same context. The whole cache is dropped when
+the reference data the answers depend on changes: the files on disk, or the
+course catalog tables after a scripts/load_catalog.py run.
+"""
+import hashlib
+import math
+import re
+import sys
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Hashable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from ..config.settings import settings
+from ..database import read_engine
+from ..models.db_models import CatalogLoadDB
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+SCRAPERS_DIR = Path(__file__).resolve().parents[1] / "scrapers"
+
+# Reference data the model's answers are grounded in; a change invalidates the cache
+WATCHED_FILES = [
+    DATA_DIR / "program_requirements.json",
+    SCRAPERS_DIR / "programs.db",
+    DATA_DIR / "retrieval" / "manifest.json",  # Rewritten last by each index build
+]
+
+
+def catalog_version() -> Optional[int]:
+    """Id of the latest catalog load (each scripts/load_catalog.py run adds one)."""
+    try:
+        with read_engine.connect() as conn:
+            return conn.execute(select(func.max(CatalogLoadDB.id))).scalar()
+    except SQLAlchemyError:  # e.g. a database created before catalogloaddb existed: no catalog yet
+        return None
+
+
+# Reference data in the database, as versions that change with it
+WATCHED_SOURCES: list[Callable[[], Hashable]] = [catalog_version]
+
+_PUNCTUATION = re.compile(r"[^\w\s-]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation (keeping hyphens in codes like 303-1) and collapse whitespace."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", message.lower())).strip()
+
+
+def context_fingerprint(user_context: str) -> str:
+    return hashlib.sha256(f"{settings.openai_model}\0{user_context}".encode("utf-8")).hexdigest()[:32]
+
+
+class DataVersion:
+    """
+    Fingerprint of reference data files (mtime and size) and `sources` (callables
+    returning a version), rechecked at most every `check_interval_seconds` and
+    first computed on the first call. With no arguments it covers WATCHED_FILES
+    and WATCHED_SOURCES.
+    """
+
+    def __init__(
+        self,
+        watched_files: Optional[list[Path]] = None,
+        check_interval_seconds: float = 5.0,
+        sources: Optional[list[Callable[[], Hashable]]] = None,
+    ):
+        if sources is None:
+            sources = WATCHED_SOURCES if watched_files is None else []
+        self.watched_files = watched_files if watched_files is not None else WATCHED_FILES
+        self.sources = sources
+        self.check_interval_seconds = check_interval_seconds
+        self._version = ""
+        self._next_check = 0.0  # Not at construction: module-level instances would query the database on import
+
+    def current(self) -> str:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval_seconds
+            self._version = self._compute()
+        return self._version
+
+    def _compute(self) -> str:
+        parts = []
+        for path in self.watched_files:
+            try:
+                stat = path.stat()
+                parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                parts.append(f"{path}:missing")
+        parts.extend(repr(source()) for source in self.sources)
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _terms(normalized: str) -> Counter:
+    words = normalized.split()
+    return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+@dataclass
+class CacheEntry:
+    key: tuple[str, str]
+    response: str
+    expires_at: float
+    size: int
+    terms: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class CacheHit:
+    response: str
+    kind: str  # "exact" or "similar"
+    score: float = 1.0
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        max_bytes: int,
+        similarity_enabled: bool = False,
+        similarity_threshold: float = 0.9,
+        watched_files: Optional[list[Path]] = None,
+        check_interval_seconds: float = 5.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.similarity_enabled = similarity_enabled
+        self.similarity_threshold = similarity_threshold
+        self.data_version = DataVersion(watched_files, check_interval_seconds)
+
+        self._entries: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        # Similarity index, partitioned by context fingerprint
+        self._by_context: dict[str, set[tuple[str, str]]] = {}
+        self._doc_freq: Counter = Counter()
+        self._bytes = 0
+        self._data_version: Optional[str] = None
+
+        self.hits_exact = 0
+        self.hits_similar = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # Public API
+
+    def get(self, message: str, user_context: str) -> Optional[CacheHit]:
+        self._check_data_version()
+        normalized = normalize_message(message)
+        fingerprint = context_fingerprint(user_context)
+        now = time.monotonic()
+
+        entry = self._entries.get((fingerprint, normalized))
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(entry.key)
+                self.hits_exact += 1
+                return CacheHit(entry.response, "exact")
+            self._remove(entry.key)
+            self.expirations += 1
+
+        if self.similarity_enabled:
+            hit = self._most_similar(fingerprint, normalized, now)
+            if hit is not None:
+                self.hits_similar += 1
+                return hit
+
+        self.misses += 1
+        return None
+
+    def put(self, message: str, user_context: str, response: str) -> None:
+        normalized = normalize_message(message)
+        key = (context_fingerprint(user_context), normalized)
+        if key in self._entries:
+            self._remove(key)
+
+        size = sys.getsizeof(normalized) + sys.getsizeof(response) + 256  # rough per-entry overhead
+        if size > self.max_bytes:
+            return
+        entry = CacheEntry(key, response, time.monotonic() + self.ttl_seconds, size)
+        if self.similarity_enabled:
+            entry.terms = _terms(normalized)
+            self._doc_freq.update(entry.terms.keys())
+            self._by_context.setdefault(key[0], set()).add(key)
+
+        self._entries[key] = entry
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_context.clear()
+        self._doc_freq.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits_exact + self.hits_similar + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits_exact": self.hits_exact,
+            "hits_similar": self.hits_similar,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_exact + self.hits_similar) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    # Internals
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if entry.terms:
+            for term in entry.terms:
+                self._doc_freq[term] -= 1
+                if self._doc_freq[term] <= 0:
+                    del self._doc_freq[term]
+            partition = self._by_context.get(key[0])
+            if partition is not None:
+                partition.discard(key)
+                if not partition:
+                    del self._by_context[key[0]]
+
+    def _most_similar(self, fingerprint: str, normalized: str, now: float) -> Optional[CacheHit]:
+        candidates = self._by_context.get(fingerprint)
+        if not candidates:
+            return None
+        query = self._weights(_terms(normalized))
+        query_norm = math.sqrt(sum(w * w for w in query.values()))
+        if not query_norm:
+            return None
+
+        best, best_score = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                continue
+            weights = self._weights(entry.terms)
+            dot = sum(w * weights.get(term, 0.0) for term, w in query.items())
+            if not dot:
+                continue
+            score = dot / (query_norm * math.sqrt(sum(w * w for w in weights.values())))
+            if score > best_score:
+                best, best_score = entry, score
+
+        if best is None or best_score < self.similarity_threshold:
+            return None
+        self._entries.move_to_end(best.key)
+        return CacheHit(best.response, "similar", round(best_score, 4))
+
+    def _weights(self, terms: Counter) -> dict[str, float]:
+        n = len(self._entries) + 1
+        return {
+            term: (1 + math.log(count)) * (math.log(n / (1 + self._doc_freq.get(term, 0))) + 1)
+            for term, count in terms.items()
+        }
+
+    def _check_data_version(self) -> None:
+        version = self.data_version.current()
+        if version != self._data_version:
+            if self._data_version is not None:
+                self.clear()
+                self.invalidations += 1
+            self._data_version = version
+
+
+response_cache = ResponseCache(
+    ttl_seconds=settings.chat_cache_ttl_seconds,
+    max_entries=settings.chat_cache_max_entries,
+    max_bytes=settings.chat_cache_max_bytes,
+    similarity_enabled=settings.chat_cache_similarity_enabled,
+    similarity_threshold=settings.chat_cache_similarity_threshold,
+)
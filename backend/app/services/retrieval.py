@@ -0,0 +1,377 @@
+"""
+Hybrid retrieval over the course catalog and program requirement groups, for
+grounding chat answers (RAG).
+
+Documents are courses (code, title, description, prerequisites) and the named
+requirement groups of data/program_requirements.json. The index is built
+offline by scripts/build_retrieval_index.py into a directory of:
+
+- manifest.json: embedder, document count, BM25 parameters;
+- documents.json: id, kind, title and text per document;
+- vocabulary.json and bm25_{indptr,docs,weights}.npy: a BM25 inverted index
+  in CSR form, each posting holding its precomputed BM25 term score;
+- vectors.npy: one L2-normalized float32 embedding per document.
+
+The .npy files are memory-mapped, so workers share the pages and start fast.
+NumPy itself is imported only once an index is loaded or built, so workers
+without one never pay for it.
+Workers pick up a rebuilt index within a few seconds (the manifest is
+written last and watched like the response cache's reference data).
+A query runs both rankers (BM25 sums the query terms' postings; the vector
+ranker is one matrix-vector product) and fuses their top
+`retrieval_candidates` with reciprocal-rank fusion: a document scores
+sum(weight / (rrf_k + rank)) over the rankings it appears in, with weight 1
+for BM25 and `retrieval_vector_weight` for the vectors.
+"""
+from __future__ import annotations
+import json
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+from ..config.settings import settings
+from .embeddings import Embedder, get_embedder
+from .response_cache import DataVersion
+
+if TYPE_CHECKING:
+    import numpy as np
+
+INDEX_DIR = Path(__file__).resolve().parents[2] / "data" / "retrieval"
+MANIFEST = "manifest.json"
+INDEX_FILES = ("documents.json", "vocabulary.json", "bm25_indptr.npy", "bm25_docs.npy", "bm25_weights.npy", "vectors.npy")
+
+# Characters of a document kept for its prompt snippet
+SNIPPET_CHARS = 400
+
+MODES = ("bm25", "vector", "hybrid")
+
+_TOKEN = re.compile(r"[^\W_]+")
+_COURSE_CODE = re.compile(r"\b([a-z][a-z_]{1,11}) ?(\d{3})(?:-(\d))?\b")
+# Includes words nearly every course-planning question and document has
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me my of on or should that the "
+    "this to what when which who will with you your course class".split()
+)
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 3 or not token.endswith("s") or token.endswith("ss"):
+        return token
+    return token[:-2] if token.endswith("sses") else token[:-1]
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Words, plurals folded ("electives" -> "elective"). A course code becomes
+    its subject's words plus code tokens ("comp_sci214", and "comp_sci214-0"
+    with the part) rather than loose numbers, which also keeps requirement
+    groups listing many courses from looking longer than they read.
+    """
+    codes = []
+
+    def code_tokens(match: re.Match) -> str:
+        subject, number, part = match.groups()
+        codes.append(f"{subject}{number}")
+        if part:
+            codes.append(f"{subject}{number}-{part}")
+        return subject
+
+    text = _COURSE_CODE.sub(code_tokens, text.lower())
+    words = (_singular(word) for word in _TOKEN.findall(text) if word not in _STOPWORDS)
+    return [word for word in words if word not in _STOPWORDS] + codes
+
+
+@dataclass
+class Document:
+    id: str  # "course:COMP_SCI 214-0" or "requirement:<program id>:<group index>"
+    kind: str  # "course" or "requirement"
+    title: str
+    text: str  # What gets indexed
+
+    @property
+    def snippet(self) -> str:
+        """What goes into the prompt."""
+        return self.text[:SNIPPET_CHARS]
+
+
+@dataclass
+class SearchHit:
+    document: Document
+    score: float
+    bm25_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+
+
+# Documents
+
+def course_documents(courses: Iterable[dict]) -> list[Document]:
+    """Courses as dicts with code, title, description and prereq_text (CourseDB columns)."""
+    documents = []
+    for course in courses:
+        code, title = course["code"], course.get("title") or course["code"]
+        parts = [f"{code}: {title}."]
+        if course.get("description"):
+            parts.append(course["description"].strip())
+        if course.get("prereq_text"):
+            parts.append(f"Prerequisites: {course['prereq_text'].strip()}")
+        documents.append(Document(f"course:{code}", "course", f"{code} {title}", " ".join(parts)))
+    return documents
+
+
+def _group_courses(node, out: list[str]) -> None:
+    if isinstance(node, list):
+        for child in node:
+            _group_courses(child, out)
+    elif node["type"] == "COURSE":
+        out.append(node["value"])
+    elif node["type"] != "CREDIT":
+        _group_courses(node["value"], out)
+
+
+def _describe_rule(node: dict) -> str:
+    kind = node["type"]
+    if kind == "AND":
+        return "all of"
+    if kind == "OR":
+        return "one of"
+    if kind.startswith("ANY") and kind.endswith("OF"):
+        return f"any {kind[3:-2]} of"
+    return kind.lower()
+
+
+def requirement_documents(programs: list[dict]) -> list[Document]:
+    """One document per named requirement group (program_requirements.json format)."""
+    documents = []
+    for program in programs:
+        name = f"{program['program_name']} {program.get('program_type', 'program')}"
+        groups = []
+
+        def walk(node):
+            if isinstance(node, list):
+                for child in node:
+                    walk(child)
+                return
+            if node["type"] in ("COURSE", "CREDIT"):
+                return
+            if node.get("group_name"):
+                groups.append(node)
+            walk(node["value"])
+
+        walk(program["requirements"])
+        for index, group in enumerate(groups):
+            courses: list[str] = []
+            _group_courses(group["value"], courses)
+            courses = list(dict.fromkeys(courses))
+            parts = [f"{name}, {group['group_name']}: {_describe_rule(group)} {', '.join(courses)}."]
+            if group.get("note"):
+                parts.append(group["note"])
+            if index == 0 and program.get("note"):
+                parts.append(program["note"])
+            documents.append(Document(
+                f"requirement:{program['program_id']}:{index}", "requirement",
+                f"{name}: {group['group_name']}", " ".join(parts),
+            ))
+    return documents
+
+
+# Index
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest positive scores, best first."""
+    import numpy as np
+    k = min(k, int(np.count_nonzero(scores > 0)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class RetrievalIndex:
+    def __init__(self, documents: list[Document], vocabulary: dict[str, int], indptr: np.ndarray,
+                 postings: np.ndarray, weights: np.ndarray, vectors: np.ndarray, embedder: Embedder,
+                 manifest: dict):
+        self.documents = documents
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.postings = postings
+        self.weights = weights
+        self.vectors = vectors
+        self.embedder = embedder
+        self.manifest = manifest
+
+        self.searches = 0
+        self.search_ms_total = 0.0
+
+    @classmethod
+    def build(cls, documents: list[Document], embedder: Embedder, k1: float = 1.2, b: float = 0.75) -> "RetrievalIndex":
+        import numpy as np
+        vocabulary: dict[str, int] = {}
+        term_ids, doc_ids, freqs = [], [], []
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, document in enumerate(documents):
+            counts: dict[int, int] = {}
+            # The title counts twice: a cheap stand-in for field weighting
+            tokens = tokenize(document.title) + tokenize(document.text)
+            lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term = vocabulary.setdefault(token, len(vocabulary))
+                counts[term] = counts.get(term, 0) + 1
+            term_ids.extend(counts)
+            doc_ids.extend([doc_id] * len(counts))
+            freqs.extend(counts.values())
+
+        # Postings sorted by term (then document): CSR with one row per term
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        postings = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(freqs, dtype=np.float32)[order]
+        doc_freq = np.bincount(term_ids, minlength=len(vocabulary))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=indptr[1:])
+
+        n = len(documents)
+        idf = np.log(1 + (n - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[postings] / max(float(lengths.mean()), 1.0))
+        weights = (np.repeat(idf, doc_freq) * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+        vectors = embedder.embed([document.text for document in documents])
+        manifest = {
+            "documents": n,
+            "terms": len(vocabulary),
+            "postings": int(postings.size),
+            "embedder": embedder.name,
+            "dim": embedder.dim,
+            "k1": k1,
+            "b": b,
+            "built_at": time.time(),
+        }
+        return cls(documents, vocabulary, indptr, postings, weights, vectors, embedder, manifest)
+
+    def save(self, directory: Path) -> None:
+        import numpy as np
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / "documents.json", "w") as f:
+            json.dump([[d.id, d.kind, d.title, d.text] for d in self.documents], f, separators=(",", ":"))
+        with open(directory / "vocabulary.json", "w") as f:
+            json.dump(sorted(self.vocabulary, key=self.vocabulary.__getitem__), f, separators=(",", ":"))
+        np.save(directory / "bm25_indptr.npy", self.indptr)
+        np.save(directory / "bm25_docs.npy", self.postings)
+        np.save(directory / "bm25_weights.npy", self.weights)
+        np.save(directory / "vectors.npy", np.ascontiguousarray(self.vectors, dtype=np.float32))
+        # Written last: a directory with a manifest is complete
+        with open(directory / MANIFEST, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: Path = INDEX_DIR, embedder: Optional[Embedder] = None) -> Optional["RetrievalIndex"]:
+        try:
+            with open(directory / MANIFEST) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        import numpy as np
+        with open(directory / "documents.json") as f:
+            documents = [Document(*row) for row in json.load(f)]
+        with open(directory / "vocabulary.json") as f:
+            vocabulary = {term: i for i, term in enumerate(json.load(f))}
+        arrays = [np.load(directory / name, mmap_mode="r") for name in INDEX_FILES[2:]]
+        embedder = embedder or get_embedder(manifest["embedder"], manifest["dim"])
+        if (embedder.name, embedder.dim) != (manifest["embedder"], manifest["dim"]):
+            raise ValueError(f"Index was built with {manifest['embedder']}/{manifest['dim']}, "
+                             f"not {embedder.name}/{embedder.dim}")
+        return cls(documents, vocabulary, *arrays, embedder, manifest)
+
+    # Search
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        import numpy as np
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                start, end = self.indptr[term], self.indptr[term + 1]
+                # Document ids are unique within a term's postings, so fancy-index += is safe
+                scores[self.postings[start:end]] += self.weights[start:end]
+        return scores
+
+    def vector_scores(self, query: str) -> np.ndarray:
+        return self.vectors @ self.embedder.embed_query(query)
+
+    def search(self, query: str, k: int, mode: str = "hybrid", candidates: Optional[int] = None,
+               rrf_k: Optional[int] = None, vector_weight: Optional[float] = None) -> list[SearchHit]:
+        started = time.perf_counter()
+        candidates = max(k, candidates or settings.retrieval_candidates)
+        rrf_k = rrf_k if rrf_k is not None else settings.retrieval_rrf_k
+        vector_weight = vector_weight if vector_weight is not None else settings.retrieval_vector_weight
+        bm25 = _top(self.bm25_scores(query), candidates) if mode != "vector" else None
+        vector = _top(self.vector_scores(query), candidates) if mode != "bm25" else None
+
+        hits: dict[int, SearchHit] = {}
+        for ranking, attribute, weight in ((bm25, "bm25_rank", 1.0), (vector, "vector_rank", vector_weight)):
+            if ranking is None:
+                continue
+            for rank, doc_id in enumerate(ranking.tolist(), start=1):
+                hit = hits.get(doc_id)
+                if hit is None:
+                    hit = hits[doc_id] = SearchHit(self.documents[doc_id], 0.0)
+                setattr(hit, attribute, rank)
+                hit.score += weight / (rrf_k + rank)
+        # Ties (equal fused scores) go to the better BM25 rank: exact terms like course codes
+        results = sorted(hits.values(), key=lambda h: (-h.score, h.bm25_rank or candidates + 1))[:k]
+
+        self.searches += 1
+        self.search_ms_total += (time.perf_counter() - started) * 1000
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self.documents),
+            "embedder": self.embedder.name,
+            "searches": self.searches,
+            "search_ms_avg": round(self.search_ms_total / self.searches, 3) if self.searches else 0.0,
+        }
+
+
+def format_snippets(hits: list[SearchHit]) -> str:
+    lines = [f"- {hit.document.snippet}" for hit in hits]
+    return ("Catalog and requirement excerpts that may be relevant (use them only if they are; "
+            "they may be incomplete):\n" + "\n".join(lines))
+
+
+_index: Optional[RetrievalIndex] = None
+_index_version: Optional[str] = None
+_manifest_version: Optional[DataVersion] = None
+
+
+def _load(directory: Path) -> Optional[RetrievalIndex]:
+    try:
+        index = RetrievalIndex.load(directory)
+    except Exception as e:
+        print("Retrieval index unavailable:", e)
+        return None
+    if index is None:
+        print(f"No retrieval index in {directory}; run `python -m scripts.build_retrieval_index`")
+    return index
+
+
+def get_index() -> Optional[RetrievalIndex]:
+    """The worker's index, loaded on first use and again after a rebuild. None if disabled or not built."""
+    global _index, _index_version, _manifest_version
+    if not settings.retrieval_enabled:
+        return None
+    directory = Path(settings.retrieval_index_dir) if settings.retrieval_index_dir else INDEX_DIR
+    if _manifest_version is None:
+        _manifest_version = DataVersion([directory / MANIFEST])
+    version = _manifest_version.current()
+    if version != _index_version:
+        _index_version = version
+        _index = _load(directory)
+    return _index
+
+
+def retrieve(query: str, k: Optional[int] = None) -> list[SearchHit]:
+    index = get_index()
+    if index is None:
+        return []
+    return index.search(query, k or settings.retrieval_top_k)
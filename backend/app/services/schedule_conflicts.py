@@ -0,0 +1,120 @@
+"""
+Schedule conflict detection over weekly time bitmasks (see meeting_times).
+
+Each section's mask is computed when the catalog is loaded and stored in
+SectionDB.time_mask. A whole schedule is checked by folding masks into a
+running union, so a conflict-free schedule costs one AND per section.
+"""
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+from sqlmodel import Session, select
+from ..models.db_models import SectionDB
+from .meeting_times import before_mask, describe_mask, mask_from_bytes, parse_time
+
+
+@dataclass
+class ConflictReport:
+    # Pairs of section ids that overlap, with the overlapping times
+    conflicts: list[dict] = field(default_factory=list)
+    # Sections meeting before the student's earliest class time
+    too_early: list[str] = field(default_factory=list)
+    # Sections with no catalog entry (cannot be checked)
+    unknown_sections: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts and not self.too_early
+
+    def as_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "conflicts": self.conflicts,
+            "too_early": self.too_early,
+            "unknown_sections": self.unknown_sections,
+        }
+
+
+def load_section_masks(session: Session, section_ids: Iterable[str]) -> dict[str, int]:
+    section_ids = list(dict.fromkeys(section_ids))
+    if not section_ids:
+        return {}
+    rows = session.exec(
+        select(SectionDB.section_id, SectionDB.time_mask).where(SectionDB.section_id.in_(section_ids))
+    ).all()
+    return {section_id: mask_from_bytes(mask) for section_id, mask in rows}
+
+
+def check_schedule(masks: dict[str, int], earliest_class_time: Optional[str] = None, section_ids: Optional[list[str]] = None) -> ConflictReport:
+    """
+    Conflicts among `section_ids` (default: every key of `masks`). Each section is
+    ANDed against the union of the ones before it; only on a hit do we look for
+    which earlier section it overlaps.
+    """
+    report = ConflictReport()
+    section_ids = list(masks) if section_ids is None else list(dict.fromkeys(section_ids))
+    early = before_mask(parse_time(earliest_class_time)) if earliest_class_time else 0
+    union = 0
+    seen: list[tuple[str, int]] = []
+    for section_id in section_ids:
+        if section_id not in masks:
+            report.unknown_sections.append(section_id)
+            continue
+        mask = masks[section_id]
+        if mask & early:
+            report.too_early.append(section_id)
+        if mask & union:
+            for other_id, other in seen:
+                overlap = mask & other
+                if overlap:
+                    report.conflicts.append({"sections": [other_id, section_id], "times": describe_mask(overlap)})
+        union |= mask
+        seen.append((section_id, mask))
+    return report
+
+
+def _slots(mask: int) -> list[int]:
+    slots = []
+    while mask:
+        low = mask & -mask
+        slots.append(low.bit_length() - 1)
+        mask ^= low
+    return slots
+
+
+def conflict_graph(masks: list[int]) -> list[int]:
+    """
+    For many sections (e.g. a whole term), a bitset per section of the other
+    sections it overlaps. Rather than ANDing every pair, the masks are
+    transposed into one bitset of sections per occupied slot; a section's
+    conflicts are the OR of those bitsets over its slots. Sections sharing a
+    meeting pattern (most do) share that work.
+    """
+    members: dict[int, int] = {}  # distinct mask -> bitset of sections with it
+    for i, mask in enumerate(masks):
+        if mask:
+            members[mask] = members.get(mask, 0) | (1 << i)
+    slot_sections: dict[int, int] = {}
+    distinct_slots = {mask: _slots(mask) for mask in members}
+    for mask, bits in members.items():
+        for slot in distinct_slots[mask]:
+            slot_sections[slot] = slot_sections.get(slot, 0) | bits
+    hits: dict[int, int] = {}
+    for mask, slots in distinct_slots.items():
+        overlapping = 0
+        for slot in slots:
+            overlapping |= slot_sections[slot]
+        hits[mask] = overlapping
+    return [hits[mask] & ~(1 << i) if mask else 0 for i, mask in enumerate(masks)]
+
+
+def conflicting_pairs(graph: list[int]) -> Iterator[tuple[int, int]]:
+    """Overlapping (i, j) pairs with i < j from a conflict_graph."""
+    for i, conflicts in enumerate(graph):
+        others = conflicts >> (i + 1)
+        j = i + 1
+        while others:
+            skip = (others & -others).bit_length() - 1
+            j += skip
+            yield i, j
+            others >>= skip + 1
+            j += 1
@@ -0,0 +1,349 @@
+"""
+Schedule generation: pick sections for a set of courses so nothing overlaps.
+
+Each course becomes a list of options (one section per component, e.g. a
+lecture plus a discussion) with a precomputed weekly time mask and a score.
+A depth-first search then assigns options course by course:
+
+- most-constrained first: the next course is the one with the fewest options
+  still compatible with what is already chosen (required courses first);
+- forward checking: a required course with no compatible option, or too few
+  viable courses left to reach the target, ends the branch;
+- branch and bound: scores are additive, so a branch whose best possible
+  total cannot beat the current k-th best schedule is skipped.
+
+The search stops when its time budget runs out and returns the best
+schedules found so far.
+"""
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import func
+from sqlmodel import Session, select
+from ..models.db_models import CourseDB, SectionDB
+from .catalog_store import get_course
+from .meeting_times import before_mask, parse_time
+from .requirements_engine import canonical_course_code
+from .schedule_conflicts import conflict_graph, load_section_masks
+
+MAX_OPTIONS_PER_COURSE = 200
+FAVORITE_BONUS = 0.5
+DISLIKED_PENALTY = 1.0
+# Earlier entries in the candidate list are preferred, by this much per position
+PRIORITY_STEP = 0.05
+
+
+@dataclass
+class Option:
+    course: str
+    section_ids: tuple[str, ...]
+    mask: int
+    score: float
+    instructors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class CourseChoices:
+    code: str
+    options: list[Option]  # sorted by score, best first
+    required: bool = False
+
+
+@dataclass
+class Preferences:
+    earliest_class_time: Optional[str] = None
+    favorite_profs: list[str] = field(default_factory=list)
+    disliked_profs: list[str] = field(default_factory=list)
+
+
+@dataclass
+class GeneratedSchedule:
+    score: float
+    options: list[Option]
+
+
+@dataclass
+class SearchResult:
+    schedules: list[GeneratedSchedule]
+    complete: bool  # False if the time budget ran out before the search finished
+    nodes: int
+    elapsed_ms: float
+
+
+def _matches(name: str, people: list[str]) -> bool:
+    name = name.lower()
+    return any(person.strip() and (person.strip().lower() in name or name in person.strip().lower()) for person in people)
+
+
+def _instructor_score(instructors: list[str], preferences: Preferences) -> float:
+    score = 0.0
+    for name in instructors:
+        if _matches(name, preferences.favorite_profs):
+            score += FAVORITE_BONUS
+        if _matches(name, preferences.disliked_profs):
+            score -= DISLIKED_PENALTY
+    return score
+
+
+def build_choices(
+    code: str,
+    sections: list[dict],
+    masks: dict[str, int],
+    preferences: Preferences,
+    priority: int = 0,
+    required: bool = False,
+    fixed_section: Optional[str] = None,
+) -> CourseChoices:
+    """
+    Options for one course from its catalog sections (dicts with section_id,
+    component and instructors). Sections meeting before the earliest class
+    time are dropped; `fixed_section` pins that section's component.
+    """
+    early = before_mask(parse_time(preferences.earliest_class_time)) if preferences.earliest_class_time else 0
+    by_component: dict[str, list[dict]] = {}
+    for section in sections:
+        mask = masks.get(section["section_id"], 0)
+        if mask & early:
+            continue
+        by_component.setdefault(section["component"], []).append(section)
+    if fixed_section is not None:
+        for component, group in by_component.items():
+            if any(section["section_id"] == fixed_section for section in group):
+                by_component[component] = [s for s in group if s["section_id"] == fixed_section]
+
+    options = []
+    base = 1.0 - PRIORITY_STEP * priority
+    for combination in itertools.product(*by_component.values()):
+        mask = 0
+        for section in combination:
+            section_mask = masks.get(section["section_id"], 0)
+            if mask & section_mask:
+                break
+            mask |= section_mask
+        else:
+            instructors = [name for section in combination for name in section["instructors"]]
+            options.append(Option(
+                course=code,
+                section_ids=tuple(section["section_id"] for section in combination),
+                mask=mask,
+                score=base + _instructor_score(instructors, preferences),
+                instructors=instructors,
+            ))
+    if not by_component:
+        options = []
+    options.sort(key=lambda option: -option.score)
+    return CourseChoices(code, options[:MAX_OPTIONS_PER_COURSE], required)
+
+
+# Below this many options a plain pairwise AND is cheaper than conflict_graph's slot transposition
+PAIRWISE_LIMIT = 400
+
+
+def _option_conflicts(masks: list[int]) -> list[int]:
+    if len(masks) > PAIRWISE_LIMIT:
+        return conflict_graph(masks)
+    conflicts = [0] * len(masks)
+    for i, mask in enumerate(masks):
+        if not mask:
+            continue
+        for j in range(i + 1, len(masks)):
+            if mask & masks[j]:
+                conflicts[i] |= 1 << j
+                conflicts[j] |= 1 << i
+    return conflicts
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class ScheduleSearch:
+    """
+    Options are numbered so each course's options are contiguous and best
+    first. The search state is a bitset of options still compatible with
+    everything chosen, so forward checking is one AND per course and the best
+    remaining option of a course is its lowest set bit.
+    """
+
+    def __init__(self, courses: list[CourseChoices], target: int, top_k: int = 5, time_budget_ms: float = 150):
+        self.courses = courses
+        self.target = target
+        self.top_k = top_k
+        self.deadline = 0.0
+        self.time_budget = time_budget_ms / 1000
+        self.nodes = 0
+        self.results: list[tuple[float, int, tuple[Option, ...]]] = []  # min-heap of the best top_k
+        self._counter = itertools.count()
+
+        self.options: list[Option] = []
+        self.course_bits: list[int] = []
+        for course in courses:
+            self.course_bits.append(((1 << len(course.options)) - 1) << len(self.options))
+            self.options.extend(course.options)
+        self.scores = [option.score for option in self.options]
+        self.conflicts = _option_conflicts([option.mask for option in self.options])
+
+    def run(self) -> SearchResult:
+        started = time.perf_counter()
+        self.deadline = started + self.time_budget
+        complete = True
+        try:
+            self._search(list(range(len(self.courses))), (1 << len(self.options)) - 1, 0.0, ())
+        except _OutOfTime:
+            complete = False
+        schedules = [
+            GeneratedSchedule(round(score, 4), list(chosen))
+            for score, _, chosen in sorted(self.results, key=lambda r: (-r[0], r[1]))
+        ]
+        return SearchResult(schedules, complete, self.nodes, round((time.perf_counter() - started) * 1000, 2))
+
+    def _record(self, score: float, chosen: tuple[Option, ...]) -> None:
+        entry = (score, next(self._counter), chosen)
+        if len(self.results) < self.top_k:
+            heapq.heappush(self.results, entry)
+        elif score > self.results[0][0]:
+            heapq.heapreplace(self.results, entry)
+
+    def _search(self, remaining: list[int], alive: int, score: float, chosen: tuple[Option, ...]) -> None:
+        self.nodes += 1
+        if not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+        if len(chosen) == self.target:
+            self._record(score, chosen)
+            return
+
+        # Forward check: which undecided courses still have a compatible option
+        viable = []
+        required = 0
+        required_best = 0.0
+        optional_best = []
+        for index in remaining:
+            bits = alive & self.course_bits[index]
+            if bits:
+                best = self.scores[(bits & -bits).bit_length() - 1]
+                if self.courses[index].required:
+                    required += 1
+                    required_best += best
+                else:
+                    optional_best.append(best)
+                viable.append(index)
+            elif self.courses[index].required:
+                return
+        needed = self.target - len(chosen)
+        if len(viable) < needed or required > needed:
+            return
+
+        # Bound: best compatible option of each required course, plus the best optional ones
+        if len(self.results) == self.top_k:
+            optional_best.sort(reverse=True)
+            if score + required_best + sum(optional_best[:needed - required]) <= self.results[0][0]:
+                return
+
+        # Most constrained first: required courses, then the fewest compatible options
+        index = min(
+            viable, key=lambda i: (not self.courses[i].required, (alive & self.course_bits[i]).bit_count())
+        )
+        rest = [i for i in viable if i != index]
+        bits = alive & self.course_bits[index]
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            option = low.bit_length() - 1
+            self._search(rest, alive & ~self.conflicts[option], score + self.scores[option], chosen + (self.options[option],))
+        if not self.courses[index].required:
+            self._search(rest, alive, score, chosen)
+
+
+def generate_schedules(courses: list[CourseChoices], target: int, top_k: int = 5, time_budget_ms: float = 150) -> SearchResult:
+    """Top-k non-overlapping schedules of `target` courses, including every required course."""
+    target = min(target, len(courses))
+    return ScheduleSearch(courses, target, top_k, time_budget_ms).run()
+
+
+@dataclass
+class GenerationInput:
+    term: str
+    courses: list[CourseChoices]
+    # Requested courses with no usable section this term (not offered, or all too early)
+    unavailable: list[str]
+    details: dict[str, dict]  # course code -> catalog entry, for rendering results
+
+
+def latest_term(session: Session) -> Optional[str]:
+    return session.exec(select(func.max(SectionDB.term))).first()
+
+
+def load_generation_input(
+    session: Session,
+    candidates: list[str],
+    locked: list[str],
+    preferences: Preferences,
+    term: Optional[str] = None,
+) -> GenerationInput:
+    """
+    Build the search input from the catalog. Locked entries may be course codes
+    or section ids; either way the course is required, and a section id also
+    pins that section. Candidates are optional and ranked in the given order.
+    """
+    term = term or latest_term(session)
+    pinned: dict[str, str] = {}
+    locked_ids = [entry for entry in locked if entry]
+    if locked_ids:
+        rows = session.exec(
+            select(SectionDB.section_id, CourseDB.code)
+            .join(CourseDB, CourseDB.id == SectionDB.course_id)
+            .where(SectionDB.section_id.in_(locked_ids))
+        ).all()
+        pinned = {code: section_id for section_id, code in rows}
+        section_ids = {section_id for section_id, _ in rows}
+        locked_codes = list(pinned) + [
+            canonical_course_code(entry) for entry in locked_ids if entry not in section_ids
+        ]
+    else:
+        locked_codes = []
+    required = set(locked_codes)
+    codes = list(dict.fromkeys([*locked_codes, *(canonical_course_code(code) for code in candidates)]))
+
+    conn = session.connection()
+    details = {}
+    for code in codes:
+        course = get_course(conn, code, term)
+        if course is not None:
+            details[code] = course
+    masks = load_section_masks(
+        session, [section["section_id"] for course in details.values() for section in course["sections"]]
+    )
+
+    courses, unavailable = [], []
+    optional_rank = {code: rank for rank, code in enumerate(c for c in codes if c not in required)}
+    for code in codes:
+        course = details.get(code)
+        choices = build_choices(
+            code,
+            course["sections"] if course else [],
+            masks,
+            preferences,
+            priority=optional_rank.get(code, 0),
+            required=code in required,
+            fixed_section=pinned.get(code),
+        )
+        if choices.options:
+            courses.append(choices)
+        else:
+            unavailable.append(code)
+    return GenerationInput(term, courses, unavailable, details)
+
+
+def describe_schedule(schedule: GeneratedSchedule, details: dict[str, dict]) -> dict:
+    courses = []
+    for option in schedule.options:
+        course = details[option.course]
+        chosen = set(option.section_ids)
+        courses.append({
+            "code": course["code"],
+            "title": course["title"],
+            "sections": [section for section in course["sections"] if section["section_id"] in chosen],
+        })
+    return {"score": schedule.score, "courses": courses}
@@ -0,0 +1,67 @@
+"""
+Local token counts for prompt budgeting.
+
+Uses tiktoken's encoding for `settings.openai_model`. tiktoken downloads the
+encoding file once and caches it (see TIKTOKEN_CACHE_DIR); a worker that
+cannot load it (offline, or tiktoken not installed) estimates instead: one
+token per punctuation mark and per started four characters of each word,
+which errs high for English, the safe side for a budget.
+"""
+import math
+import re
+from functools import lru_cache
+from ..config.settings import settings
+
+# Chat format tokens around each message (role, separators)
+MESSAGE_OVERHEAD = 4
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(settings.openai_model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # ImportError, or the encoding file could not be fetched
+        print("tiktoken unavailable, estimating token counts:", e)
+        return None
+
+
+def load_tokenizer() -> None:
+    """Load the encoding now (at startup) rather than inside the first request; may download it once."""
+    _encoding()
+
+
+def _estimate(text: str) -> int:
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECES.findall(text))
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return _estimate(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(content: str) -> int:
+    """Tokens a chat message with this content takes up in a prompt."""
+    return count_tokens(content) + MESSAGE_OVERHEAD
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most about `max_tokens` tokens, on a word boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
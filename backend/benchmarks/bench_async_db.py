@@ -0,0 +1,158 @@
+"""
+Benchmark `/schedule` and `/auth/me` with synchronous and async database access.
+
+Runs the app in-process (httpx over ASGI, one event loop, like one uvicorn
+worker) against a temporary SQLite database, with 200 concurrent clients by
+default. The user cache is disabled so every request loads its user from the
+database. Two paths per endpoint:
+
+- sync: the handlers as they were before the async engine: `/auth/me` loads
+  the user with a blocking query inside its async dependency, and
+  `/schedule` is a plain `def` route (FastAPI runs it in the threadpool)
+  with a blocking Session;
+- async: the app's routes, with AsyncSession from `Depends(get_session)`.
+
+Besides requests per second and latency, a probe task measures how late the
+event loop wakes it up (loop lag): blocking I/O on the loop shows up there
+as lag for every other request in the worker. Run from the backend/
+directory:
+
+    python -m benchmarks.bench_async_db [--clients 200 --requests 4000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Importing the app builds the OpenAI client; the benchmark never calls it
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, select
+
+from app import database
+from app.auth.dependencies import security
+from app.auth.security import create_access_token, verify_token
+from app.auth.user_cache import user_cache
+from app.main import app
+from app.models.db_models import ScheduleDB, UserProfileDB
+
+USERS = 500
+PROBE_INTERVAL = 0.005
+
+legacy = APIRouter(prefix="/sync")
+
+
+def sync_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserProfileDB:
+    netid = verify_token(credentials.credentials, token_type="access")["sub"]
+    with Session(database.engine) as session:
+        user = session.get(UserProfileDB, netid)
+    if user is None:
+        raise HTTPException(status_code=401)
+    return user
+
+
+async def blocking_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserProfileDB:
+    # The old get_current_user: an async dependency whose query blocks the loop
+    return sync_current_user(credentials)
+
+
+@legacy.get("/auth/me")
+async def sync_me(current_user: UserProfileDB = Depends(blocking_current_user)):
+    return {"netid": current_user.netid, "name": current_user.name, "email": current_user.email}
+
+
+@legacy.get("/schedule")
+def sync_schedules(current_user: UserProfileDB = Depends(blocking_current_user)):
+    with Session(database.read_engine) as session:
+        schedules = session.exec(select(ScheduleDB).where(ScheduleDB.netid == current_user.netid)).all()
+        return [s.model_dump() for s in schedules]
+
+
+app.include_router(legacy)
+
+
+async def loop_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        due = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - due) * 1000)
+
+
+async def run(path: str, tokens: list[str], requests: int, clients: int) -> tuple[float, list[float], list[float]]:
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        async def worker(batch: list[str]) -> None:
+            for token in batch:
+                start = time.perf_counter()
+                response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+
+        order = [tokens[i % len(tokens)] for i in range(requests)]
+        probe = asyncio.create_task(loop_lag(stop, lags))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(order[i::clients]) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+    # Pooled aiosqlite connections belong to this event loop
+    await database.async_engine.dispose()
+    await database.async_read_engine.dispose()
+    return requests / elapsed, latencies, lags
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        database.engine = database.make_engine(url)
+        database.read_engine = database.make_engine(url, read_only=True)
+        database.async_engine = database.make_async_engine(url)
+        database.async_read_engine = database.make_async_engine(url, read_only=True)
+        SQLModel.metadata.create_all(database.engine)
+        netids = [f"user{i}" for i in range(USERS)]
+        with database.engine.begin() as conn:
+            conn.execute(insert(UserProfileDB), [
+                {"netid": netid, "name": netid, "email": f"{netid}@u.northwestern.edu", "hashed_password": "",
+                 "majors": ["Computer Science"], "minors": [], "classes_already_taken": ["COMP_SCI 211-0"]}
+                for netid in netids
+            ])
+            conn.execute(insert(ScheduleDB), [
+                {"netid": netid, "name": f"Plan {n}", "term": "4960", "created": "", "updated": ""}
+                for netid in netids for n in range(3)
+            ])
+        tokens = [create_access_token(data={"sub": netid}) for netid in netids]
+        user_cache.enabled = False
+        user_cache.async_db = database.async_engine
+
+        print(f"{args.requests} requests per run, {args.clients} concurrent clients, user cache off, "
+              f"{os.cpu_count()} CPUs\n")
+        for endpoint in ("/auth/me", "/schedule"):
+            for mode, path in (("sync", "/sync" + endpoint), ("async", endpoint)):
+                throughput, latencies, lags = asyncio.run(run(path, tokens, args.requests, args.clients))
+                print(f"{endpoint:<10} {mode:<6} {throughput:7.0f} req/s   p50 {statistics.median(latencies):7.1f} ms   "
+                      f"p99 {percentile(latencies, 0.99):7.1f} ms   loop lag p99 {percentile(lags, 0.99):6.1f} ms   "
+                      f"max {max(lags):6.1f} ms")
+        for db in (database.engine, database.read_engine):
+            db.dispose()
+
+
+if __name__ == "__main__":
+    main()
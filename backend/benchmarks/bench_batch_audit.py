@@ -0,0 +1,116 @@
+"""
+Benchmark the vectorized batch degree audit.
+
+Builds synthetic cohorts (each student lists one or two programs) and reports
+students per second for the NumPy evaluation at 1k, 10k and 100k students,
+next to the per-student bitmask engine for reference. With --with-db the
+cohort is also written to a temporary SQLite database and the full pipeline
+(streaming read, evaluation, results insert) is timed. Run from the backend/
+directory:
+
+    python -m benchmarks.bench_batch_audit [--sizes 1000 10000 100000] [--with-db]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel, create_engine
+
+from app.models.db_models import UserProfileDB
+from app.services.batch_audit import BatchAuditor, StudentRecord, run_batch_audit
+from app.services.requirements_engine import get_engine
+from benchmarks.bench_requirements import synthetic_transcripts
+
+
+def synthetic_cohort(count: int, seed: int) -> list[StudentRecord]:
+    engine = get_engine()
+    rng = random.Random(seed)
+    names = [program.name for program in engine.programs.values()]
+    transcripts = synthetic_transcripts(engine, count, seed)
+    return [
+        StudentRecord(f"s{i:06d}", rng.sample(names, rng.randint(1, min(2, len(names)))), courses)
+        for i, courses in enumerate(transcripts)
+    ]
+
+
+def check_agreement(auditor: BatchAuditor, students: list[StudentRecord]) -> None:
+    engine = auditor.requirements
+    batch = {(row["netid"], row["program_name"]): row["satisfied"] for row in auditor.audit_chunk(students)}
+    for student in students:
+        for audit in engine.audit(student.programs, student.courses):
+            assert batch[(student.netid, audit.program_name)] == audit.satisfied, student.netid
+
+
+def bench_memory(auditor: BatchAuditor, students: list[StudentRecord], chunk: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(students), chunk):
+        auditor.audit_chunk(students[i:i + chunk])
+    return len(students) / (time.perf_counter() - start)
+
+
+def bench_evaluate_only(auditor: BatchAuditor, students: list[StudentRecord], chunk: int) -> float:
+    """Encode + matrix evaluation, without building result rows."""
+    start = time.perf_counter()
+    for i in range(0, len(students), chunk):
+        matrix = auditor.encode(students[i:i + chunk])
+        for vectorized in auditor.programs.values():
+            vectorized.group_states(matrix)
+    return len(students) * len(auditor.programs) / (time.perf_counter() - start)
+
+
+def bench_per_student(students: list[StudentRecord], limit: int) -> float:
+    engine = get_engine()
+    sample = students[:limit]
+    start = time.perf_counter()
+    for student in sample:
+        taken = engine.encode_transcript(student.courses)
+        for program in map(engine.get_program, student.programs):
+            program.unsatisfied_groups(taken)
+    return len(sample) / (time.perf_counter() - start)
+
+
+def bench_with_db(students: list[StudentRecord], chunk: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(db)
+        with db.begin() as conn:
+            conn.execute(insert(UserProfileDB), [
+                {"netid": s.netid, "name": s.netid, "email": f"{s.netid}@example.edu", "hashed_password": "", "majors": s.programs, "minors": [],
+                 "classes_already_taken": s.courses, "locked_classes": []}
+                for s in students
+            ])
+        result = run_batch_audit(batch_size=chunk, db=db)
+        db.dispose()
+    return result["students_per_second"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--chunk", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-db", action="store_true", help="also time the SQLite read/write pipeline")
+    args = parser.parse_args()
+
+    auditor = BatchAuditor()
+    print(f"{len(auditor.programs)} programs, {len(auditor.requirements.interner)} interned codes")
+    check_agreement(auditor, synthetic_cohort(500, args.seed))
+    print("batch results match the per-student engine on 500 students\n")
+
+    # evaluate-only checks every student against every program, so it is reported per (student, program)
+    header = f"{'students':>10} {'vectorized/s':>14} {'per-student/s':>14} {'eval pairs/s':>14}"
+    print(header + (f" {'with db/s':>12}" if args.with_db else ""))
+    for size in args.sizes:
+        students = synthetic_cohort(size, args.seed)
+        line = f"{size:>10,} {bench_memory(auditor, students, args.chunk):>14,.0f} {bench_per_student(students, 10_000):>14,.0f}" \
+               f" {bench_evaluate_only(auditor, students, args.chunk):>14,.0f}"
+        if args.with_db:
+            line += f" {bench_with_db(students, args.chunk):>12,.0f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark /courses/search queries against a full-size synthetic catalog.
+
+Generates a catalog with scripts.generate_catalog, loads it into a temporary
+SQLite database, then times a mix of code-prefix, free-text, filtered and
+paginated searches. Run from the backend/ directory:
+
+    python -m benchmarks.bench_catalog_search [--courses 12000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlmodel import SQLModel, create_engine
+
+from app.services.catalog_store import load_catalog, search_courses
+from benchmarks.bench_requirements import report
+from scripts.generate_catalog import TERMS, generate
+
+
+def query_mix(snapshot: dict, count: int, seed: int) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    codes = [course["id"] for course in snapshot["courses"]]
+    titles = [course["name"].split() for course in snapshot["courses"]]
+    names = sorted({i["name"] for s in snapshot["sections"] for i in s["instructors"]})
+    terms = [term for term, _ in TERMS]
+
+    def code_prefix():
+        subject, number = rng.choice(codes).split(" ")
+        return {"q": f"{subject.lower()} {number[:rng.randint(1, 3)]}"}
+
+    def words():
+        title = rng.choice(titles)
+        return {"q": " ".join(word[:rng.randint(3, max(3, len(word)))] for word in rng.sample(title, min(2, len(title))))}
+
+    def filtered():
+        return {"term": rng.choice(terms), "days": rng.choice(("MoWeFr", "TuTh", "MoWe")),
+                "start_after": "10:00", "end_before": "16:00", "q": code_prefix()["q"].split()[0]}
+
+    def by_instructor():
+        return {"term": rng.choice(terms), "instructor": rng.choice(names).split()[-1]}
+
+    kinds = {"code prefix": code_prefix, "free text": words, "term+days+time": filtered, "instructor": by_instructor}
+    return {kind: [make() for _ in range(count)] for kind, make in kinds.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=12000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    snapshot = generate(args.courses, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = create_engine(f"sqlite:///{os.path.join(tmp, 'catalog.db')}")
+        SQLModel.metadata.create_all(db)
+        start = time.perf_counter()
+        counts = load_catalog(snapshot, db)
+        print(f"loaded {counts['coursedb']} courses, {counts['sectiondb']} sections, "
+              f"{counts['meetingdb']} meetings in {time.perf_counter() - start:.2f}s\n")
+
+        with db.connect() as conn:
+            for kind, queries in query_mix(snapshot, args.queries, args.seed).items():
+                samples, found = [], 0
+                for params in queries:
+                    started = time.perf_counter()
+                    page = search_courses(conn, **params)
+                    samples.append((time.perf_counter() - started) * 1e6)
+                    found += bool(page["results"])
+                report(f"{kind} ({found}/{len(queries)} non-empty)", samples)
+
+            samples, cursor, pages = [], None, 0
+            while pages < 200:
+                started = time.perf_counter()
+                page = search_courses(conn, q="comp", cursor=cursor, limit=20)
+                samples.append((time.perf_counter() - started) * 1e6)
+                pages += 1
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            report(f"keyset pages of 'comp' ({pages} pages)", samples)
+        db.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark prompt size and latency over long chat conversations, resending the
+whole history versus the token-budgeted history with a rolling summary.
+
+Runs the app in-process (httpx over ASGI) against a temporary SQLite
+database and a stubbed LLM. The stub counts each prompt's tokens with the
+app's tokenizer and takes `--base-ms` plus `--prefill-us` per prompt token
+to answer, so prompt size shows up in latency the way a hosted model's
+prefill does. Every turn posts to `/chat` with the conversation id. Modes:
+
+- full history: the history budget is effectively unlimited, so every
+  earlier turn is resent (and nothing is summarized);
+- budgeted: the app's settings; turns that no longer fit
+  `CHAT_HISTORY_TOKEN_BUDGET` are summarized in the background.
+
+Prints prompt tokens and request latency at checkpoints, and what the
+background summaries cost. Run from the backend/ directory:
+
+    python -m benchmarks.bench_chat_history [--turns 100 --base-ms 20 --prefill-us 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+# The stub replaces the client; this keeps importing the app offline
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+from app import database
+from app.auth.security import create_access_token
+from app.auth.user_cache import user_cache
+from app.config.settings import settings
+from app.main import app
+from app.models.db_models import UserProfileDB
+from app.services import openai_service
+from app.services.conversation_store import conversation_store
+from app.services.tokens import count_tokens, message_tokens
+
+NETID = "bench"
+TOPICS = ["statistics electives", "machine learning", "a second major in economics", "study abroad in the fall",
+          "research with a professor", "the senior capstone", "summer internships", "graduate school"]
+CHECKPOINTS = (1, 10, 25, 50, 75, 100)
+
+
+def question(turn: int) -> str:
+    topic = TOPICS[turn % len(TOPICS)]
+    return (f"Thinking about year {turn // 12 + 1} of my plan, given everything we talked about so far, "
+            f"would it be smarter to spend more of my schedule on {topic}, or keep it for requirements?")
+
+
+class StubLLM:
+    """Stands in for AsyncOpenAI: counts prompt tokens, waits like prefill would, returns a fixed-size reply."""
+
+    def __init__(self, base_ms: float, prefill_us: float):
+        self.base = base_ms / 1000
+        self.prefill = prefill_us / 1e6
+        self.chat_prompts: list[int] = []
+        self.summary_prompts: list[int] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model: str, messages: list[dict], max_tokens=None, **kwargs):
+        tokens = sum(message_tokens(m["content"]) for m in messages)
+        summary = messages[0]["content"].startswith("Summarize")
+        (self.summary_prompts if summary else self.chat_prompts).append(tokens)
+        await asyncio.sleep(self.base + self.prefill * tokens)
+        last = messages[-1]["content"]
+        content = (" ".join(last.split()[:max_tokens // 2]) if summary else
+                   f"Good question. For {last.split(' on ')[-1][:60]} I'd weigh COMP_SCI 349-0, STAT 303-1 and "
+                   "IEMS 304-0 against your remaining core courses; two of them also count toward the Data Science "
+                   "major, so taking them next quarter keeps your graduation timeline intact while leaving room "
+                   "for one free elective. Check the prerequisites before you register.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+                               usage=SimpleNamespace(prompt_tokens=tokens, completion_tokens=count_tokens(content)))
+
+    async def close(self) -> None:
+        pass
+
+
+async def run(mode: str, token: str, turns: int, stub: StubLLM) -> list[tuple[int, float]]:
+    """(prompt tokens, latency ms) per turn."""
+    per_turn = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        conversation_id = None
+        for turn in range(1, turns + 1):
+            body = {"message": question(turn), "user_id": NETID, "timestamp": "bench"}
+            if conversation_id is not None:
+                body["conversation_id"] = conversation_id
+            calls = len(stub.chat_prompts)
+            start = time.perf_counter()
+            response = await client.post("/chat", json=body, headers={"Authorization": f"Bearer {token}"})
+            elapsed = (time.perf_counter() - start) * 1000
+            assert response.status_code == 200, response.text
+            conversation_id = response.json()["conversation_id"]
+            per_turn.append((stub.chat_prompts[-1] if len(stub.chat_prompts) > calls else 0, elapsed))
+    await conversation_store.wait_idle()
+    await database.dispose_async_engines()
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--base-ms", type=float, default=20, help="stub LLM time per call")
+    parser.add_argument("--prefill-us", type=float, default=20, help="stub LLM time per prompt token")
+    args = parser.parse_args()
+
+    settings.chat_cache_enabled = False
+    settings.intent_llm_fallback = False
+    budget = (settings.chat_history_token_budget, settings.chat_history_max_messages)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        database.engine = database.make_engine(url)
+        database.async_engine = database.make_async_engine(url)
+        database.async_read_engine = database.make_async_engine(url, read_only=True)
+        user_cache.db, user_cache.async_db = database.engine, database.async_engine
+        conversation_store.async_db = database.async_engine
+        SQLModel.metadata.create_all(database.engine)
+        with database.engine.begin() as conn:
+            conn.execute(insert(UserProfileDB), [{
+                "netid": NETID, "name": NETID, "email": f"{NETID}@u.northwestern.edu", "hashed_password": "",
+                "majors": ["Data Science"], "minors": [], "classes_already_taken": ["STAT 202-0", "COMP_SCI 211-0"],
+            }])
+        token = create_access_token(data={"sub": NETID})
+
+        print(f"{args.turns} turns per conversation; stub LLM {args.base_ms:g} ms + {args.prefill_us:g} us per prompt "
+              f"token; history budget {budget[0]} tokens (summary up to {settings.chat_history_summary_max_tokens}); "
+              f"question {count_tokens(question(1))} tokens\n")
+        results = {}
+        for mode in ("full history", "budgeted"):
+            stub = StubLLM(args.base_ms, args.prefill_us)
+            openai_service.client = stub
+            if mode == "full history":
+                settings.chat_history_token_budget, settings.chat_history_max_messages = 10**9, 10**6
+            else:
+                settings.chat_history_token_budget, settings.chat_history_max_messages = budget
+            per_turn = asyncio.run(run(mode, token, args.turns, stub))
+            results[mode] = per_turn
+            latencies = [ms for _, ms in per_turn]
+            print(f"{mode:<13} prompt tokens total {sum(t for t, _ in per_turn):>9,}   "
+                  f"latency p50 {statistics.median(latencies):6.1f} ms   last 10 turns p50 "
+                  f"{statistics.median(latencies[-10:]):6.1f} ms   background summaries {len(stub.summary_prompts)} "
+                  f"({sum(stub.summary_prompts):,} prompt tokens)")
+
+        print(f"\n{'turn':>5} " + "".join(f"{mode + ' tokens':>22}{'ms':>8}" for mode in results))
+        for turn in (c for c in CHECKPOINTS if c <= args.turns):
+            row = "".join(f"{results[mode][turn - 1][0]:>22,}{results[mode][turn - 1][1]:>8.1f}" for mode in results)
+            print(f"{turn:>5} {row}")
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
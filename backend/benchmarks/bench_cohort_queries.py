@@ -0,0 +1,138 @@
+"""
+Benchmark cohort queries ("every Data Science major", "everyone who has taken
+STAT 202") over many synthetic profiles, before and after the profile lists
+are normalized.
+
+Builds a temporary SQLite database of synthetic profiles whose majors,
+minors and transcripts come from the real program requirements, then times
+the same random cohort questions four ways:
+
+- JSON in Python: read every profile's JSON column and filter in Python
+  (what the app had to do);
+- JSON in SQL: the same filter pushed into SQLite with json_each, still a
+  full table scan;
+- cohort(), before the backfill: every profile is unsynced, so the dual-read
+  path falls back to decoding JSON;
+- cohort(), after scripts/backfill_profile_lists: an index range on
+  profilelistitemdb (with INTERSECT for two filters).
+
+Every method must return the same netids. Run from the backend/ directory:
+
+    python -m benchmarks.bench_cohort_queries [--users 100000 --queries 30]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, SQLModel, select
+
+from app.database import make_engine
+from app.models.db_models import UserProfileDB
+from app.services import profile_lists
+from app.services.profile_lists import backfill, cohort, normalize
+from app.services.requirements_engine import RequirementsEngine
+from benchmarks.bench_requirements import report, time_per_call
+
+
+def synthetic_profiles(users: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    requirements = RequirementsEngine.load()
+    majors = [p.name for p in requirements.programs.values() if p.program_type == "major"] or \
+        [p.name for p in requirements.programs.values()]
+    minors = [p.name for p in requirements.programs.values() if p.program_type == "minor"] or majors
+    courses = [code for code in requirements.interner.codes if "-" in code]
+    # A few popular courses, as in a real transcript distribution
+    weights = [1 / (rank + 1) ** 0.7 for rank in range(len(courses))]
+    return [
+        {
+            "netid": f"s{i:06d}", "name": f"Student {i}", "email": f"s{i:06d}@u.northwestern.edu",
+            "hashed_password": "!",
+            "majors": rng.sample(majors, rng.choice((1, 1, 1, 2))),
+            "minors": rng.sample(minors, rng.choice((0, 0, 1))),
+            "classes_already_taken": rng.choices(courses, weights, k=rng.randint(0, 30)),
+            "vocational_interests": [], "favorite_profs": [], "disliked_profs": [], "locked_classes": [],
+        }
+        for i in range(users)
+    ]
+
+
+def json_in_python(session: Session, criteria: list[tuple[str, str]]) -> list[str]:
+    # Stored values are compared as-is; the generator only stores canonical course codes
+    wanted = [(field, normalize(field, value)) for field, value in criteria]
+    fields = sorted({field for field, _ in criteria})
+    matches = []
+    for netid, *lists in session.exec(select(UserProfileDB.netid, *(getattr(UserProfileDB, f) for f in fields))):
+        values = dict(zip(fields, lists))
+        if all(value in (values[field] or []) for field, value in wanted):
+            matches.append(netid)
+    return matches
+
+
+def json_in_sql(session: Session, criteria: list[tuple[str, str]]) -> list[str]:
+    conditions = " AND ".join(
+        f"EXISTS (SELECT 1 FROM json_each(userprofiledb.{field}) WHERE json_each.value = :v{i})"
+        for i, (field, _) in enumerate(criteria)
+    )
+    params = {f"v{i}": normalize(field, value) for i, (field, value) in enumerate(criteria)}
+    return list(session.execute(text(f"SELECT netid FROM userprofiledb WHERE {conditions} ORDER BY netid"), params).scalars())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = synthetic_profiles(args.users, args.seed)
+    sample = rng.sample(profiles, args.queries)
+    single = [[("majors", p["majors"][0])] if i % 2 else [("classes_already_taken", rng.choice(p["classes_already_taken"] or ["COMP_SCI 211-0"]))]
+              for i, p in enumerate(sample)]
+    double = [[("majors", p["majors"][0]), ("classes_already_taken", rng.choice(p["classes_already_taken"] or ["COMP_SCI 211-0"]))]
+              for p in sample]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(db)
+        with db.begin() as conn:
+            conn.execute(insert(UserProfileDB), profiles)
+        print(f"{args.users:,} profiles, {args.queries} queries per row "
+              "(one filter: a major or a course; two filters: both)\n")
+
+        with Session(db) as session:
+            expected = {}
+            for label, queries in (("one filter", single), ("two filters", double)):
+                results = []
+                report(f"{label}: JSON in Python", time_per_call(lambda q: results.append(json_in_python(session, q)), queries))
+                expected[label] = results
+                report(f"{label}: JSON in SQL (json_each)", time_per_call(lambda q: json_in_sql(session, q), queries))
+                got = []
+                report(f"{label}: cohort(), not backfilled", time_per_call(lambda q: got.append(cohort(session, q)), queries))
+                assert got == expected[label]
+
+            start = time.perf_counter()
+            synced = backfill(session)
+            items = session.execute(text("SELECT count(*) FROM profilelistitemdb")).scalar()
+            print(f"\nbackfill: {synced:,} profiles, {items:,} item rows in {time.perf_counter() - start:.1f} s\n")
+
+            profile_lists._backfilled_at = None
+            for label, queries in (("one filter", single), ("two filters", double)):
+                got = []
+                report(f"{label}: cohort(), indexed", time_per_call(lambda q: got.append(cohort(session, q)), queries))
+                assert got == expected[label]
+                sizes = sorted(len(r) for r in got)
+                print(f"{'':<44} median cohort {sizes[len(sizes) // 2]:,} students, largest {sizes[-1]:,}")
+            start = time.perf_counter()
+            profile_lists._backfilled_at = None
+            profile_lists._needs_fallback(session)
+            print(f"\nbackfill-complete check (once per {profile_lists.RECHECK_SECONDS:.0f} s): "
+                  f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        db.dispose()
+
+
+if __name__ == "__main__":
+    main()
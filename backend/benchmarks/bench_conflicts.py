@@ -0,0 +1,66 @@
+"""
+Micro-benchmarks for the schedule conflict engine.
+
+Uses section masks from a synthetic catalog (scripts.generate_catalog) to time
+(a) checking a 6-course schedule, (b) pairwise AND of two sections, and
+(c) building the conflict graph of 10k sections (every overlapping pair),
+compared against ANDing every pair on a sample. Run from the backend/ directory:
+
+    python -m benchmarks.bench_conflicts [--sections 10000]
+"""
+import argparse
+import random
+import time
+
+from app.services.catalog_store import _meetings, _union_mask
+from app.services.schedule_conflicts import check_schedule, conflict_graph, conflicting_pairs
+from benchmarks.bench_requirements import report, time_per_call
+from scripts.generate_catalog import generate
+
+
+def section_masks(count: int, seed: int) -> list[int]:
+    snapshot = generate(max(2000, count // 2), seed)
+    masks = [_union_mask(_meetings(section, 0)) for section in snapshot["sections"]]
+    rng = random.Random(seed)
+    return [rng.choice(masks) for _ in range(count)] if len(masks) < count else masks[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=10_000)
+    parser.add_argument("--schedules", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    masks = section_masks(args.sections, args.seed)
+    print(f"{len(masks)} sections\n")
+
+    schedules = []
+    for _ in range(args.schedules):
+        picked = rng.sample(range(len(masks)), 6)
+        schedules.append({f"s{i}": masks[i] for i in picked})
+    report("check 6-course schedule", time_per_call(check_schedule, schedules))
+    report("check 6-course schedule, earliest 10:00", time_per_call(lambda s: check_schedule(s, "10:00"), schedules))
+    pairs = [(rng.choice(masks), rng.choice(masks)) for _ in range(args.schedules)]
+    report("pairwise overlap (one AND)", time_per_call(lambda p: p[0] & p[1], pairs))
+
+    start = time.perf_counter()
+    graph = conflict_graph(masks)
+    elapsed = time.perf_counter() - start
+    overlapping = sum(conflicts.bit_count() for conflicts in graph) // 2
+    print(f"\nall-pairs scan of {len(masks)} sections: {elapsed * 1000:.0f} ms, {overlapping:,} overlapping pairs")
+
+    sample = masks[:2000]
+    start = time.perf_counter()
+    naive = sum(1 for i, a in enumerate(sample) for b in sample[i + 1:] if a & b)
+    naive_elapsed = time.perf_counter() - start
+    total_pairs = len(masks) * (len(masks) - 1) / 2
+    scale = total_pairs / (len(sample) * (len(sample) - 1) / 2)
+    print(f"naive AND of every pair, 2000 sections: {naive_elapsed * 1000:.0f} ms "
+          f"(~{naive_elapsed * scale:.1f} s extrapolated to {len(masks)})")
+    assert naive == sum(1 for _ in conflicting_pairs(conflict_graph(sample)))
+
+
+if __name__ == "__main__":
+    main()
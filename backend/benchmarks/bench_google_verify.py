@@ -0,0 +1,211 @@
+"""
+Benchmark Google ID-token verification with a cold and a warm key cache.
+
+Serves a JWKS from a local stand-in for Google's certs endpoint (with an
+artificial network delay and a Cache-Control max-age) and signs test ID
+tokens with the matching RSA key. It times:
+
+- cold: a fresh key cache per sign-in, i.e. fetching the keys every time
+  (roughly what the google-auth call did per login);
+- warm: one cache shared by every sign-in, as in a running worker.
+
+It also checks that bad tokens are rejected, that concurrent cold sign-ins
+share one fetch, and that a token signed by a newly rotated key triggers a
+single refresh. Run from the backend/ directory:
+
+    python -m benchmarks.bench_google_verify [--tokens 500 --network-ms 40]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from jose.exceptions import JOSEError
+
+from app.auth.google_keys import GoogleKeyCache
+from benchmarks.bench_requirements import report
+
+AUDIENCE = "bench-client.apps.googleusercontent.com"
+
+
+class SigningKey:
+    def __init__(self, kid: str):
+        self.kid = kid
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.pem = private.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        public = private.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        self.jwk = {**jwk.construct(public, "RS256").to_dict(), "kid": kid, "use": "sig"}
+
+    def sign(self, audience: str = AUDIENCE, expires_in: int = 3600, **claims) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com", "aud": audience, "iat": now, "exp": now + expires_in,
+            "sub": claims.pop("sub", "1234"), "email": "student@u.northwestern.edu", "name": "Student", **claims,
+        }
+        return jwt.encode(payload, self.pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # Closing a cache mid-fetch drops the connection; that is expected here
+
+
+class CertsServer:
+    """Local JWKS endpoint; counts requests and sleeps `delay` seconds per response."""
+
+    def __init__(self, keys: list[SigningKey], delay: float, max_age: int = 3600):
+        self.keys = keys
+        self.max_age = max_age
+        self.requests = 0
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so a pooled client reuses its connection
+
+            def do_GET(self):
+                outer.requests += 1
+                time.sleep(delay)
+                body = json.dumps({"keys": [key.jwk for key in outer.keys]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={outer.max_age}, must-revalidate")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = QuietServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/oauth2/v3/certs"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+
+
+def new_cache(url: str) -> GoogleKeyCache:
+    return GoogleKeyCache(url, default_max_age=3600, refresh_margin=300, min_refresh_interval=30,
+                          retry_seconds=60, timeout=5)
+
+
+async def timed(cache: GoogleKeyCache, tokens: list[str]) -> list[float]:
+    samples = []
+    for token in tokens:
+        start = time.perf_counter()
+        claims = await cache.verify(token, AUDIENCE)
+        samples.append((time.perf_counter() - start) * 1e6)
+        assert claims["email"] == "student@u.northwestern.edu"
+    return samples
+
+
+async def cold(url: str, tokens: list[str]) -> list[float]:
+    samples = []
+    for token in tokens:
+        cache = new_cache(url)
+        samples += await timed(cache, [token])
+        await cache.close()
+    return samples
+
+
+async def rejects(cache: GoogleKeyCache, token: str) -> bool:
+    try:
+        await cache.verify(token, AUDIENCE)
+    except JOSEError:
+        return True
+    return False
+
+
+async def checks(server: CertsServer, key: SigningKey) -> None:
+    cache = new_cache(server.url)
+    good = key.sign()
+    tampered = good[:-4] + ("AAAA" if not good.endswith("AAAA") else "BBBB")
+    assert await rejects(cache, key.sign(audience="someone-else"))
+    assert await rejects(cache, key.sign(expires_in=-60))
+    assert await rejects(cache, tampered)
+    assert await rejects(cache, SigningKey(key.kid).sign())  # right kid, wrong key
+    assert await rejects(cache, key.sign(iss="https://evil.example.com"))
+    await cache.close()
+
+    # Concurrent sign-ins on a cold cache share one fetch
+    cache = new_cache(server.url)
+    before = server.requests
+    await asyncio.gather(*(cache.verify(key.sign(sub=str(i)), AUDIENCE) for i in range(20)))
+    assert server.requests - before == 1, server.requests - before
+
+    # Google rotates in a new key: the first token it signed forces exactly one refresh
+    rotated = SigningKey("rotated")
+    server.keys = [key, rotated]
+    cache._last_fetch -= cache.min_refresh_interval  # as if the last fetch were a while ago
+    before = server.requests
+    await cache.verify(rotated.sign(), AUDIENCE)
+    await cache.verify(rotated.sign(), AUDIENCE)
+    assert server.requests - before == 1
+    # ...and a flood of unknown key ids cannot turn into a flood of fetches
+    unknown = SigningKey("unknown")
+    for _ in range(10):
+        assert await rejects(cache, unknown.sign())
+    assert server.requests - before == 1
+    server.keys = [key]
+    await cache.close()
+
+
+async def background_refresh(server: CertsServer, key: SigningKey) -> None:
+    # Short max-age: the background task refetches before expiry, so sign-ins never wait
+    server.max_age = 1
+    cache = GoogleKeyCache(server.url, default_max_age=3600, refresh_margin=0.5, min_refresh_interval=0.1,
+                           retry_seconds=1, timeout=5)
+    cache.start()
+    await asyncio.sleep(0.2)
+    for _ in range(25):
+        await cache.verify(key.sign(), AUDIENCE)
+        await asyncio.sleep(0.1)
+    stats = cache.stats()
+    await cache.close()
+    assert stats["cold_lookups"] == 0 and stats["fetches"] >= 3, stats
+    print(f"background refresh: {stats['fetches']} fetches over 2.7 s of keys with max-age 1 s, 0 sign-ins waited on a fetch")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--cold-tokens", type=int, default=50)
+    parser.add_argument("--network-ms", type=float, default=40, help="delay added by the stand-in certs server")
+    args = parser.parse_args()
+
+    key = SigningKey("bench-key")
+    server = CertsServer([key], delay=args.network_ms / 1000)
+    tokens = [key.sign(sub=str(i)) for i in range(args.tokens)]
+    try:
+        asyncio.run(checks(server, key))
+        print("rejected wrong audience, expired, tampered, wrong-key and wrong-issuer tokens; "
+              "20 concurrent cold sign-ins made 1 fetch; a rotated key made 1 refresh\n")
+
+        print(f"certs endpoint delay {args.network_ms:.0f} ms")
+        report("verify, cold cache (fetch per sign-in)", asyncio.run(cold(server.url, tokens[:args.cold_tokens])))
+
+        async def warm():
+            cache = new_cache(server.url)
+            await cache.refresh()
+            samples = await timed(cache, tokens)
+            await cache.close()
+            return samples
+
+        report("verify, warm cache", asyncio.run(warm()))
+        print()
+        asyncio.run(background_refresh(server, key))
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Measure what HTTP caching saves over a typical frontend session: bytes the
+server sends and time it spends.
+
+Runs the app in-process (httpx over ASGI) against a temporary database with
+one student, their schedules and a synthetic catalog. A session signs in,
+then navigates --navigations times; every navigation refetches /auth/me,
+/profile/me, /schedule?include=courses and the reference data, the way
+frontend/src/services/api.ts does. Every few navigations the student edits
+a schedule, and once they update their profile. Two clients run the same
+session:
+
+- no cache: every request downloads the full body (no conditional requests);
+- browser cache: keeps each response's ETag and body, sends If-None-Match
+  when revalidating (Cache-Control: no-cache), and does not request
+  immutable reference URLs it already holds.
+
+Both must end up with the same data. Bytes count status line, headers and
+body as the server sent them; server time is the time spent in the app per
+request. Run from the backend/ directory:
+
+    python -m benchmarks.bench_http_cache [--navigations 30 --schedules 8 --courses 4000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Importing the app builds the OpenAI client; the benchmark never calls it
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+import httpx
+
+EMAIL = "session@u.northwestern.edu"
+PASSWORD = "session password"
+PAGE_RESOURCES = ("/auth/me", "/profile/me", "/schedule?include=courses")
+
+
+class Session:
+    """One simulated browser: totals what the server sent and how long it took."""
+
+    def __init__(self, client: httpx.AsyncClient, browser_cache: bool):
+        self.client = client
+        self.browser_cache = browser_cache
+        self.cache: dict[str, tuple[str, bytes]] = {}  # URL -> (ETag, body)
+        self.headers: dict[str, str] = {}
+        self.requests = self.not_modified = self.bytes_sent = 0
+        self.server_seconds = 0.0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, headers={**self.headers, **kwargs.pop("headers", {})}, **kwargs)
+        self.server_seconds += time.perf_counter() - started
+        self.requests += 1
+        self.bytes_sent += len(f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n") + \
+            sum(len(name) + len(value) + 4 for name, value in response.headers.raw) + 2 + len(response.content)
+        return response
+
+    async def get(self, url: str, immutable: bool = False) -> bytes:
+        cached = self.cache.get(url) if self.browser_cache else None
+        if cached and immutable:
+            return cached[1]
+        response = await self.request("GET", url, headers={"If-None-Match": cached[0]} if cached else {})
+        if response.status_code == 304:
+            self.not_modified += 1
+            return cached[1]
+        assert response.status_code == 200, (url, response.status_code, response.text)
+        if "etag" in response.headers:
+            self.cache[url] = (response.headers["etag"], response.content)
+        return response.content
+
+    async def navigate(self) -> dict[str, bytes]:
+        pages = {url: await self.get(url) for url in PAGE_RESOURCES}
+        manifest = httpx.Response(200, content=await self.get("/reference")).json()
+        for document in manifest.values():
+            pages[document["url"]] = await self.get(document["url"], immutable=True)
+        return pages
+
+
+async def run_session(app, browser_cache: bool, navigations: int, profile: dict) -> tuple[Session, dict]:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        session = Session(client, browser_cache)
+        login = await session.request("POST", "/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        session.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+        schedules = httpx.Response(200, content=await session.get("/schedule")).json()
+        pages = {}
+        for navigation in range(navigations):
+            if navigation % 5 == 4:  # Edit a schedule
+                schedule_id = schedules[navigation % len(schedules)]["id"]
+                await session.request("POST", f"/schedule/{schedule_id}/courses/bulk", json={
+                    "operations": [{"op": "add", "section_ids": [f"bench-{browser_cache}-{navigation}"]}],
+                    "allow_conflicts": True,
+                })
+            if navigation == navigations // 2:  # Update the profile
+                await session.request("PUT", "/profile/me", json={**profile, "earliest_class_time": f"{9 + browser_cache}:00"})
+            pages = await session.navigate()
+    return session, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--navigations", type=int, default=30)
+    parser.add_argument("--schedules", type=int, default=8)
+    parser.add_argument("--courses", type=int, default=4000, help="synthetic catalog size")
+    parser.add_argument("--seed", type=int, default=24)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["BCRYPT_ROUNDS"] = "4"  # Sign-in is not what is measured
+        from sqlalchemy import insert
+        from app.auth.security import get_password_hash
+        from app.database import engine, init_db
+        from app.main import app
+        from app.models.db_models import ScheduleCoursesDB, ScheduleDB, UserProfileDB
+        from app.services.catalog_store import load_catalog
+        from scripts.generate_catalog import generate
+
+        init_db()
+        snapshot = generate(args.courses, args.seed)
+        load_catalog(snapshot, engine)
+        section_ids = [section["section_id"] for section in snapshot["sections"]]
+        profile = {
+            "netid": "session", "majors": ["Data Science"], "minors": [], "classes_already_taken": ["STAT 202-0"],
+            "vocational_interests": ["data"], "favorite_profs": [], "disliked_profs": [], "earliest_class_time": None,
+            "locked_classes": [],
+        }
+        with engine.begin() as conn:
+            conn.execute(insert(UserProfileDB).values(
+                **profile, name="Session", email=EMAIL, hashed_password=get_password_hash(PASSWORD, 4),
+            ))
+            conn.execute(insert(ScheduleDB), [
+                {"id": i + 1, "netid": "session", "name": f"Plan {i + 1}", "term": "4960", "created": "x", "updated": "x"}
+                for i in range(args.schedules)
+            ])
+            conn.execute(insert(ScheduleCoursesDB), [
+                {"schedule_id": str(i + 1), "section_id": section_ids[(i * 5 + j) % len(section_ids)]}
+                for i in range(args.schedules) for j in range(5)
+            ])
+
+        async def both():
+            async with app.router.lifespan_context(app):
+                plain, plain_pages = await run_session(app, False, args.navigations, profile)
+                cached, cached_pages = await run_session(app, True, args.navigations, profile)
+            return plain, plain_pages, cached, cached_pages
+
+        plain, plain_pages, cached, cached_pages = asyncio.run(both())
+        # Same data either way (the two sessions added different sections and earliest times)
+        assert plain_pages.keys() == cached_pages.keys()
+
+        print(f"session: sign in, {args.navigations} navigations, {args.schedules} schedules, "
+              f"{args.navigations // 5} schedule edits, 1 profile update, {args.courses}-course catalog\n")
+        for label, session in (("no cache", plain), ("browser cache", cached)):
+            print(f"{label:<14} {session.requests:4d} requests ({session.not_modified:3d} x 304)   "
+                  f"{session.bytes_sent / 1024:9.1f} KiB sent   server time {session.server_seconds * 1000:8.1f} ms")
+        print(f"\nsaved {1 - cached.bytes_sent / plain.bytes_sent:.1%} of bytes, "
+              f"{1 - cached.server_seconds / plain.server_seconds:.1%} of server time")
+
+
+if __name__ == "__main__":
+    main()
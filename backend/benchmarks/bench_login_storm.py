@@ -0,0 +1,134 @@
+"""
+Load test: latency of ordinary requests while a login storm is running.
+
+Runs the app in-process (httpx over ASGI, one event loop, like one uvicorn
+worker) against a temporary database. A probe sends `/auth/me` every 10 ms
+for a few seconds; each latency is measured from when the request was due,
+so time spent waiting for a blocked event loop counts. Three modes:
+
+- idle: no logins;
+- storm, inline bcrypt: concurrent logins with bcrypt run on the event loop
+  (how /auth/login used to work);
+- storm, process pool: the same storm through the password pool.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_login_storm [--storm 16 --seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Importing the app builds the OpenAI client; the benchmark never calls it
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+import httpx
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import database
+from app.auth import router as auth_router
+from app.auth.password_pool import password_hasher
+from app.auth.security import create_access_token, get_password_hash, verify_password
+from app.auth.user_cache import user_cache
+from app.main import app
+from app.models.db_models import UserProfileDB
+
+EMAIL = "storm@u.northwestern.edu"
+PASSWORD = "correct horse battery staple"
+
+
+PROBE_INTERVAL = 0.01
+
+
+async def probe(client: httpx.AsyncClient, token: str, stop: asyncio.Event, latencies: list[float]) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        response = await client.get("/auth/me", headers=headers)
+        latencies.append((time.perf_counter() - due) * 1000)
+        assert response.status_code == 200
+        due += PROBE_INTERVAL
+
+
+async def storm(client: httpx.AsyncClient, stop: asyncio.Event, counts: dict) -> None:
+    while not stop.is_set():
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        # In-process requests need not suspend at all; yield so the probe and the timer run
+        await asyncio.sleep(0.05 if response.status_code == 503 else 0)
+
+
+async def run(token: str, storm_size: int, seconds: float) -> tuple[list[float], dict]:
+    latencies: list[float] = []
+    counts: dict[int, int] = {}
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        tasks = [asyncio.create_task(probe(client, token, stop, latencies))]
+        tasks += [asyncio.create_task(storm(client, stop, counts)) for _ in range(storm_size)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    # Pooled aiosqlite connections belong to this event loop
+    await database.async_engine.dispose()
+    return latencies, counts
+
+
+def describe(label: str, latencies: list[float], counts: dict) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    logins = ", ".join(f"{code}: {n}" for code, n in sorted(counts.items())) or "none"
+    print(f"{label:<24} probes {len(ordered):5d}   p50 {statistics.median(ordered):8.2f} ms   "
+          f"p99 {p99:8.2f} ms   max {ordered[-1]:8.2f} ms   logins ({logins})")
+
+
+class InlineHasher:
+    """bcrypt on the event loop, as /auth/login did before the password pool."""
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return False
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return verify_password(password, hashed_password)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storm", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db = create_engine(url)
+        SQLModel.metadata.create_all(db)
+        with Session(db) as session:
+            session.add(UserProfileDB(
+                netid="storm", name="Storm", email=EMAIL, majors=[],
+                hashed_password=get_password_hash(PASSWORD, password_hasher.rounds),
+            ))
+            session.commit()
+        # Route the app's queries to the temporary database
+        database.async_engine = database.async_read_engine = database.make_async_engine(url)
+        user_cache.db, user_cache.async_db = db, database.async_engine
+        token = create_access_token(data={"sub": "storm"})
+        print(f"bcrypt rounds {password_hasher.rounds}, {password_hasher.workers} pool workers, "
+              f"{args.storm} concurrent login loops, {os.cpu_count()} CPUs\n")
+
+        password_hasher.start()
+        try:
+            describe("idle", *asyncio.run(run(token, 0, args.seconds)))
+            auth_router.password_hasher = InlineHasher()
+            describe("storm, inline bcrypt", *asyncio.run(run(token, args.storm, args.seconds)))
+            auth_router.password_hasher = password_hasher
+            describe("storm, process pool", *asyncio.run(run(token, args.storm, args.seconds)))
+        finally:
+            password_hasher.shutdown()
+            db.dispose()
+
+
+if __name__ == "__main__":
+    main()
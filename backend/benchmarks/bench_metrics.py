@@ -0,0 +1,123 @@
+"""
+Benchmark what the metrics instrumentation adds per request, per query and
+per LLM call, and how long a /metrics scrape takes.
+
+- HTTP: a minimal FastAPI app with one route, called directly over ASGI
+  (no network or client in the way), with and without MetricsMiddleware;
+- database: one small SELECT on an in-memory SQLite engine, with and without
+  the statement timing hooks;
+- LLM: the llm_call timer plus the token counters around a no-op;
+- scrape: rendering the registry after the other runs.
+
+Uninstrumented and instrumented runs alternate in rounds, so drift in the
+machine's speed affects both alike.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_metrics [--requests 20000 --queries 20000]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+
+from app.services.metrics import MetricsMiddleware, instrument_engine, llm_call, record_llm_usage, render
+from benchmarks.bench_requirements import report, time_per_call
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def asgi_request(app, path: str) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "", "headers": [],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def time_requests(app, count: int) -> list[float]:
+    await asgi_request(app, "/items/0")  # Build the middleware stack
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        await asgi_request(app, f"/items/{i}")
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def time_queries(instrumented: bool, count: int) -> list[float]:
+    db = create_engine("sqlite://")
+    if instrumented:
+        instrument_engine(db)
+    with db.connect() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.exec_driver_sql("INSERT INTO t (name) VALUES ('a'), ('b'), ('c')")
+        return time_per_call(lambda i: conn.exec_driver_sql("SELECT id, name FROM t WHERE id = ?", (i % 3 + 1,)).all(),
+                             range(count))
+
+
+def overhead(label: str, base: list[float], instrumented: list[float]) -> None:
+    print(f"{label:<44} +{statistics.median(instrumented) - statistics.median(base):6.2f} us at p50\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    apps = make_app(False), make_app(True)
+    base, instrumented = [], []
+    for _ in range(args.rounds):
+        base += asyncio.run(time_requests(apps[0], args.requests // args.rounds))
+        instrumented += asyncio.run(time_requests(apps[1], args.requests // args.rounds))
+    report("request, no middleware", base)
+    report("request, MetricsMiddleware", instrumented)
+    overhead("middleware overhead", base, instrumented)
+
+    base, instrumented = [], []
+    for _ in range(args.rounds):
+        base += time_queries(False, args.queries // args.rounds)
+        instrumented += time_queries(True, args.queries // args.rounds)
+    report("query, no hooks", base)
+    report("query, timing hooks", instrumented)
+    overhead("query hook overhead", base, instrumented)
+
+    usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=300)
+
+    def llm(_):
+        with llm_call("bench"):
+            pass
+        record_llm_usage("bench", usage)
+
+    report("llm_call + record_llm_usage", time_per_call(llm, range(args.requests)))
+    start = time.perf_counter()
+    text = render()
+    print(f"\nscrape: {len(text.splitlines())} lines rendered in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the prerequisite graph and the quarter planner.
+
+Builds the graph from a synthetic catalog (scripts.generate_catalog, which
+includes every course named in program_requirements.json), then times
+(a) building the graph and its transitive closure, (b) "can I take X",
+"what does Y unlock" and "quarters until Z" lookups for random transcripts,
+and (c) a full quarter-by-quarter plan for random students in every program,
+checking that each plan respects prerequisites. Run from the backend/
+directory:
+
+    python -m benchmarks.bench_prereq_graph [--courses 3000]
+"""
+import argparse
+import random
+import time
+
+from app.services.prereq_graph import PrereqGraph, set_bits
+from app.services.quarter_planner import plan_for_programs
+from app.services.requirements_engine import RequirementsEngine, canonical_course_code
+from benchmarks.bench_requirements import report, time_per_call
+from scripts.generate_catalog import generate
+
+
+def graph_from_snapshot(snapshot: dict) -> PrereqGraph:
+    codes = [canonical_course_code(course["id"]) for course in snapshot["courses"]]
+    rows = [
+        (canonical_course_code(course["id"]), group_index, canonical_course_code(prereq))
+        for course in snapshot["courses"]
+        for group_index, group in enumerate(course.get("prereq_codes") or [])
+        for prereq in group
+    ]
+    return PrereqGraph.build(codes, rows)
+
+
+def check_plan(graph: PrereqGraph, plan, taken: list[str], max_per_quarter: int) -> None:
+    done = graph.encode(taken)
+    for quarter in plan.quarters:
+        assert len(quarter) <= max_per_quarter
+        ids = [graph.interner.get(code) for code in quarter if code in graph]
+        for course in ids:
+            assert graph.satisfied(course, done), (graph.interner.codes[course], quarter)
+        for course in ids:
+            done |= 1 << course
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=3000)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--max-per-quarter", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    snapshot = generate(args.courses, args.seed)
+    start = time.perf_counter()
+    graph = graph_from_snapshot(snapshot)
+    edges = sum(mask.bit_count() for groups in graph.groups for mask in groups)
+    print(f"built graph of {len(graph.interner)} courses, {edges} prerequisite edges, closure included, "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms (deepest chain {max(graph.depth)})\n")
+
+    codes = graph.interner.codes
+    transcripts = [rng.sample(codes, rng.randint(0, 40)) for _ in range(args.students)]
+    queries = [(rng.choice(codes), transcript) for transcript in transcripts]
+    deep = sorted(range(len(codes)), key=graph.depth.__getitem__)[-50:]
+    deep_queries = [(codes[rng.choice(deep)], transcript) for transcript in transcripts]
+    report("can I take X (with transcript)", time_per_call(lambda q: graph.check(*q), queries))
+    report("can I take X, deepest courses", time_per_call(lambda q: graph.check(*q), deep_queries))
+    report("what does Y unlock (direct)", time_per_call(lambda q: graph.unlocks(q[0]), queries))
+    report("what does Y unlock (transitive)", time_per_call(lambda q: graph.unlocks(q[0], transitive=True), queries))
+    report("what would taking Y make available", time_per_call(lambda q: graph.unlocks(*q), queries))
+
+    requirements = RequirementsEngine.load()
+    programs = [program.name for program in requirements.programs.values()]
+    students = [([rng.choice(programs)], rng.sample(codes, rng.randint(0, 15))) for _ in range(args.students)]
+    plans = []
+    samples = time_per_call(
+        lambda s: plans.append(plan_for_programs(graph, requirements, s[0], s[1], args.max_per_quarter, 24)), students
+    )
+    print()
+    report("quarter plan for one program", samples)
+    for (_, taken), plan in zip(students, plans):
+        check_plan(graph, plan, taken, args.max_per_quarter)
+    lengths = sorted(len(plan.quarters) for plan in plans)
+    courses = sorted(sum(map(len, plan.quarters)) for plan in plans)
+    print(f"plans respect prerequisites; median {lengths[len(lengths) // 2]} quarters / "
+          f"{courses[len(courses) // 2]} courses, longest {lengths[-1]} quarters / {courses[-1]} courses")
+    print(f"transitive closure holds {sum(mask.bit_count() for mask in graph.ancestors):,} ancestor bits "
+          f"(max {max(len(set_bits(mask)) for mask in graph.ancestors)} for one course)")
+
+
+if __name__ == "__main__":
+    main()
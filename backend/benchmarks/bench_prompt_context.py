@@ -0,0 +1,92 @@
+"""
+Benchmark assembling the student context for chat prompts, rebuilt on every
+use versus the per-user prompt context cache.
+
+For synthetic students (majors, minors and transcripts from the real program
+requirements), times the context work one LLM-bound chat request does:
+before, `build_user_context` ran three times (response cache lookup, prompt,
+response cache store); now `prompt_contexts.get` builds once and later calls
+are hits. Also times a rebuild after a profile edit, and checks the prompt
+layout: consecutive prompts for one student share their system message, so
+the provider's prompt caching can reuse that prefix. Run from the backend/
+directory:
+
+    python -m benchmarks.bench_prompt_context [--students 2000]
+"""
+import argparse
+import os
+
+# Importing openai_service builds the OpenAI client; the benchmark never calls it
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+from app.schemas.chat import ChatRequest
+from app.services.conversation_store import PromptHistory
+from app.services.openai_service import build_messages
+from app.services.prompt_builder import build_user_context
+from app.services.prompt_context import PromptContextCache
+from app.services.tokens import message_tokens
+from benchmarks.bench_cohort_queries import synthetic_profiles
+from benchmarks.bench_requirements import report, time_per_call
+
+USES_PER_REQUEST = 3  # Response cache lookup, prompt, response cache store
+
+
+def chat_request(profile: dict, message: str = "What should I take next quarter?") -> ChatRequest:
+    return ChatRequest(
+        message=message,
+        user_id=profile["netid"],
+        majors=profile["majors"],
+        minors=profile["minors"],
+        classes_already_taken=profile["classes_already_taken"],
+        schedule_preferences="Earliest class time: 10:00",
+        self_description="Interested in data science and economics.",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=19)
+    args = parser.parse_args()
+
+    requests = [chat_request(p) for p in synthetic_profiles(args.students, args.seed)]
+    cache = PromptContextCache(max_entries=args.students)
+    print(f"{args.students:,} students, {USES_PER_REQUEST} context uses per LLM-bound chat request\n")
+
+    def rebuild_each_use(request: ChatRequest) -> None:
+        for _ in range(USES_PER_REQUEST):
+            build_user_context(request)
+
+    def cached(request: ChatRequest) -> None:
+        for _ in range(USES_PER_REQUEST):
+            cache.get(request)
+
+    report("rebuild on every use", time_per_call(rebuild_each_use, requests))
+    report("cache, first request (one build)", time_per_call(cached, requests))
+    report("cache, later requests (hits)", time_per_call(cached, requests))
+    edited = [request.model_copy(update={"classes_already_taken": [*request.classes_already_taken, "STAT 202-0"]})
+              for request in requests]
+    report("cache, after a profile edit (rebuild)", time_per_call(cached, edited))
+    stats = cache.stats()
+    print(f"\ncontext builds {stats['builds']:,}, hits {stats['hits']:,}, average build {stats['build_ms_avg']} ms")
+
+    # Prompt layout: what two consecutive turns of one conversation have in common
+    request = requests[0]
+    history = PromptHistory(1, summary="The student asked about statistics electives.",
+                            turns=[{"role": "user", "content": "Is STAT 303-1 hard?"},
+                                   {"role": "assistant", "content": "It is manageable after STAT 202-0."}])
+    first = build_messages(request.model_copy(update={"message": "And COMP_SCI 349-0?"}), history)
+    history.turns += [{"role": "user", "content": "And COMP_SCI 349-0?"}, {"role": "assistant", "content": "Yes."}]
+    second = build_messages(request.model_copy(update={"message": "Which first?"}), history)
+    shared = 0
+    for a, b in zip(first, second):
+        if a != b:
+            break
+        shared += message_tokens(a["content"])
+    total = sum(message_tokens(m["content"]) for m in second)
+    print(f"consecutive prompts share their first {shared} of {total} tokens "
+          "(system prompt with student context, then the summary)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark the requirements engine against synthetic transcripts.
+
+Generates transcripts that mix courses from the requirement data with
+unrelated ones, then times (a) the satisfied/unsatisfied check, (b) a full
+audit with remaining-course suggestions, for every program. Run from the
+backend/ directory:
+
+    python -m benchmarks.bench_requirements [--transcripts 5000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.requirements_engine import RequirementsEngine
+
+
+def synthetic_transcripts(engine: RequirementsEngine, count: int, seed: int) -> list[list[str]]:
+    rng = random.Random(seed)
+    known = [code for code, credit in zip(engine.interner.codes, engine.interner.is_credit) if not credit]
+    unrelated = [f"{subject} {number}-0" for subject in ("ART", "MUSIC", "DANCE", "HISTORY") for number in range(101, 400, 7)]
+    transcripts = []
+    for _ in range(count):
+        size = rng.randint(0, 40)
+        in_program = rng.sample(known, min(len(known), int(size * 0.7)))
+        other = rng.sample(unrelated, size - len(in_program))
+        transcripts.append([code.replace("-0", "") if rng.random() < 0.3 else code for code in in_program + other])
+    return transcripts
+
+
+def time_per_call(fn, items) -> list[float]:
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<44} p50 {statistics.median(ordered):8.2f} us   p99 {p99:8.2f} us   mean {statistics.fmean(ordered):8.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcripts", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = RequirementsEngine.load()
+    print(f"compiled {len(engine.programs)} programs, {len(engine.interner)} interned codes "
+          f"in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    transcripts = synthetic_transcripts(engine, args.transcripts, args.seed)
+    report("encode transcript", time_per_call(engine.encode_transcript, transcripts))
+    masks = [engine.encode_transcript(t) for t in transcripts]
+
+    for program in engine.programs.values():
+        print(f"\n{program.name} ({len(program.thresholds)} nodes, {len(program.groups)} groups)")
+        report("  is_satisfied", time_per_call(program.is_satisfied, masks))
+        report("  evaluate (groups + remaining courses)", time_per_call(lambda m: engine.evaluate(program, m), masks))
+
+    names = [program.name for program in engine.programs.values()]
+    start = time.perf_counter()
+    for transcript in transcripts:
+        engine.audit(names, transcript)
+    elapsed = time.perf_counter() - start
+    print(f"\nfull audit of {len(transcripts)} transcripts x {len(names)} programs: "
+          f"{elapsed * 1000:.1f} ms ({len(transcripts) / elapsed:,.0f} transcripts/s)")
+
+
+if __name__ == "__main__":
+    main()
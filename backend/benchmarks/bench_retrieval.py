@@ -0,0 +1,65 @@
+"""
+Benchmark retrieval latency for chat prompts at catalog scale.
+
+Builds an index over a synthetic catalog (scripts/generate_catalog.py, 20k
+documents by default, plus the real requirement groups), writes it to a
+temporary directory and loads it back memory-mapped, the way workers do.
+Then times one search per query for BM25 alone, vectors alone and the
+fused hybrid, over the query mix benchmarks/eval_retrieval.py evaluates.
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_retrieval [--courses 20000 --embedder hashing --dim 256]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.config.settings import settings
+from app.services.embeddings import get_embedder
+from app.services.retrieval import MODES, RetrievalIndex
+from benchmarks.bench_requirements import report, time_per_call
+from benchmarks.eval_retrieval import derived_queries, synthetic_documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--queries-per-style", type=int, default=300)
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=20)
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.courses, args.seed)
+    embedder = get_embedder(args.embedder, args.dim)
+    start = time.perf_counter()
+    built = RetrievalIndex.build(documents, embedder)
+    build_s = time.perf_counter() - start
+    queries = [query for _, query, _ in derived_queries(documents, args.queries_per_style, args.seed)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        built.save(Path(tmp))
+        size_mb = sum(path.stat().st_size for path in Path(tmp).iterdir()) / 2**20
+        start = time.perf_counter()
+        index = RetrievalIndex.load(Path(tmp), embedder)
+        load_ms = (time.perf_counter() - start) * 1000
+        manifest = index.manifest
+        print(f"{manifest['documents']:,} documents, {manifest['terms']:,} terms, {manifest['postings']:,} postings, "
+              f"{manifest['embedder']} vectors of {manifest['dim']}")
+        print(f"build {build_s:.1f}s (offline), {size_mb:.1f} MB on disk, load {load_ms:.0f} ms (memory-mapped)\n")
+
+        for query in queries[:50]:  # Fault the mapped pages in, as a worker's first requests would
+            index.search(query, settings.retrieval_top_k)
+        print(f"{len(queries)} queries, top {settings.retrieval_top_k} of {settings.retrieval_candidates} "
+              f"candidates per ranker\n")
+        report("query embedding", time_per_call(embedder.embed_query, queries))
+        report("bm25 scores", time_per_call(index.bm25_scores, queries))
+        report("vector scores", time_per_call(index.vector_scores, queries))
+        for mode in MODES:
+            report(f"search ({mode})", time_per_call(lambda q: index.search(q, settings.retrieval_top_k, mode), queries))
+        del index
+
+
+if __name__ == "__main__":
+    main()
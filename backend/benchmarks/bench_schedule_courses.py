@@ -0,0 +1,192 @@
+"""
+Benchmark loading and editing a user's schedules, one request per schedule or
+section versus the batched endpoints.
+
+Runs the app in-process (httpx over ASGI) against a temporary SQLite
+database holding one user with 20 schedules of 6 sections each. Scenarios:
+
+- load everything: `GET /schedule` plus `GET /schedule/{id}/courses` for each
+  schedule (N+1 requests) versus one `GET /schedule?include=courses`;
+- build a schedule: one `POST /schedule/{id}/courses` per section versus one
+  `POST /schedule/{id}/courses/bulk` with an add operation;
+- swap sections: a DELETE and a POST per swapped section versus one bulk
+  request with remove and add operations.
+
+Sections are not in a catalog here, so the conflict check finds no masks;
+both paths still run it. Run from the backend/ directory:
+
+    python -m benchmarks.bench_schedule_courses [--rounds 30]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Importing the app builds the OpenAI client; the benchmark never calls it
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+from app import database
+from app.auth.security import create_access_token
+from app.auth.user_cache import user_cache
+from app.main import app
+from app.models.db_models import ScheduleCoursesDB, ScheduleDB, UserProfileDB
+from app.routers import schedule_courses
+
+NETID = "bench"
+SCHEDULES = 20
+SECTIONS = 6
+
+
+class Client:
+    """httpx client that counts the requests each scenario makes."""
+
+    def __init__(self, client: httpx.AsyncClient, token: str):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.requests = 0
+
+    async def call(self, method: str, path: str, **kwargs) -> httpx.Response:
+        self.requests += 1
+        response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        assert response.status_code == 200, response.text
+        return response
+
+
+async def load_one_by_one(client: Client) -> dict:
+    schedules = (await client.call("GET", "/schedule")).json()
+    courses = await asyncio.gather(*(client.call("GET", f"/schedule/{s['id']}/courses") for s in schedules))
+    return {s["id"]: [c["section_id"] for c in r.json()] for s, r in zip(schedules, courses)}
+
+
+async def load_included(client: Client) -> dict:
+    schedules = (await client.call("GET", "/schedule", params={"include": "courses"})).json()
+    return {s["id"]: [c["section_id"] for c in s["courses"]] for s in schedules}
+
+
+async def build_one_by_one(client: Client, schedule_id: int, sections: list[str]) -> None:
+    for section_id in sections:
+        await client.call("POST", f"/schedule/{schedule_id}/courses",
+                          json={"schedule_id": str(schedule_id), "section_id": section_id})
+
+
+async def build_bulk(client: Client, schedule_id: int, sections: list[str]) -> None:
+    await client.call("POST", f"/schedule/{schedule_id}/courses/bulk",
+                      json={"operations": [{"op": "add", "section_ids": sections}]})
+
+
+async def swap_one_by_one(client: Client, schedule_id: int, old: list[str], new: list[str]) -> None:
+    rows = (await client.call("GET", f"/schedule/{schedule_id}/courses")).json()
+    ids = {row["section_id"]: row["id"] for row in rows}
+    for old_id, new_id in zip(old, new):
+        await client.call("DELETE", f"/schedule/{schedule_id}/courses/{ids[old_id]}")
+        await client.call("POST", f"/schedule/{schedule_id}/courses",
+                          json={"schedule_id": str(schedule_id), "section_id": new_id})
+
+
+async def swap_bulk(client: Client, schedule_id: int, old: list[str], new: list[str]) -> None:
+    await client.call("POST", f"/schedule/{schedule_id}/courses/bulk", json={"operations": [
+        {"op": "remove", "section_ids": old}, {"op": "add", "section_ids": new},
+    ]})
+
+
+def summary(label: str, samples: list[float], requests: int, rounds: int) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<34} {requests / rounds:5.0f} requests   p50 {statistics.median(ordered):7.2f} ms   "
+          f"p99 {p99:7.2f} ms")
+
+
+async def run(token: str, schedule_ids: list[int], rounds: int) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        async def measure(label: str, scenario, setup=None, check=None) -> None:
+            client = Client(http, token)
+            samples = []
+            for i in range(rounds):
+                if setup:
+                    await setup(i)
+                start = time.perf_counter()
+                await scenario(client, i)
+                samples.append((time.perf_counter() - start) * 1000)
+                if check:
+                    await check(i)
+            summary(label, samples, client.requests, rounds)
+
+        expected = await load_one_by_one(Client(http, token))
+        assert await load_included(Client(http, token)) == expected
+        await measure("load: N+1 requests", lambda c, i: load_one_by_one(c))
+        await measure("load: ?include=courses", lambda c, i: load_included(c))
+
+        # Each round builds a fresh schedule of SECTIONS sections, or swaps half of one
+        target = schedule_ids[0]
+        setup_client = Client(http, token)
+        half = SECTIONS // 2
+
+        def sections(i: int) -> list[str]:
+            return [f"r{i}-{n}" for n in range(SECTIONS)]
+
+        def swapped(i: int) -> list[str]:
+            return [f"n{i}-{n}" for n in range(half)]
+
+        async def empty(i: int) -> None:
+            await setup_client.call("POST", f"/schedule/{target}/courses/bulk",
+                                    json={"operations": [{"op": "replace", "section_ids": []}]})
+
+        async def full(i: int) -> None:
+            await setup_client.call("POST", f"/schedule/{target}/courses/bulk",
+                                    json={"operations": [{"op": "replace", "section_ids": sections(i)}]})
+
+        async def check_built(i: int) -> None:
+            assert (await load_included(setup_client))[target] == sections(i)
+
+        async def check_swapped(i: int) -> None:
+            assert (await load_included(setup_client))[target] == sections(i)[half:] + swapped(i)
+
+        for mode, build, swap in (("one by one", build_one_by_one, swap_one_by_one), ("bulk", build_bulk, swap_bulk)):
+            await measure(f"build {SECTIONS} sections: {mode}", lambda c, i: build(c, target, sections(i)),
+                          empty, check_built)
+            await measure(f"swap {half} sections: {mode}", lambda c, i: swap(c, target, sections(i)[:half], swapped(i)),
+                          full, check_swapped)
+    await database.dispose_async_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        database.engine = schedule_courses.engine = database.make_engine(url)
+        database.async_engine = database.make_async_engine(url)
+        database.async_read_engine = database.make_async_engine(url, read_only=True)
+        user_cache.db, user_cache.async_db = database.engine, database.async_engine
+        SQLModel.metadata.create_all(database.engine)
+        with database.engine.begin() as conn:
+            conn.execute(insert(UserProfileDB), [{
+                "netid": NETID, "name": NETID, "email": f"{NETID}@u.northwestern.edu", "hashed_password": "",
+                "majors": [], "minors": [], "classes_already_taken": [],
+            }])
+            conn.execute(insert(ScheduleDB), [
+                {"netid": NETID, "name": f"Plan {n}", "term": "4960", "created": "", "updated": ""}
+                for n in range(SCHEDULES)
+            ])
+            schedule_ids = sorted(row.id for row in conn.execute(ScheduleDB.__table__.select()))
+            conn.execute(insert(ScheduleCoursesDB), [
+                {"schedule_id": str(schedule_id), "section_id": f"s{schedule_id}-{n}"}
+                for schedule_id in schedule_ids for n in range(SECTIONS)
+            ])
+        token = create_access_token(data={"sub": NETID})
+
+        print(f"1 user, {SCHEDULES} schedules x {SECTIONS} sections, {args.rounds} rounds per row\n")
+        asyncio.run(run(token, schedule_ids, args.rounds))
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark the schedule generator on synthetic catalogs.
+
+Sections (meeting patterns and instructors) are drawn from a synthetic catalog
+(scripts.generate_catalog), then grouped into courses with many sections each
+to build worst cases: 8 candidate courses with 10+ sections, up to all 8
+required at once. Each scenario reports search latency, how often the search
+finished inside its time budget, and for searches cut short, how often the
+best schedule returned was already the optimum. Small
+instances are also checked against brute-force enumeration. Run from the
+backend/ directory:
+
+    python -m benchmarks.bench_schedule_generator [--trials 200]
+"""
+import argparse
+import itertools
+import random
+
+from app.services.catalog_store import _meetings, _union_mask
+from app.services.schedule_generator import Preferences, build_choices, generate_schedules
+from benchmarks.bench_requirements import report, time_per_call
+from scripts.generate_catalog import generate
+
+# (label, candidate courses, sections per course, target courses, required courses, earliest class time)
+SCENARIOS = [
+    ("4 of 8 courses, 10 sections", 8, 10, 4, 0, None),
+    ("4 of 8 courses, 10 sections, 2 locked", 8, 10, 4, 2, None),
+    ("6 of 8 courses, 15 sections, after 10:00", 8, 15, 6, 0, "10:00"),
+    ("8 of 8 courses, 12 sections", 8, 12, 8, 8, None),
+    ("8 of 8 courses, 20 sections", 8, 20, 8, 8, None),
+    ("5 of 12 courses, 12 sections", 12, 12, 5, 1, None),
+]
+
+
+def section_pool(seed: int) -> list[tuple[int, list[str]]]:
+    snapshot = generate(3000, seed)
+    return [
+        (_union_mask(_meetings(section, 0)), [instructor["name"] for instructor in section["instructors"]])
+        for section in snapshot["sections"]
+    ]
+
+
+def synthetic_request(pool, rng: random.Random, course_count: int, sections: int, required: int, earliest):
+    """Candidate courses with `sections` sections each, plus preferences over their instructors."""
+    masks, catalog = {}, []
+    for c in range(course_count):
+        course_sections = []
+        for s in range(sections):
+            mask, instructors = rng.choice(pool)
+            section_id = f"C{c}-{s}"
+            masks[section_id] = mask
+            course_sections.append({"section_id": section_id, "component": "LEC", "instructors": instructors})
+        catalog.append(course_sections)
+    names = [name for course in catalog for section in course for name in section["instructors"]]
+    preferences = Preferences(earliest, rng.sample(names, 3), rng.sample(names, 3))
+    return [
+        build_choices(f"COURSE {c}", course_sections, masks, preferences, priority=c, required=c < required)
+        for c, course_sections in enumerate(catalog)
+    ]
+
+
+def brute_force_best(courses, target: int) -> float:
+    best = float("-inf")
+    required = [course for course in courses if course.required]
+    optional = [course for course in courses if not course.required]
+    for subset in itertools.combinations(optional, target - len(required)):
+        for picks in itertools.product(*(course.options for course in required + list(subset))):
+            union = 0
+            for option in picks:
+                if union & option.mask:
+                    break
+                union |= option.mask
+            else:
+                best = max(best, sum(option.score for option in picks))
+    return best
+
+
+def check_against_brute_force(pool, rng: random.Random, trials: int) -> None:
+    for _ in range(trials):
+        courses = synthetic_request(pool, rng, 6, 4, 1, None)
+        result = generate_schedules(courses, 3, top_k=3, time_budget_ms=10_000)
+        expected = brute_force_best(courses, 3)
+        found = result.schedules[0].score if result.schedules else float("-inf")
+        assert abs(found - expected) < 1e-3 or found == expected, (found, expected)
+        for schedule in result.schedules:
+            union = 0
+            for option in schedule.options:
+                assert not union & option.mask
+                union |= option.mask
+    print(f"matched brute force on {trials} small instances\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=150)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = section_pool(args.seed)
+    print(f"{len(pool)} sections in the pool\n")
+    check_against_brute_force(pool, rng, 50)
+
+    for label, course_count, sections, target, required, earliest in SCENARIOS:
+        requests = [synthetic_request(pool, rng, course_count, sections, required, earliest) for _ in range(args.trials)]
+        results = []
+        samples = time_per_call(
+            lambda courses: results.append(generate_schedules(courses, target, args.top_k, args.budget_ms)), requests
+        )
+        report(label, samples)
+        complete = sum(result.complete for result in results)
+        found = sum(bool(result.schedules) for result in results)
+        nodes = sorted(result.nodes for result in results)
+        print(f"{'':<44} finished in budget {complete}/{len(results)}, feasible {found}/{len(results)}, "
+              f"median nodes {nodes[len(nodes) // 2]:,}, max nodes {nodes[-1]:,}")
+        cut_short = [(courses, result) for courses, result in zip(requests, results) if not result.complete]
+        if cut_short:
+            optimal = 0
+            for courses, result in cut_short:
+                exhaustive = generate_schedules(courses, target, args.top_k, time_budget_ms=60_000)
+                optimal += bool(result.schedules) and result.schedules[0].score == exhaustive.schedules[0].score
+            print(f"{'':<44} cut short: best schedule optimal in {optimal}/{len(cut_short)}")
+
+
+if __name__ == "__main__":
+    main()
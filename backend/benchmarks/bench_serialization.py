@@ -0,0 +1,111 @@
+"""
+Benchmark the per-row cost of returning schedules as JSON, from the query
+to the response body.
+
+Fills a temporary SQLite database with one student's schedules, then times
+each way of turning them into a response body:
+
+- before: ORM objects -> .dict() -> jsonable_encoder -> stdlib json (what
+  GET /schedule did, through FastAPI's default JSONResponse);
+- response model: the same ORM objects through a precompiled ModelJSON
+  (pydantic-core validates and writes the JSON);
+- columns + orjson: plain column rows from SQL, encoded by orjson (what
+  GET /schedule does now);
+- streamed: the same rows written as a JSON array batch by batch
+  (serialization.stream_rows, as GET /admin/degree-audits/results uses).
+
+Each line is the median over --repeats runs divided by the row count, for
+the whole path and for encoding alone. Run from the backend/ directory:
+
+    python -m benchmarks.bench_serialization [--rows 1000,10000 --repeats 30]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.db_models import ScheduleDB
+from app.routers.schedule import SCHEDULE_COLUMNS
+from app.schemas.schedule import ScheduleResponse
+from app.services.serialization import ModelJSON, dump_json, json_array_chunks, row_dicts
+
+SCHEDULES_JSON = ModelJSON(list[ScheduleResponse])
+
+
+def per_row_us(fn, rows: int, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) / rows * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=lambda text: [int(n) for n in text.split(",")], default=[1000, 10000])
+    parser.add_argument("--repeats", type=int, default=30)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            SQLModel.metadata.create_all(db)
+            with db.begin() as conn:
+                conn.execute(insert(ScheduleDB), [
+                    {"netid": "bench", "name": f"Plan {i}", "term": "2025 Fall",
+                     "created": "2025-05-01T12:00:00", "updated": "2025-05-02T08:30:00"}
+                    for i in range(rows)
+                ])
+            orm_statement = select(ScheduleDB).where(ScheduleDB.netid == "bench")
+            column_statement = select(*SCHEDULE_COLUMNS).where(ScheduleDB.netid == "bench")
+
+            def load_orm():
+                with Session(db) as session:
+                    return session.exec(orm_statement).all()
+
+            def load_columns():
+                with db.connect() as conn:
+                    result = conn.execute(column_statement)
+                    return tuple(result.keys()), result.all()
+
+            def encode_before(schedules):
+                return JSONResponse(jsonable_encoder([s.dict() for s in schedules])).body
+
+            def encode_columns(keys, column_rows):
+                return dump_json(row_dicts(keys, column_rows))
+
+            def encode_streamed(keys, column_rows):
+                batches = (column_rows[i:i + 1000] for i in range(0, len(column_rows), 1000))
+                return b"".join(json_array_chunks(keys, batches))
+
+            schedules, (keys, column_rows) = load_orm(), load_columns()
+            # Every path must produce the same document
+            expected = orjson.loads(encode_before(schedules))
+            assert orjson.loads(SCHEDULES_JSON.dump(schedules)) == [{**row, "courses": None} for row in expected]
+            assert orjson.loads(encode_columns(keys, column_rows)) == expected
+            assert orjson.loads(encode_streamed(keys, column_rows)) == expected
+
+            print(f"{rows} schedules, per row:")
+            paths = (
+                ("before (ORM, .dict, jsonable_encoder, json)", lambda: encode_before(load_orm()), lambda: encode_before(schedules)),
+                ("response model (ORM, ModelJSON)", lambda: SCHEDULES_JSON.dump(load_orm()), lambda: SCHEDULES_JSON.dump(schedules)),
+                ("columns + orjson", lambda: encode_columns(*load_columns()), lambda: encode_columns(keys, column_rows)),
+                ("columns, streamed array", lambda: encode_streamed(*load_columns()), lambda: encode_streamed(keys, column_rows)),
+            )
+            for label, whole, encode in paths:
+                print(f"  {label:<46} total {per_row_us(whole, rows, args.repeats):7.2f} us   "
+                      f"encode {per_row_us(encode, rows, args.repeats):7.2f} us")
+            print()
+            db.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark mixed reads and writes against one SQLite file from several worker
+processes, with the old engine setup and with the tuned one.
+
+Each worker process (standing in for a uvicorn worker) runs a loop of
+operations for a fixed time: mostly reads (load a user and their schedules),
+some writes (update a user and append to the invalidation log, in one
+transaction). Modes:
+
+- default: `create_engine(url)` with SQLite's defaults (rollback journal,
+  synchronous=FULL), as database.py used to build it;
+- tuned: `app.database.make_engine` (WAL, synchronous=NORMAL, busy_timeout,
+  cache and mmap sizes, pooled), with reads on the read-only engine.
+
+Reports operations per second, read and write latency percentiles, and how
+many operations failed with "database is locked". Run from the backend/
+directory:
+
+    python -m benchmarks.bench_sqlite_concurrency [--workers 4 --seconds 5 --write-ratio 0.2]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.database import make_engine
+from app.models.db_models import ScheduleDB, UserInvalidationDB, UserProfileDB
+
+USERS = 2000
+
+
+def populate(url: str) -> None:
+    db = create_engine(url)
+    SQLModel.metadata.create_all(db)
+    with db.begin() as conn:
+        conn.execute(insert(UserProfileDB), [
+            {"netid": f"user{i}", "name": f"User {i}", "email": f"user{i}@u.northwestern.edu", "hashed_password": "",
+             "majors": ["Computer Science"], "minors": [], "classes_already_taken": ["COMP_SCI 211-0"]}
+            for i in range(USERS)
+        ])
+        conn.execute(insert(ScheduleDB), [
+            {"netid": f"user{i}", "name": "Fall", "term": "4960", "created": "", "updated": ""} for i in range(USERS)
+        ])
+    db.dispose()
+
+
+def worker(args: tuple) -> dict:
+    mode, url, seconds, write_ratio, seed, start_at = args
+    if mode == "tuned":
+        writer, reader = make_engine(url), make_engine(url, read_only=True)
+    else:
+        writer = reader = create_engine(url)
+    rng = random.Random(seed)
+    reads, writes, locked = [], [], 0
+
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        netid = f"user{rng.randrange(USERS)}"
+        is_write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if is_write:
+                with Session(writer) as session:
+                    session.execute(update(UserProfileDB).where(UserProfileDB.netid == netid)
+                                    .values(name=f"User {rng.random():.6f}"))
+                    session.execute(insert(UserInvalidationDB), [{"netid": netid, "created_at": time.time()}])
+                    session.commit()
+            else:
+                with Session(reader) as session:
+                    session.get(UserProfileDB, netid)
+                    session.exec(select(ScheduleDB).where(ScheduleDB.netid == netid)).all()
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+            continue
+        (writes if is_write else reads).append((time.perf_counter() - started) * 1000)
+
+    writer.dispose()
+    reader.dispose()
+    return {"reads": reads, "writes": writes, "locked": locked}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    print(f"{args.workers} worker processes, {args.write_ratio:.0%} writes, {args.seconds:.0f} s per mode, "
+          f"{os.cpu_count()} CPUs\n")
+    context = multiprocessing.get_context("spawn")
+    for mode in ("default", "tuned"):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            populate(url)
+            with context.Pool(args.workers) as pool:
+                start_at = time.time() + 2  # let every process finish importing first
+                jobs = [(mode, url, args.seconds, args.write_ratio, args.seed + i, start_at) for i in range(args.workers)]
+                results = pool.map(worker, jobs)
+        reads = [ms for result in results for ms in result["reads"]]
+        writes = [ms for result in results for ms in result["writes"]]
+        locked = sum(result["locked"] for result in results)
+        print(f"{mode:<8} {(len(reads) + len(writes)) / args.seconds:8.0f} ops/s   "
+              f"read p50 {statistics.median(reads):6.2f} p99 {percentile(reads, 0.99):7.2f} ms   "
+              f"write p50 {statistics.median(writes):6.2f} p99 {percentile(writes, 0.99):7.2f} ms   "
+              f"locked errors {locked}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark worker startup: importing the app, then loading its reference
+data from source and from the reference artifact.
+
+Imports: runs `python -X importtime -c "import app.main"` in --runs fresh
+interpreters (real OpenAI mode with a placeholder key; nothing is called)
+and reports the median time to import app.main and the slowest top-level
+packages (each counted where it is first imported). Exits with status 1 if
+the median exceeds --max-import-ms, if it is more than --threshold slower
+than the --baseline report, or if app.main imports a module that should
+load on first use (DEFERRED).
+
+Reference data: fills a temporary database with a synthetic catalog of
+--courses courses (0 skips this part) and times loading the requirement
+engine and the prerequisite graph by compiling them, and from an artifact
+built by scripts/build_reference_artifact.py. Run from the backend/
+directory:
+
+    python -m benchmarks.bench_startup [--runs 7 --max-import-ms 2000 --courses 10000]
+    python -m benchmarks.bench_startup --output base.json; ...; python -m benchmarks.bench_startup --baseline base.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Heavy SDKs the app imports on first use, never at startup
+DEFERRED = ("openai", "numpy")
+MAX_IMPORT_MS = 2000.0
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile() -> dict[str, int]:
+    """Cumulative microseconds per module for one fresh `import app.main`."""
+    env = {**os.environ, "OPENAI_FAKE": "false", "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-startup-bench")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise SystemExit(f"import app.main failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules
+
+
+def median_ms(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def reference_loads(courses: int, repeats: int, seed: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["REFERENCE_ARTIFACT_PATH"] = artifact = os.path.join(tmp, "reference.bin")
+        from sqlmodel import Session
+        from app.database import engine, init_db, read_engine
+        from app.services.catalog_store import load_catalog
+        from app.services.prereq_graph import PrereqGraph, load_prereq_graph
+        from app.services.reference_artifact import ReferenceArtifact
+        from app.services.requirements_engine import RequirementsEngine
+        from scripts.generate_catalog import generate
+
+        init_db()
+        load_catalog(generate(courses, seed), engine)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "scripts.build_reference_artifact", "--out", artifact],
+                       cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+        build_s = time.perf_counter() - start
+
+        def graph_from_source():
+            with Session(read_engine) as session:
+                return load_prereq_graph(session)
+
+        results = {
+            "requirements_source_ms": median_ms(RequirementsEngine.load, repeats),
+            "requirements_artifact_ms": median_ms(lambda: RequirementsEngine.from_artifact(ReferenceArtifact(Path(artifact))), repeats),
+            "prereq_graph_source_ms": median_ms(graph_from_source, repeats),
+            "prereq_graph_artifact_ms": median_ms(lambda: PrereqGraph.from_artifact(ReferenceArtifact(Path(artifact))), repeats),
+            "artifact_build_s": build_s,
+            "artifact_mb": os.path.getsize(artifact) / 1e6,
+        }
+        engine.dispose()
+        read_engine.dispose()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-import-ms", type=float, default=MAX_IMPORT_MS)
+    parser.add_argument("--baseline", type=Path, help="a previous --output report to compare the import time with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown relative to --baseline")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--courses", type=int, default=10000, help="synthetic catalog size (0 skips reference data)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=25)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = sorted((profile["app.main"] / 1000, i) for i, profile in enumerate(profiles))
+    import_ms, median_run = totals[len(totals) // 2]
+    packages = sorted(
+        ((name, us) for name, us in profiles[median_run].items() if "." not in name and name != "app"),
+        key=lambda item: -item[1],
+    )
+    print(f"import app.main: median {import_ms:.0f} ms over {args.runs} runs "
+          f"(min {totals[0][0]:.0f}, max {totals[-1][0]:.0f})")
+    for name, us in packages[:10]:
+        print(f"  {name:<20} {us / 1000:7.1f} ms")
+
+    failures = []
+    eager = [name for name in DEFERRED if name in profiles[median_run]]
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"import time {import_ms:.0f} ms exceeds {args.max_import_ms:.0f} ms")
+    if args.baseline:
+        baseline_ms = json.loads(args.baseline.read_text())["import_ms"]
+        if import_ms > baseline_ms * (1 + args.threshold):
+            failures.append(f"import time {import_ms:.0f} ms is {import_ms / baseline_ms - 1:.0%} slower "
+                            f"than the baseline's {baseline_ms:.0f} ms")
+
+    report = {"import_ms": import_ms, "runs": args.runs, "packages_ms": {name: us / 1000 for name, us in packages[:10]}}
+    if args.courses:
+        loads = reference_loads(args.courses, args.repeats, args.seed)
+        report["reference"] = loads
+        print(f"\nreference data, {args.courses}-course catalog "
+              f"(artifact {loads['artifact_mb']:.1f} MB, built in {loads['artifact_build_s']:.1f}s):")
+        for label, key in (("requirement engine", "requirements"), ("prerequisite graph", "prereq_graph")):
+            print(f"  {label:<20} compiled {loads[key + '_source_ms']:8.2f} ms   "
+                  f"artifact {loads[key + '_artifact_ms']:8.2f} ms")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
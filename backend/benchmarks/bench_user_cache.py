@@ -0,0 +1,96 @@
+"""
+Benchmark `/auth/me` throughput with and without the authenticated-user cache.
+
+Runs the app in-process (httpx over ASGI) against a temporary SQLite database
+with synthetic users, sending concurrent `/auth/me` requests for a random mix
+of them. Each mode reports requests per second and latency percentiles; the
+cached run also prints the cache's hit rate and estimated query time saved.
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_user_cache [--requests 5000 --users 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Importing the app builds the OpenAI client; the benchmark never calls it
+os.environ.setdefault("OPENAI_FAKE", "true")
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import SQLModel, create_engine
+
+from app import database
+from app.auth.security import create_access_token
+from app.auth.user_cache import user_cache
+from app.main import app
+from app.models.db_models import UserProfileDB
+
+
+async def run(tokens: list[str], requests: int, concurrency: int, seed: int) -> tuple[float, list[float]]:
+    rng = random.Random(seed)
+    order = [rng.choice(tokens) for _ in range(requests)]
+    latencies: list[float] = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker(batch: list[str]) -> None:
+            for token in batch:
+                start = time.perf_counter()
+                response = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(order[i::concurrency]) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    # Pooled aiosqlite connections belong to this event loop
+    await database.async_engine.dispose()
+    return requests / elapsed, latencies
+
+
+def describe(label: str, throughput: float, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<10} {throughput:9.0f} req/s   p50 {statistics.median(ordered):6.2f} ms   p99 {p99:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db = create_engine(url)
+        SQLModel.metadata.create_all(db)
+        netids = [f"user{i}" for i in range(args.users)]
+        with db.begin() as conn:
+            conn.execute(insert(UserProfileDB), [
+                {"netid": netid, "name": netid, "email": f"{netid}@u.northwestern.edu", "hashed_password": "",
+                 "majors": ["Computer Science"], "minors": [], "classes_already_taken": ["COMP_SCI 211-0"]}
+                for netid in netids
+            ])
+        tokens = [create_access_token(data={"sub": netid}) for netid in netids]
+        user_cache.db, user_cache.async_db = db, database.make_async_engine(url)
+        database.async_engine = user_cache.async_db
+
+        print(f"{args.requests} requests over {args.users} users, concurrency {args.concurrency}\n")
+        for label, enabled in (("no cache", False), ("cache", True)):
+            user_cache.enabled = enabled
+            user_cache.clear()
+            throughput, latencies = asyncio.run(run(tokens, args.requests, args.concurrency, args.seed))
+            describe(label, throughput, latencies)
+        stats = user_cache.stats()
+        print(f"\nhit rate {stats['hit_rate']:.1%}, mean miss query {stats['mean_miss_query_ms']} ms, "
+              f"saved {stats['saved_query_seconds']} s of queries")
+        db.dispose()
+
+
+if __name__ == "__main__":
+    main()
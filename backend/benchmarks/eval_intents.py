@@ -0,0 +1,84 @@
+"""
+Offline evaluation of the local intent classifier.
+
+Reports accuracy, per-intent precision/recall, how many messages would fall
+back to the LLM at the configured confidence threshold, and per-message
+latency. Run from the backend/ directory:
+
+    python -m benchmarks.eval_intents [--dataset data/intents/eval.jsonl]
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.config.settings import settings
+from app.services.intent_classifier import IntentClassifier
+
+DATASET = Path(__file__).resolve().parents[1] / "data" / "intents" / "eval.jsonl"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", type=Path, default=DATASET)
+    parser.add_argument("--threshold", type=float, default=settings.intent_confidence_threshold)
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes over the dataset")
+    args = parser.parse_args()
+
+    classifier = IntentClassifier.load()
+    if classifier is None:
+        raise SystemExit("No intent model found; run `python -m scripts.train_intent_model` first")
+    with open(args.dataset) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    correct = confident = confident_correct = 0
+    predicted, actual, hits = Counter(), Counter(), Counter()
+    errors = []
+    for row in rows:
+        result = classifier.classify(row["text"])
+        predicted[result.intent] += 1
+        actual[row["intent"]] += 1
+        if result.intent == row["intent"]:
+            correct += 1
+            hits[row["intent"]] += 1
+        else:
+            errors.append((row["text"], row["intent"], result.intent, result.confidence))
+        if result.confidence >= args.threshold:
+            confident += 1
+            confident_correct += result.intent == row["intent"]
+
+    latencies = []
+    for _ in range(args.repeat):
+        for row in rows:
+            start = time.perf_counter()
+            classifier.classify(row["text"])
+            latencies.append((time.perf_counter() - start) * 1e6)
+
+    print(f"examples:            {len(rows)}")
+    print(f"accuracy:            {correct / len(rows):.3f}")
+    print(f"confident (>= {args.threshold}): {confident / len(rows):.3f} of messages, "
+          f"accuracy {confident_correct / max(confident, 1):.3f}")
+    print(f"llm fallback rate:   {1 - confident / len(rows):.3f}")
+    print(f"latency us:          p50 {statistics.median(latencies):.1f}  "
+          f"p99 {percentile(latencies, 99):.1f}  max {max(latencies):.1f}")
+    print()
+    print(f"{'intent':<28}{'precision':>10}{'recall':>10}")
+    for intent in classifier.intents:
+        precision = hits[intent] / predicted[intent] if predicted[intent] else 0.0
+        recall = hits[intent] / actual[intent] if actual[intent] else 0.0
+        print(f"{intent:<28}{precision:>10.2f}{recall:>10.2f}")
+    if errors:
+        print("\nmisclassified:")
+        for text, expected, got, confidence in errors:
+            print(f"  {text!r}: expected {expected}, got {got} ({confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Offline recall@k evaluation of the retrieval index: BM25 alone, vectors
+alone, and the two fused by reciprocal rank (what chat prompts use).
+
+Without --index, builds an index in memory from a synthetic catalog
+(scripts/generate_catalog.py) plus the real requirement groups. Queries are
+derived from documents with a known answer, in three styles:
+
+- code: "prerequisites for COMP_SCI 214" (the course's code, no suffix);
+- topic: a few title and description words, some cut to a prefix the way
+  people abbreviate ("stat", "algo"), in shuffled order;
+- requirement: a question naming a program and one of its groups.
+
+--queries takes a JSONL file of {"query", "relevant": [document ids]} rows
+instead, e.g. hand-labeled questions against the built index. Run from the
+backend/ directory:
+
+    python -m benchmarks.eval_retrieval [--courses 12000 --queries-per-style 300] [--index data/retrieval]
+"""
+import argparse
+import json
+import random
+import re
+from pathlib import Path
+
+from app.config.settings import settings
+from app.services.embeddings import get_embedder
+from app.services.requirements_engine import REQUIREMENTS_PATH
+from app.services.retrieval import MODES, Document, RetrievalIndex, course_documents, requirement_documents, tokenize
+from scripts.generate_catalog import generate
+
+KS = (1, 5, 10)
+_WORD = re.compile(r"[A-Za-z]{3,}")
+
+
+def synthetic_documents(courses: int, seed: int) -> list[Document]:
+    snapshot = generate(courses, seed)
+    rows = [{"code": c["id"], "title": c["name"], "description": c["description"], "prereq_text": c["prereqs"]}
+            for c in snapshot["courses"]]
+    with open(REQUIREMENTS_PATH) as f:
+        return course_documents(rows) + requirement_documents(json.load(f))
+
+
+def derived_queries(documents: list[Document], per_style: int, seed: int) -> list[tuple[str, str, set[str]]]:
+    """(style, query, relevant document ids)."""
+    rng = random.Random(seed)
+    courses = [d for d in documents if d.kind == "course"]
+    requirements = [d for d in documents if d.kind == "requirement"]
+    queries = []
+    for document in rng.sample(courses, min(per_style, len(courses))):
+        code = document.id.split(":", 1)[1].rsplit("-", 1)[0]
+        queries.append(("code", f"what are the prerequisites for {code}", {document.id}))
+    for document in rng.sample(courses, min(per_style, len(courses))):
+        words = list(dict.fromkeys(_WORD.findall(document.text.split(":", 1)[1].lower())))
+        picked = rng.sample(words, min(len(words), rng.randint(3, 5)))
+        picked = [w[:rng.randint(4, 5)] if len(w) > 6 and rng.random() < 0.4 else w for w in picked]
+        queries.append(("topic", "course about " + " ".join(picked), {document.id}))
+    for document in rng.sample(requirements, min(per_style, len(requirements))):
+        program, group = document.title.split(": ", 1)
+        queries.append(("requirement", f"which classes count for {group.lower()} in the {program}", {document.id}))
+    return queries
+
+
+def evaluate(index: RetrievalIndex, queries: list[tuple[str, str, set[str]]], candidates: int, rrf_k: int) -> None:
+    depth = max(KS)
+    styles = sorted({style for style, _, _ in queries})
+    print(f"{'mode':<8}{'style':<13}{'queries':>8}" + "".join(f"{f'R@{k}':>8}" for k in KS) + f"{'MRR':>8}")
+    for mode in MODES:
+        for style in styles + ["all"]:
+            rows = [q for q in queries if style in ("all", q[0])]
+            found = {k: 0.0 for k in KS}
+            reciprocal = 0.0
+            for _, query, relevant in rows:
+                ids = [hit.document.id for hit in index.search(query, depth, mode, candidates, rrf_k)]
+                for k in KS:
+                    found[k] += len(relevant.intersection(ids[:k])) / len(relevant)
+                rank = next((i for i, doc_id in enumerate(ids, start=1) if doc_id in relevant), None)
+                reciprocal += 1 / rank if rank else 0.0
+            print(f"{mode:<8}{style:<13}{len(rows):>8}" + "".join(f"{found[k] / len(rows):>8.3f}" for k in KS)
+                  + f"{reciprocal / len(rows):>8.3f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", type=Path, help="evaluate a built index instead of a synthetic one")
+    parser.add_argument("--queries", type=Path, help="JSONL of {query, relevant} rows")
+    parser.add_argument("--courses", type=int, default=12000)
+    parser.add_argument("--queries-per-style", type=int, default=300)
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--candidates", type=int, default=settings.retrieval_candidates)
+    parser.add_argument("--rrf-k", type=int, default=settings.retrieval_rrf_k)
+    parser.add_argument("--seed", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.index:
+        index = RetrievalIndex.load(args.index)
+        if index is None:
+            raise SystemExit(f"No index in {args.index}; run `python -m scripts.build_retrieval_index` first")
+    else:
+        index = RetrievalIndex.build(synthetic_documents(args.courses, args.seed), get_embedder(args.embedder, args.dim))
+    if args.queries:
+        with open(args.queries) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        queries = [("labeled", row["query"], set(row["relevant"])) for row in rows]
+    else:
+        queries = derived_queries(index.documents, args.queries_per_style, args.seed)
+    queries = [q for q in queries if tokenize(q[1])]
+
+    print(f"{len(index.documents):,} documents ({index.manifest['embedder']} vectors of {index.manifest['dim']}), "
+          f"{len(queries)} queries, {args.candidates} candidates per ranker, rrf_k {args.rrf_k}\n")
+    evaluate(index, queries, args.candidates, args.rrf_k)
+
+
+if __name__ == "__main__":
+    main()
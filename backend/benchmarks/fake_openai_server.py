@@ -0,0 +1,61 @@
+"""
+Fake OpenAI server for load tests: `POST /v1/chat/completions`, regular and
+streamed (Server-Sent Events, as the real API sends them), with the replies,
+usage and pacing of the in-process stand-in (app/services/fake_openai.py).
+
+Unlike OPENAI_FAKE=true, the app talks to it over HTTP through the real
+OpenAI client and its connection pool, so load tests cover that path too.
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1 (any
+OPENAI_API_KEY). benchmarks/load_test.py starts one itself. Run from the
+backend/ directory:
+
+    python -m benchmarks.fake_openai_server [--port 8100 --first-token-ms 200 --token-ms 20]
+"""
+import argparse
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.services.fake_openai import FakeAsyncOpenAI
+
+
+def make_app(first_token_ms: float, token_ms: float) -> FastAPI:
+    fake = FakeAsyncOpenAI(first_token_ms=first_token_ms, token_ms=token_ms)
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/health")
+    async def health():
+        return {"requests": app.state.requests}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        result = await fake.chat.completions.create(**body)
+        if not body.get("stream"):
+            return result.model_dump(exclude_unset=True)
+
+        async def events():
+            async for chunk in result:
+                yield f"data: {chunk.model_dump_json(exclude_unset=True)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=20, help="delay between streamed tokens")
+    args = parser.parse_args()
+    uvicorn.run(make_app(args.first_token_ms, args.token_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Load test: throughput and latency of the whole app under mixed workloads.
+
+Seeds a temporary SQLite database with synthetic students (UserProfileDB,
+majors and transcripts from the real requirements) and their schedules
+(ScheduleDB, ScheduleCoursesDB), starts benchmarks/fake_openai_server.py and
+points openai_service at it, then serves the app either in-process (httpx
+over ASGI, one event loop, like one uvicorn worker) or under uvicorn. Each
+virtual user is signed in as its own student and runs scenarios back to back,
+picked at random by weight:
+
+- me: GET /auth/me;
+- profile: GET /profile/me, then PUT /profile/me (audits the programs);
+- schedules: GET /schedule?include=courses, then POST, GET and DELETE one;
+- chat: POST /chat/stream, read to the last event;
+- login: POST /auth/login (bcrypt in the password pool).
+
+Every concurrency level runs for --seconds after a warmup and reports
+throughput plus p50/p95/p99 per request as JSON (and the server-measured
+time to first chat token). The load generator shares the machine with the
+server, so compare runs made on the same hardware.
+
+`compare` diffs two reports level by level and exits with status 1 when
+throughput fell, or a latency percentile rose, by more than --threshold.
+Run from the backend/ directory:
+
+    python -m benchmarks.load_test run [--server uvicorn --workers 2 --concurrency 1,8,32 --output new.json]
+    python -m benchmarks.load_test compare base.json new.json [--threshold 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+
+PASSWORD = "load test password"
+SCENARIOS = ("me", "profile", "schedules", "chat", "login")
+DEFAULT_WEIGHTS = "me=40,profile=20,schedules=20,chat=15,login=5"
+PERCENTILES = (50, 95, 99)
+# Report fields that must match for two runs to be comparable
+SETUP_KEYS = ("server", "workers", "cpus", "users", "weights", "seconds", "first_token_ms", "token_ms", "bcrypt_rounds")
+CHAT_TOPICS = ("machine learning", "databases", "statistics", "economics", "writing", "security", "biology", "design")
+
+
+def parse_weights(text: str) -> dict[str, float]:
+    weights = {}
+    for part in filter(None, text.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Seeding
+
+def seed_database(url: str, users: int, schedules_per_user: int, bcrypt_rounds: int, seed: int) -> list[dict]:
+    from sqlalchemy import insert
+    from sqlmodel import SQLModel, create_engine
+    from app.auth.security import get_password_hash
+    from app.models.db_models import ScheduleCoursesDB, ScheduleDB, UserProfileDB
+    from benchmarks.bench_cohort_queries import synthetic_profiles
+
+    rng = random.Random(seed)
+    profiles = synthetic_profiles(users, seed)
+    hashed = get_password_hash(PASSWORD, bcrypt_rounds)  # One hash for everyone: seeding stays fast
+    db = create_engine(url)
+    SQLModel.metadata.create_all(db)
+    with db.begin() as conn:
+        conn.execute(insert(UserProfileDB), [{**profile, "hashed_password": hashed} for profile in profiles])
+        schedules = [
+            {"id": i * schedules_per_user + j + 1, "netid": profile["netid"], "name": f"Plan {j + 1}",
+             "term": "2025 Fall", "created": "2025-05-01", "updated": "2025-05-01"}
+            for i, profile in enumerate(profiles) for j in range(schedules_per_user)
+        ]
+        if schedules:
+            conn.execute(insert(ScheduleDB), schedules)
+            conn.execute(insert(ScheduleCoursesDB), [
+                {"schedule_id": str(schedule["id"]), "section_id": str(rng.randint(10000, 99999))}
+                for schedule in schedules for _ in range(rng.randint(2, 5))
+            ])
+    db.dispose()
+    return profiles
+
+
+# Servers
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"{url} exited with status {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"{url} not ready after {timeout:.0f}s")
+
+
+def start_process(*args: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], env=os.environ.copy(), cwd=Path(__file__).resolve().parents[1])
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+@asynccontextmanager
+async def app_client(server: str, workers: int, timeout: float):
+    """An httpx client for the app, in-process or under uvicorn."""
+    if server == "inprocess":
+        from app.main import app
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=timeout) as client:
+                yield client
+        return
+
+    port = free_port()
+    process = start_process("uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+                            "--workers", str(workers), "--log-level", "warning")
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        await wait_until_ready(f"{base_url}/docs", process)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+            yield client
+    finally:
+        stop_process(process)
+
+
+# Workload
+
+class Results:
+    """Latencies (ms) and error counts per request label, for one concurrency level."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.first_token: list[float] = []  # Chat time to first token as the server measured it
+        self.recording = False
+
+    def add(self, label: str, started: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        if ok:
+            self.latencies.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+        else:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, student: dict, token: str, results: Results, rng: random.Random, index: int):
+        self.client = client
+        self.student = student
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.results = results
+        self.rng = rng
+        self.next_schedule_id = 10_000_000 * (index + 1)  # Above the seeded ids, distinct per user
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.results.add(label, started, False)
+            return None
+        self.results.add(label, started, response.is_success)
+        return response
+
+    async def me(self) -> None:
+        await self.request("GET /auth/me", "GET", "/auth/me")
+
+    async def profile(self) -> None:
+        await self.request("GET /profile/me", "GET", "/profile/me")
+        profile = {key: value for key, value in self.student.items() if key not in ("name", "email", "hashed_password")}
+        profile["earliest_class_time"] = self.rng.choice((None, "09:00", "10:00"))
+        await self.request("PUT /profile/me", "PUT", "/profile/me", json=profile)
+
+    async def schedules(self) -> None:
+        await self.request("GET /schedule?include=courses", "GET", "/schedule", params={"include": "courses"})
+        self.next_schedule_id += 1
+        schedule_id = self.next_schedule_id
+        await self.request("POST /schedule", "POST", "/schedule", json={
+            "id": schedule_id, "netid": self.student["netid"], "name": "Load test", "term": "2025 Fall",
+            "created": "2025-05-02", "updated": "2025-05-02",
+        })
+        await self.request("GET /schedule/{id}", "GET", f"/schedule/{schedule_id}")
+        await self.request("DELETE /schedule/{id}", "DELETE", f"/schedule/{schedule_id}")
+
+    async def chat(self) -> None:
+        # A new question every time, so the response cache does not answer it
+        message = (f"I'm thinking about {self.rng.choice(CHAT_TOPICS)}; how should I balance "
+                   f"{self.rng.randint(3, 5)} classes and a {self.rng.randint(5, 20)} hour job next quarter?")
+        label, started, ok, done = "POST /chat/stream", time.perf_counter(), False, None
+        try:
+            async with self.client.stream("POST", "/chat/stream", headers=self.headers, json={
+                "message": message, "user_id": self.student["netid"],
+            }) as response:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: ") and event in ("done", "error"):
+                        done = json.loads(line[len("data: "):]) if event == "done" else None
+                        ok = event == "done"
+                ok = ok and response.is_success
+        except httpx.HTTPError:
+            ok = False
+        self.results.add(label, started, ok)
+        if done and self.results.recording:
+            # From the server, so it holds even where the transport buffers the stream (in-process)
+            self.results.first_token.append(done["timing"]["time_to_first_token_ms"])
+
+    async def login(self) -> None:
+        await self.request("POST /auth/login", "POST", "/auth/login",
+                           json={"email": self.student["email"], "password": PASSWORD})
+
+    async def run(self, weights: dict[str, float], stop: asyncio.Event) -> None:
+        names, cumulative = list(weights), list(weights.values())
+        while not stop.is_set():
+            await getattr(self, self.rng.choices(names, cumulative)[0])()
+
+
+async def run_level(client: httpx.AsyncClient, users: list[tuple[dict, str]], concurrency: int, weights: dict[str, float],
+                    warmup: float, seconds: float, seed: int) -> dict:
+    results = Results()
+    stop = asyncio.Event()
+    virtual_users = [
+        VirtualUser(client, *users[i % len(users)], results, random.Random(seed * 1000 + i), i) for i in range(concurrency)
+    ]
+    tasks = [asyncio.create_task(user.run(weights, stop)) for user in virtual_users]
+    await asyncio.sleep(warmup)
+    results.recording = True
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    results.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*tasks)
+    return summarize(concurrency, elapsed, results)
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def latency_summary(samples: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(samples)
+    summary = {"count": len(ordered), "errors": errors, "throughput_rps": round((len(ordered) + errors) / elapsed, 2)}
+    if ordered:
+        summary["mean_ms"] = round(statistics.fmean(ordered), 3)
+        summary.update({f"p{q}_ms": round(percentile(ordered, q), 3) for q in PERCENTILES})
+    return summary
+
+
+def summarize(concurrency: int, elapsed: float, results: Results) -> dict:
+    labels = sorted(set(results.latencies) | set(results.errors))
+    requests = {label: latency_summary(results.latencies.get(label, []), results.errors.get(label, 0), elapsed) for label in labels}
+    every = [ms for samples in results.latencies.values() for ms in samples]
+    level = {"concurrency": concurrency, "seconds": round(elapsed, 3),
+             **latency_summary(every, sum(results.errors.values()), elapsed), "requests": requests}
+    if results.first_token:
+        ordered = sorted(results.first_token)
+        level["chat_first_token"] = {f"p{q}_ms": round(percentile(ordered, q), 3) for q in PERCENTILES}
+    return level
+
+
+async def run_levels(args, profiles: list[dict], weights: dict[str, float]) -> list[dict]:
+    from app.auth.security import create_access_token
+    users = [(profile, create_access_token(data={"sub": profile["netid"]})) for profile in profiles]
+    levels = []
+    async with app_client(args.server, args.workers, args.timeout) as client:
+        for concurrency in args.concurrency:
+            level = await run_level(client, users, concurrency, weights, args.warmup, args.seconds, args.seed)
+            print(f"concurrency {concurrency:4d}: {level['throughput_rps']:9.1f} req/s   "
+                  f"p50 {level.get('p50_ms', 0):8.2f} ms   p95 {level.get('p95_ms', 0):8.2f} ms   "
+                  f"p99 {level.get('p99_ms', 0):8.2f} ms   errors {level['errors']}", file=sys.stderr)
+            levels.append(level)
+    return levels
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> None:
+    weights = parse_weights(args.weights)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        fake_port = free_port()
+        # Before anything imports the app's settings, here and in uvicorn's processes
+        os.environ.update({
+            "DATABASE_URL": url,
+            "OPENAI_FAKE": "false",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+            "OPENAI_API_KEY": "load-test",
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "RETRIEVAL_INDEX_DIR": os.path.join(tmp, "no-index"),
+        })
+        profiles = seed_database(url, args.users, args.schedules_per_user, args.bcrypt_rounds, args.seed)
+        fake = start_process("benchmarks.fake_openai_server", "--port", str(fake_port),
+                             "--first-token-ms", str(args.first_token_ms), "--token-ms", str(args.token_ms))
+        try:
+            asyncio.run(wait_until_ready(f"http://127.0.0.1:{fake_port}/health", fake))
+            print(f"{args.server} server{f', {args.workers} workers' if args.server == 'uvicorn' else ''}, "
+                  f"{args.users} users, {os.cpu_count()} CPUs, weights {weights}", file=sys.stderr)
+            started = time.time()
+            levels = asyncio.run(run_levels(args, profiles, weights))
+        finally:
+            stop_process(fake)
+
+    report = {
+        "meta": {
+            "commit": git_commit(), "started": started, "python": platform.python_version(), "cpus": os.cpu_count(),
+            "server": args.server, "workers": args.workers if args.server == "uvicorn" else 1, "users": args.users,
+            "weights": weights, "seconds": args.seconds, "first_token_ms": args.first_token_ms, "token_ms": args.token_ms,
+            "bcrypt_rounds": args.bcrypt_rounds, "seed": args.seed,
+        },
+        "levels": levels,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+# Comparison
+
+def change(base: float, new: float) -> float:
+    return (new - base) / base if base else 0.0
+
+
+def compare(args) -> None:
+    base, new = (json.loads(Path(path).read_text()) for path in (args.base, args.new))
+    new_levels = {level["concurrency"]: level for level in new["levels"]}
+    regressions = []
+
+    def check(where: str, base_stats: dict, new_stats: dict) -> list[str]:
+        notes = []
+        delta = change(base_stats["throughput_rps"], new_stats["throughput_rps"])
+        if delta < -args.threshold:
+            notes.append(f"throughput {delta:+.1%}")
+        for q in PERCENTILES:
+            key = f"p{q}_ms"
+            if key in base_stats and key in new_stats:
+                delta = change(base_stats[key], new_stats[key])
+                if delta > args.threshold and new_stats[key] - base_stats[key] > args.min_ms:
+                    notes.append(f"p{q} {delta:+.1%}")
+        base_rate = base_stats["errors"] / max(1, base_stats["count"] + base_stats["errors"])
+        new_rate = new_stats["errors"] / max(1, new_stats["count"] + new_stats["errors"])
+        if new_rate - base_rate > args.max_error_increase:
+            notes.append(f"errors {base_rate:.1%} -> {new_rate:.1%}")
+        regressions.extend(f"{where}: {note}" for note in notes)
+        return notes
+
+    def line(label: str, base_stats: dict, new_stats: dict, notes: list[str]) -> str:
+        cells = [f"{base_stats['throughput_rps']:9.1f} -> {new_stats['throughput_rps']:9.1f} req/s"]
+        cells += [f"p{q} {base_stats.get(f'p{q}_ms', 0):8.2f} -> {new_stats.get(f'p{q}_ms', 0):8.2f} ms" for q in PERCENTILES]
+        return f"  {label:<32} " + "   ".join(cells) + ("   REGRESSION: " + ", ".join(notes) if notes else "")
+
+    print(f"base {base['meta'].get('commit')} ({base['meta']['server']}), new {new['meta'].get('commit')} "
+          f"({new['meta']['server']}); flagging changes over {args.threshold:.0%}")
+    differing = [key for key in SETUP_KEYS if base["meta"].get(key) != new["meta"].get(key)]
+    if differing:
+        print(f"warning: the runs differ in {', '.join(differing)}, so not all changes are regressions")
+    for base_level in base["levels"]:
+        level = new_levels.get(base_level["concurrency"])
+        if level is None:
+            print(f"\nconcurrency {base_level['concurrency']}: not in the new run")
+            continue
+        print(f"\nconcurrency {level['concurrency']}")
+        print(line("all requests", base_level, level, check(f"c={level['concurrency']} all", base_level, level)))
+        for label, stats in base_level["requests"].items():
+            if label in level["requests"]:
+                notes = check(f"c={level['concurrency']} {label}", stats, level["requests"][label])
+                print(line(label, stats, level["requests"][label], notes))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+    print("\nno regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the load test and write a JSON report")
+    run_parser.add_argument("--server", choices=("inprocess", "uvicorn"), default="inprocess")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run_parser.add_argument("--concurrency", type=lambda text: [int(c) for c in text.split(",")], default=[1, 8, 32],
+                            help="virtual users per level, comma separated")
+    run_parser.add_argument("--seconds", type=float, default=10, help="measured time per level")
+    run_parser.add_argument("--warmup", type=float, default=2, help="unmeasured time before each level")
+    run_parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help="scenario weights, e.g. me=1,chat=1")
+    run_parser.add_argument("--users", type=int, default=200)
+    run_parser.add_argument("--schedules-per-user", type=int, default=2)
+    run_parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    run_parser.add_argument("--first-token-ms", type=float, default=200, help="fake OpenAI server latency")
+    run_parser.add_argument("--token-ms", type=float, default=20)
+    run_parser.add_argument("--timeout", type=float, default=60, help="per-request client timeout")
+    run_parser.add_argument("--seed", type=int, default=22)
+    run_parser.add_argument("--output", help="write the JSON report here instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="diff two reports and flag regressions")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="relative change that counts as a regression")
+    compare_parser.add_argument("--min-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    compare_parser.add_argument("--max-error-increase", type=float, default=0.01, help="error-rate rise that counts")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Copy profile list columns (majors, classes taken, ...) into the indexed
+profilelistitemdb table for every profile not mirrored there yet. Safe to
+re-run, and to run while the app is serving: profiles written by the app are
+already mirrored and are skipped. Run from the backend/ directory:
+
+    python -m scripts.backfill_profile_lists [--batch-size 2000]
+"""
+import argparse
+import time
+from sqlmodel import Session, SQLModel
+
+from app.database import engine
+from app.services.profile_lists import backfill
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=2000, help="profiles per transaction")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    start = time.perf_counter()
+    with Session(engine) as session:
+        synced = backfill(session, args.batch_size)
+    print(f"Mirrored {synced} profiles in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Audit every stored profile against the majors and minors it lists and write
+the results to the degreeauditdb table. Meant to run nightly from the
+backend/ directory:
+
+    python -m scripts.batch_audit [--batch-size 2000]
+"""
+import argparse
+from sqlmodel import Session, SQLModel
+
+from app.database import engine
+from app.services.batch_audit import audit_summary, run_batch_audit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=2000, help="profiles per streamed chunk")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    result = run_batch_audit(batch_size=args.batch_size)
+    print(f"Audited {result['students']} students ({result['program_audits']} program audits) "
+          f"in {result['seconds']}s, {result['students_per_second']} students/s")
+    with Session(engine) as session:
+        for entry in audit_summary(session):
+            print(f"  {entry['program_name']:<40} {entry['satisfied']:>6}/{entry['students']:<6} on track, "
+                  f"mean progress {entry['mean_progress']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Build the reference artifact (see app/services/reference_artifact.py): the
+compiled program requirements and the catalog's prerequisite graph in one
+memory-mapped file that workers load at startup instead of compiling. Run
+from the backend/ directory after loading the catalog or changing
+data/program_requirements.json; until then workers compile whichever part is
+out of date, as they do without an artifact:
+
+    python -m scripts.build_reference_artifact [--out data/reference.bin]
+"""
+import argparse
+import time
+from pathlib import Path
+from sqlmodel import Session
+
+from app.database import engine
+from app.services.prereq_graph import catalog_version, load_prereq_graph
+from app.services.reference_artifact import ArtifactWriter, ReferenceArtifact, artifact_path
+from app.services.requirements_engine import RequirementsEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=artifact_path())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    writer = ArtifactWriter()
+    requirements = RequirementsEngine.load()
+    requirements.write_artifact(writer)
+    with Session(engine) as session:
+        version = catalog_version(session)
+        graph = load_prereq_graph(session)
+    graph.write_artifact(writer, version)
+    size = writer.write(args.out)
+
+    ReferenceArtifact(args.out)  # Fails here, not in a worker, if the file cannot be read back
+    print(f"Wrote {len(requirements.programs)} programs and a {len(graph.interner)}-course prerequisite graph "
+          f"({size / 1e6:.1f} MB) to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Build the retrieval index (see app/services/retrieval.py) from the course
+catalog and data/program_requirements.json, embedding every document once.
+Courses come from the database, or from a paper.nu-style snapshot with
+--snapshot. Run from the backend/ directory after loading the catalog, and
+again whenever it changes:
+
+    python -m scripts.build_retrieval_index [--snapshot data/catalog.json] [--embedder hashing --dim 256]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models.db_models import CourseDB
+from app.services.embeddings import EMBEDDERS, get_embedder
+from app.services.requirements_engine import REQUIREMENTS_PATH, canonical_course_code
+from app.services.retrieval import INDEX_DIR, RetrievalIndex, course_documents, requirement_documents
+
+
+def snapshot_courses(path: Path) -> list[dict]:
+    with open(path) as f:
+        snapshot = json.load(f)
+    return [
+        {"code": canonical_course_code(course["id"]), "title": course.get("name"),
+         "description": course.get("description"), "prereq_text": course.get("prereqs")}
+        for course in snapshot.get("courses", [])
+    ]
+
+
+def database_courses() -> list[dict]:
+    with Session(engine) as session:
+        rows = session.exec(select(CourseDB.code, CourseDB.title, CourseDB.description, CourseDB.prereq_text)).all()
+    return [{"code": code, "title": title, "description": description, "prereq_text": prereqs}
+            for code, title, description, prereqs in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", type=Path, help="read courses from this catalog snapshot instead of the database")
+    parser.add_argument("--out", type=Path, default=INDEX_DIR)
+    parser.add_argument("--embedder", choices=sorted(EMBEDDERS), default="hashing")
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    courses = snapshot_courses(args.snapshot) if args.snapshot else database_courses()
+    with open(REQUIREMENTS_PATH) as f:
+        documents = course_documents(courses) + requirement_documents(json.load(f))
+    start = time.perf_counter()
+    index = RetrievalIndex.build(documents, get_embedder(args.embedder, args.dim))
+    index.save(args.out)
+    manifest = index.manifest
+    print(f"Indexed {len(courses)} courses and {len(documents) - len(courses)} requirement groups in "
+          f"{time.perf_counter() - start:.1f}s ({manifest['terms']} terms, {manifest['postings']} postings, "
+          f"{manifest['embedder']} vectors of {manifest['dim']}) into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Generate a synthetic paper.nu-style catalog snapshot for offline development
+and benchmarking. Every course code referenced by data/program_requirements.json
+is included, so audits and the catalog line up. Run from the backend/ directory:
+
+    python -m scripts.generate_catalog [--courses 12000] [--out data/catalog_synthetic.json]
+"""
+import argparse
+import json
+import random
+
+from app.services.requirements_engine import REQUIREMENTS_PATH, canonical_course_code
+
+TERMS = [("4950", "2025 Spring"), ("4960", "2025 Fall"), ("4970", "2026 Winter")]
+WORDS = (
+    "introduction advanced topics seminar theory methods analysis systems design data statistics "
+    "probability algorithms programming networks economics markets policy history culture literature "
+    "biology chemistry physics calculus linear algebra learning machine vision language music art "
+    "psychology cognition behavior society politics law ethics writing research laboratory computing"
+).split()
+SYLLABLES = "ba be bi bo ca ce co da de di fa fe ga ge la le li lo ma me mi mo na ne no pa pe ra re ri ro sa se si so ta te ti to va ve".split()
+FIRST = "Alex Jordan Sam Taylor Morgan Casey Riley Jamie Avery Quinn Drew Parker Robin Skyler Dana".split()
+LAST = "Smith Chen Garcia Patel Kim Nguyen Brown Johnson Lee Wang Davis Lopez Wilson Moore Clark Lewis".split()
+INSTRUCTOR_COUNT = 3000
+# Common Northwestern meeting patterns: (days, length in minutes)
+PATTERNS = [("MoWeFr", 50), ("MoWe", 80), ("TuTh", 80), ("MoWeFr", 50), ("Th", 170), ("Fr", 50)]
+DAYS_SINGLE = ("Mo", "Tu", "We", "Th", "Fr")
+
+
+def requirement_codes() -> set[str]:
+    codes = set()
+
+    def walk(node):
+        if isinstance(node, list):
+            for child in node:
+                walk(child)
+        elif node["type"] == "COURSE":
+            codes.add(canonical_course_code(node["value"]))
+        elif node["type"] != "CREDIT":
+            walk(node["value"])
+
+    with open(REQUIREMENTS_PATH) as f:
+        for program in json.load(f):
+            walk(program["requirements"])
+    return codes
+
+
+def generate(course_count: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    codes = requirement_codes()
+    subjects = sorted({code.split(" ")[0] for code in codes})
+    while len(subjects) < max(20, course_count // 90):
+        subjects.append("".join(rng.choice("ABCDEFGHIJKLMNOPRSTUVW") for _ in range(rng.randint(3, 7))))
+    while len(codes) < course_count:
+        codes.add(f"{rng.choice(subjects)} {rng.randint(101, 499)}-{rng.choice((0, 0, 0, 1, 2))}")
+
+    ordered = sorted(codes)
+    by_subject: dict[str, list[str]] = {}
+    for code in ordered:
+        by_subject.setdefault(code.split(" ")[0], []).append(code)
+    # A Zipf-like title vocabulary: common words first, then a long tail of made-up ones
+    vocabulary = WORDS + sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(4000)})
+    weights = [1 / (rank + 10) for rank in range(len(vocabulary))]
+    surnames = LAST + sorted({"".join(rng.choices(SYLLABLES, k=3)).title() for _ in range(INSTRUCTOR_COUNT)})
+    instructors = sorted({f"{rng.choice(FIRST)} {rng.choice(surnames)}" for _ in range(INSTRUCTOR_COUNT)})
+
+    courses, sections = [], []
+    for code in ordered:
+        subject, number = code.split(" ")
+        title = " ".join(rng.choices(vocabulary, weights, k=rng.randint(2, 5))).title()
+        # Prerequisites only point at lower-numbered courses in the same subject, so the graph is acyclic
+        lower = [other for other in by_subject[subject] if other < code and other[:-2] != code[:-2]]
+        prereq_codes = [rng.sample(lower, min(len(lower), rng.randint(1, 2))) for _ in range(rng.randint(0, 2)) if lower]
+        courses.append({
+            "id": code,
+            "name": title,
+            "units": "1.00",
+            "description": f"{title}. " + " ".join(rng.choices(vocabulary, weights, k=rng.randint(15, 40))).capitalize() + ".",
+            "prereqs": " and ".join(" or ".join(group) for group in prereq_codes) or None,
+            "prereq_codes": prereq_codes,
+        })
+        for term, _ in TERMS:
+            if rng.random() > 0.4:
+                continue
+            for index in range(rng.randint(1, 3)):
+                days, length = rng.choice(PATTERNS)
+                start = rng.choice(range(8 * 60, 18 * 60, 30))
+                meetings = [(days, start, start + length)]
+                if rng.random() < 0.3:
+                    discussion = rng.choice(range(8 * 60, 19 * 60, 60))
+                    meetings.append((rng.choice(DAYS_SINGLE), discussion, discussion + 50))
+                sections.append({
+                    "section_id": f"{term}-{subject}-{number}-{index + 1}",
+                    "term": term,
+                    "subject": subject,
+                    "number": number,
+                    "title": title,
+                    "section": str(index + 1),
+                    "component": "LEC",
+                    "capacity": rng.choice((20, 30, 45, 60, 120, 200)),
+                    "instructors": [{"name": name} for name in rng.sample(instructors, rng.choice((1, 1, 1, 2)))],
+                    "meeting_days": [m[0] for m in meetings],
+                    "start_time": [{"h": m[1] // 60, "m": m[1] % 60} for m in meetings],
+                    "end_time": [{"h": m[2] // 60, "m": m[2] % 60} for m in meetings],
+                    "room": [f"Tech {rng.choice('ABCLM')}{rng.randint(100, 399)}" for _ in meetings],
+                })
+    return {"terms": [{"term": term, "name": name} for term, name in TERMS], "courses": courses, "sections": sections}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=12000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="data/catalog_synthetic.json")
+    args = parser.parse_args()
+
+    snapshot = generate(args.courses, args.seed)
+    with open(args.out, "w") as f:
+        json.dump(snapshot, f)
+    print(f"Wrote {len(snapshot['courses'])} courses and {len(snapshot['sections'])} sections to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Load a paper.nu-style catalog snapshot into the course tables and rebuild the
+search index. Run from the backend/ directory:
+
+    python -m scripts.load_catalog data/catalog.json
+"""
+import argparse
+import time
+from sqlmodel import SQLModel
+
+from app.database import engine
+from app.services.catalog_store import load_catalog_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("snapshot", help="path to the catalog JSON snapshot")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    start = time.perf_counter()
+    counts = load_catalog_file(args.snapshot, engine)
+    print(f"Loaded catalog in {time.perf_counter() - start:.2f}s: "
+          + ", ".join(f"{count} {table}" for table, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
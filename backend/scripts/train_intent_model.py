@@ -0,0 +1,78 @@
+"""
+Train the local intent classifier and write data/intent_model.json.
+
+Fits a multinomial logistic regression over hashed word n-grams
+(see app/services/intent_classifier.py) with plain SGD, so it needs no
+ML dependencies. Run from the backend/ directory:
+
+    python -m scripts.train_intent_model
+"""
+import argparse
+import json
+import math
+import random
+from pathlib import Path
+
+from app.services.intent_classifier import DEFAULT_BUCKETS, INTENTS, MODEL_PATH, extract_features
+
+DATASET_DIR = Path(__file__).resolve().parents[1] / "data" / "intents"
+
+
+def load_examples(path: Path) -> list[tuple[str, str]]:
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["text"], row["intent"]) for row in rows]
+
+
+def train(examples, n_buckets: int, epochs: int, learning_rate: float, l2: float, seed: int) -> dict[int, list[float]]:
+    rng = random.Random(seed)
+    n_intents = len(INTENTS)
+    index = {intent: i for i, intent in enumerate(INTENTS)}
+    featurized = [(extract_features(text, n_buckets), index[intent]) for text, intent in examples]
+    weights: dict[int, list[float]] = {}
+
+    for epoch in range(epochs):
+        rng.shuffle(featurized)
+        lr = learning_rate / (1 + epoch * 0.1)
+        for buckets, label in featurized:
+            rows = [weights.setdefault(b, [0.0] * n_intents) for b in buckets]
+            scores = [sum(row[i] for row in rows) for i in range(n_intents)]
+            top = max(scores)
+            exps = [math.exp(s - top) for s in scores]
+            total = sum(exps)
+            for i in range(n_intents):
+                grad = exps[i] / total - (1.0 if i == label else 0.0)
+                for row in rows:
+                    row[i] -= lr * (grad + l2 * row[i])
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", type=Path, default=DATASET_DIR / "train.jsonl")
+    parser.add_argument("--output", type=Path, default=MODEL_PATH)
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    examples = load_examples(args.train)
+    weights = train(examples, args.buckets, args.epochs, args.learning_rate, args.l2, args.seed)
+    model = {
+        "intents": INTENTS,
+        "n_buckets": args.buckets,
+        "weights": {
+            str(bucket): [round(w, 4) for w in row]
+            for bucket, row in sorted(weights.items())
+            if any(abs(w) >= 1e-4 for w in row)
+        },
+    }
+    with open(args.output, "w") as f:
+        json.dump(model, f, separators=(",", ":"))
+    print(f"Trained on {len(examples)} examples; wrote {len(model['weights'])} buckets to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
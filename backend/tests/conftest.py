@@ -0,0 +1,37 @@
+"""
+Tests run the app in-process against a temporary SQLite database, with the
+offline OpenAI stand-in and a low bcrypt cost. Settings are read when the app
+is first imported, so the environment is set here, before any test imports it.
+Run from the backend/ directory:
+
+    python -m pytest -q tests
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="catlog-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["OPENAI_FAKE"] = "true"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["REFERENCE_ARTIFACT_PATH"] = os.path.join(_tmp, "reference.bin")
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.database import init_db
+    from app.main import app
+    init_db()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Headers for a freshly registered student."""
+    email = f"student{os.urandom(4).hex()}@u.northwestern.edu"
+    response = client.post("/auth/register", json={"email": email, "password": "pw", "name": "Student"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
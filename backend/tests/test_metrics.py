@@ -0,0 +1,16 @@
+import pytest
+from app.database import engine
+from app.services.catalog_store import load_catalog
+from app.services.metrics import Metric, Registry
+
+
+def test_metric_subclasses_must_define_children():
+    with pytest.raises(TypeError):
+        Metric("incomplete", "No _new_child.", registry=Registry())
+
+
+def test_course_search_statements_are_timed(client, auth_headers):
+    load_catalog({"terms": [], "courses": [], "sections": []}, engine)
+    response = client.get("/courses/search", params={"instructor": "Smith"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert 'db_query_duration_seconds_count{operation="SELECT",table="instructordb"' in client.get("/metrics").text
@@ -0,0 +1,29 @@
+# Stored on UserProfileDB, never part of a profile response
+PRIVATE_FIELDS = {"hashed_password", "version", "schedules_version"}
+
+
+def profile_update(netid: str) -> dict:
+    return {
+        "netid": netid,
+        "majors": ["Data Science"],
+        "minors": [],
+        "classes_already_taken": ["STAT 202-0"],
+        "vocational_interests": ["data"],
+        "earliest_class_time": "10:00",
+    }
+
+
+def test_read_profile_hides_private_fields(client, auth_headers):
+    response = client.get("/profile/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert not PRIVATE_FIELDS & response.json().keys()
+
+
+def test_update_profile_hides_private_fields(client, auth_headers):
+    netid = client.get("/auth/me", headers=auth_headers).json()["netid"]
+    response = client.put("/profile/me", json=profile_update(netid), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    profile = response.json()["profile"]
+    assert profile["majors"] == ["Data Science"]
+    assert not PRIVATE_FIELDS & profile.keys()
+
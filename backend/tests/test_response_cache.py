@@ -0,0 +1,13 @@
+from app.database import engine
+from app.services.catalog_store import load_catalog
+from app.services.response_cache import ResponseCache
+
+
+def test_catalog_load_invalidates_cached_answers(client):
+    cache = ResponseCache(ttl_seconds=60, max_entries=10, max_bytes=1 << 20, check_interval_seconds=0)
+    cache.put("what is comp_sci 211?", "context", "An intro course.")
+    assert cache.get("what is comp_sci 211?", "context") is not None
+
+    load_catalog({"terms": [], "courses": [], "sections": []}, engine)
+    assert cache.get("what is comp_sci 211?", "context") is None
+    assert cache.invalidations == 1
@@ -11,6 +11,8 @@ const ChatWindow = () => {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
+  // Set by the first reply; sent with follow-ups so the assistant sees earlier turns
+  const [conversationId, setConversationId] = useState<number | null>(null);
 
   const handleSend = async () => {
     if (!input.trim() || loading) return;
@@ -21,10 +23,12 @@ const ChatWindow = () => {
     setLoading(true);
 
     try {
-      const data = await apiService.post<{ response: string }>("/chat", {
+      const data = await apiService.post<{ response: string; conversation_id: number }>("/chat", {
         message: input,
         timestamp: new Date().toISOString(),
+        ...(conversationId !== null && { conversation_id: conversationId }),
       });
+      setConversationId(data.conversation_id);
 
       setMessages([
         ...newMessages,